@@ -0,0 +1,122 @@
+"""
+Compare the memory and startup time of separate app processes with the single-process host.
+
+Starts each configuration with uvicorn, waits until its /health endpoint
+answers, then reads the resident memory of the server processes from /proc
+(Linux only). The apps need a reachable database, since their startup
+warms the connection pool.
+
+Usage:
+    PYTHONPATH=. python benchmarks/host_footprint.py [--runs N]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Tuple
+
+# Configurations to compare: (ASGI app, health path) per server process
+CONFIGURATIONS: Dict[str, List[Tuple[str, str]]] = {
+    "separate": [("healthai.src.main:app", "/health"), ("travelai.src.main:app", "/health")],
+    "host": [("ledger_host.main:app", "/health")],
+}
+
+BASE_PORT = 8700
+STARTUP_TIMEOUT = 60.0
+
+
+def resident_memory(pid: int) -> int:
+    """
+    Get the resident memory of a process.
+
+    Args:
+        pid: ID of the process
+
+    Returns:
+        Resident memory in bytes
+    """
+    with open(f"/proc/{pid}/status", encoding="ascii") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError(f"No VmRSS for process {pid}")
+
+
+def wait_until_healthy(url: str, process: subprocess.Popen) -> None:
+    """
+    Poll a health endpoint until it answers.
+
+    Args:
+        url: URL of the health endpoint
+        process: The server process, which must not exit meanwhile
+    """
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server for {url} exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.02)
+    raise RuntimeError(f"Server for {url} did not start within {STARTUP_TIMEOUT} s")
+
+
+def measure(servers: List[Tuple[str, str]]) -> Tuple[float, int]:
+    """
+    Start a configuration and measure it.
+
+    The servers start in parallel, as they would on a node.
+
+    Args:
+        servers: ASGI app and health path of each server process
+
+    Returns:
+        Seconds until all servers answer, and their total resident memory in bytes
+    """
+    processes = []
+    start = time.perf_counter()
+    try:
+        for offset, (app, _) in enumerate(servers):
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", app, "--port", str(BASE_PORT + offset), "--log-level", "warning"],
+                env=os.environ.copy()
+            ))
+        for offset, ((_, health_path), process) in enumerate(zip(servers, processes)):
+            wait_until_healthy(f"http://127.0.0.1:{BASE_PORT + offset}{health_path}", process)
+        startup = time.perf_counter() - start
+        memory = sum(resident_memory(process.pid) for process in processes)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+    return startup, memory
+
+
+def main() -> None:
+    """
+    Run the comparison and print the median of each configuration.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Starts per configuration")
+    args = parser.parse_args()
+
+    print(f"{'configuration':<16}{'processes':>10}{'startup':>12}{'memory':>12}")
+    for name, servers in CONFIGURATIONS.items():
+        results = [measure(servers) for _ in range(args.runs)]
+        startup = statistics.median(result[0] for result in results)
+        memory = statistics.median(result[1] for result in results)
+        print(f"{name:<16}{len(servers):>10}{startup:>10.2f} s{memory / 2 ** 20:>9.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
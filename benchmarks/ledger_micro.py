@@ -0,0 +1,418 @@
+"""
+Micro-benchmarks of the ledger repository and service against a disposable database.
+
+Times the hot repository and service methods, one call at a time on a
+single session, for owners whose histories hold 10, 10k and 1M entries
+(--sizes), so that the cost of a method can be told apart from the size of
+the history it reads:
+
+- repository: get_owner_balance, compute_owner_balance,
+  has_sufficient_balance, check_nonce_exists (hit and miss), create_entry
+  and create_entry_atomic
+- service: get_balance without the cache, and add_ledger_entry in the
+  configured LEDGER_WRITE_MODE
+- schemas: building the balance, entry and history page responses from
+  database rows, which needs no round trip
+
+Writes credit the owner, so they never run out of balance. The entries
+they create are deleted at the end, and at the start in case an earlier
+run was interrupted, leaving the seeded histories as they were. Every read runs in its own transaction, as in a request. The
+repository and service have no balance cache or nonce filter, so every
+call reaches the database.
+
+Missing sized owners are seeded first with benchmarks/seed_ledger.py; seed
+background entries with it to benchmark against a larger table. The
+database defaults to the app's database with a _bench suffix.
+
+Each case makes --number timed calls, or fewer once it has run for
+--max-time seconds. The report gives the median, p95 and p99 latency per
+call and the calls per second; --output also writes it as JSON with the
+git revision, to compare runs across commits.
+
+Usage:
+    PYTHONPATH=. python benchmarks/ledger_micro.py --app healthai [--number N] [--output FILE]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable, List, NamedTuple, Sequence, Tuple
+
+from sqlalchemy import any_, delete, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.types import String
+
+from benchmarks.load_test import git_revision
+from benchmarks.seed_ledger import (
+    APPS,
+    CREDIT_OPERATION,
+    SPEND_OPERATION,
+    LedgerModels,
+    bench_database_url,
+    ensure_database,
+    estimated_rows,
+    load_models,
+    parse_sizes,
+    seed,
+    sized_owner_id
+)
+from monorepo.core.db.engine import create_engine
+from monorepo.core.ledgers.pydantic_schemas import LedgerBalanceResponse
+from monorepo.core.ledgers.services.base_ledger_service import BaseLedgerService, create_ledger_service
+
+# Prefix of the nonces of the entries written by the cases
+NONCE_PREFIX = "micro-"
+
+# Entries in the history page built by the schema case
+PAGE_SIZE = 100
+
+# Timed calls a case makes at least, even past its time budget
+MIN_CALLS = 5
+
+
+class Case(NamedTuple):
+    """A benchmarked call."""
+    name: str
+    owner: str
+    call: Callable[[int], Awaitable[None]]
+
+
+class CaseResult(NamedTuple):
+    """Latency of a benchmarked call, in microseconds."""
+    name: str
+    owner: str
+    calls: int
+    median: float
+    p95: float
+    p99: float
+    calls_per_second: float
+
+
+class Benchmark:
+    """
+    Builds and runs the benchmark cases of an app on one session.
+    """
+
+    def __init__(self, models: LedgerModels, db: AsyncSession, service: BaseLedgerService):
+        """
+        Initialize the benchmark.
+
+        Args:
+            models: The app's models
+            db: Session the cases run on
+            service: Ledger service without cache or nonce filter
+        """
+        self.models = models
+        self.db = db
+        self.service = service
+        self.repository = service.repository
+        self.credit = models.operation_enum[CREDIT_OPERATION]
+        self.spend = models.operation_enum[SPEND_OPERATION]
+        self.prefix = f"{NONCE_PREFIX}{uuid.uuid4().hex[:12]}"
+        self.nonces = itertools.count()
+
+    def nonce(self) -> str:
+        """
+        Make a fresh nonce for an entry written by a case.
+        """
+        return f"{self.prefix}-{next(self.nonces)}"
+
+    async def build_cases(self, sizes: Sequence[int]) -> List[Case]:
+        """
+        Build the cases for the sized owners.
+
+        Args:
+            sizes: History sizes of the owners
+
+        Returns:
+            The cases, in the order they run
+        """
+        cases = []
+        for size in sizes:
+            cases.extend(await self.owner_cases(sized_owner_id(size)))
+
+        db = self.db
+        repository = self.repository
+        cases.append(Case(
+            "repository.check_nonce_exists (miss)", "-",
+            lambda i: repository.check_nonce_exists(db, f"{self.prefix}-missing-{i}")
+        ))
+        cases.extend(await self.schema_cases(sized_owner_id(max(sizes))))
+        return cases
+
+    async def owner_cases(self, owner_id: str) -> List[Case]:
+        """
+        Build the database cases of one owner.
+
+        Args:
+            owner_id: ID of the owner
+
+        Returns:
+            The cases
+        """
+        db = self.db
+        repository = self.repository
+        service = self.service
+        entry = self.models.entry
+        existing_nonce = await db.scalar(
+            select(entry.nonce).where(entry.owner_id == owner_id).order_by(entry.id.desc()).limit(1)
+        )
+        await db.rollback()
+
+        return [
+            Case("repository.get_owner_balance", owner_id, lambda i: repository.get_owner_balance(db, owner_id)),
+            Case(
+                "repository.compute_owner_balance", owner_id,
+                lambda i: repository.compute_owner_balance(db, owner_id)
+            ),
+            Case(
+                "repository.has_sufficient_balance", owner_id,
+                lambda i: repository.has_sufficient_balance(db, owner_id, self.spend)
+            ),
+            Case(
+                "repository.check_nonce_exists (hit)", owner_id,
+                lambda i: repository.check_nonce_exists(db, existing_nonce)
+            ),
+            Case(
+                "repository.create_entry", owner_id,
+                lambda i: repository.create_entry(db, owner_id, self.credit, self.nonce())
+            ),
+            Case(
+                "repository.create_entry_atomic", owner_id,
+                lambda i: repository.create_entry_atomic(db, owner_id, self.credit, self.nonce())
+            ),
+            Case("service.get_balance", owner_id, lambda i: service.get_balance(db, owner_id, use_cache=False)),
+            Case(
+                "service.add_ledger_entry", owner_id,
+                lambda i: service.add_ledger_entry(db, owner_id, self.credit, self.nonce())
+            ),
+        ]
+
+    async def schema_cases(self, owner_id: str) -> List[Case]:
+        """
+        Build the cases of the response schemas, from rows of an owner.
+
+        Args:
+            owner_id: ID of the owner whose rows are used
+
+        Returns:
+            The cases
+        """
+        rows = await self.repository.get_entries_page(self.db, owner_id, PAGE_SIZE)
+        await self.db.rollback()
+        entry = (await self.db.execute(select(self.models.entry).where(self.models.entry.id == rows[0].id))).scalar()
+        # The rollbacks between calls would expire a persistent entry
+        self.db.expunge(entry)
+        await self.db.rollback()
+
+        read_schema = self.service.read_schema
+        page_schema = self.service.page_schema
+        now = datetime.datetime.utcnow()
+
+        async def balance_response(i: int) -> None:
+            LedgerBalanceResponse(owner_id=owner_id, balance=i, last_updated=now)
+
+        async def entry_response(i: int) -> None:
+            read_schema.model_validate(entry)
+
+        async def page_response(i: int) -> None:
+            page_schema.model_validate({"owner_id": owner_id, "entries": rows, "next_cursor": rows[-1].id})
+
+        return [
+            Case("schema LedgerBalanceResponse", "-", balance_response),
+            Case("schema entry read", "-", entry_response),
+            Case(f"schema page of {len(rows)}", "-", page_response),
+        ]
+
+    async def run(self, case: Case, number: int, warmup: int, max_time: float) -> CaseResult:
+        """
+        Time the calls of a case.
+
+        Each call is followed by a rollback outside the timing, which ends
+        the transaction of a read as closing a request's session would.
+        Slow cases, such as summing a long history, stop early once they
+        have used their time budget.
+
+        Args:
+            case: The case
+            number: Timed calls
+            warmup: Calls before the timed ones, which prepare the statements
+            max_time: Seconds after which the case stops, once it made MIN_CALLS timed calls
+
+        Returns:
+            The latency of the case
+        """
+        timings = []
+        deadline = time.perf_counter() + max_time
+        for i in range(warmup + number):
+            start = time.perf_counter()
+            await case.call(i)
+            elapsed = time.perf_counter() - start
+            await self.db.rollback()
+            if i >= warmup:
+                timings.append(elapsed * 1e6)
+            if start > deadline and len(timings) >= MIN_CALLS:
+                break
+
+        quantiles = statistics.quantiles(timings, n=100, method="inclusive")
+        return CaseResult(
+            case.name,
+            case.owner,
+            calls=len(timings),
+            median=statistics.median(timings),
+            p95=quantiles[94],
+            p99=quantiles[98],
+            calls_per_second=1e6 / statistics.fmean(timings)
+        )
+
+    async def delete_written_entries(self, owner_ids: Sequence[str]) -> int:
+        """
+        Delete the entries written by benchmark runs and take them out of the owner balances.
+
+        Args:
+            owner_ids: IDs of the owners the cases wrote to
+
+        Returns:
+            Number of entries deleted
+        """
+        entry = self.models.entry
+        balance = self.models.balance
+        deleted = 0
+        for owner_id in owner_ids:
+            result = await self.db.execute(
+                delete(entry)
+                .where(entry.owner_id == owner_id, entry.nonce.startswith(NONCE_PREFIX))
+                .returning(entry.nonce, entry.amount)
+            )
+            rows = result.all()
+            if not rows:
+                continue
+            await self.db.execute(
+                update(balance)
+                .where(balance.owner_id == owner_id)
+                .values(balance=balance.balance - sum(row.amount for row in rows))
+            )
+            if self.models.nonce is not None:
+                nonces = literal([row.nonce for row in rows], ARRAY(String))
+                await self.db.execute(delete(self.models.nonce).where(self.models.nonce.nonce == any_(nonces)))
+            deleted += len(rows)
+        await self.db.commit()
+        return deleted
+
+
+def build_service(models: LedgerModels) -> BaseLedgerService:
+    """
+    Build the app's ledger service without balance cache, nonce filter or group commit.
+
+    Args:
+        models: The app's models
+
+    Returns:
+        The service
+    """
+    service_class = create_ledger_service(
+        models.entry,
+        models.operation_enum,
+        balance_model=models.balance,
+        checkpoint_model=models.checkpoint,
+        nonce_model=models.nonce,
+        write_mode=models.settings.LEDGER_WRITE_MODE
+    )
+    return service_class()
+
+
+async def run_benchmark(database_url: str, models: LedgerModels, sizes: Sequence[int], number: int,
+                        warmup: int, max_time: float) -> Tuple[float, List[CaseResult]]:
+    """
+    Seed the missing sized owners and run every case.
+
+    Args:
+        database_url: URL of the disposable database
+        models: The app's models
+        sizes: History sizes of the owners
+        number: Timed calls per case
+        warmup: Untimed calls per case before the timed ones
+        max_time: Time budget of each case in seconds
+
+    Returns:
+        Estimated entries in the ledger table, and the result of each case
+    """
+    await ensure_database(database_url, models.metadata)
+    await seed(database_url, models, sizes)
+
+    engine = create_engine(database_url, models.settings)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    try:
+        table_rows = await estimated_rows(engine, models.entry.__table__.name)
+        owner_ids = [sized_owner_id(size) for size in sizes]
+        async with session_factory() as db:
+            benchmark = Benchmark(models, db, build_service(models))
+            await benchmark.delete_written_entries(owner_ids)
+            results = []
+            try:
+                for case in await benchmark.build_cases(sizes):
+                    results.append(await benchmark.run(case, number, warmup, max_time))
+            finally:
+                await db.rollback()
+                await benchmark.delete_written_entries(owner_ids)
+        return table_rows, results
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    """
+    Run the micro-benchmarks and print the latency of each case.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), default="healthai", help="App whose ledger is benchmarked")
+    parser.add_argument("--database-url", help="Disposable database, defaults to the app's database with _bench")
+    parser.add_argument("--sizes", type=parse_sizes, default=[10, 10000, 1000000],
+                        help="History sizes of the benchmarked owners")
+    parser.add_argument("--number", type=int, default=1000, help="Timed calls per case")
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed calls per case before the timed ones")
+    parser.add_argument("--max-time", type=float, default=10.0, help="Seconds after which a slow case stops early")
+    parser.add_argument("--output", help="Also write the report as JSON to this file")
+    args = parser.parse_args()
+
+    models = load_models(args.app)
+    database_url = args.database_url or bench_database_url(models.settings.database_url_str)
+    table_rows, results = asyncio.run(run_benchmark(
+        database_url, models, args.sizes, args.number, args.warmup, args.max_time
+    ))
+
+    print(f"{models.entry.__table__.name}: ~{table_rows:,.0f} entries, "
+          f"write mode {models.settings.LEDGER_WRITE_MODE.value}, {models.settings.LEDGER_PARTITIONS} partitions")
+    print(f"{'case':<40}{'owner':>15}{'calls':>7}{'median':>13}{'p95':>13}{'p99':>13}{'calls/s':>10}")
+    for result in results:
+        print(
+            f"{result.name:<40}{result.owner:>15}{result.calls:>7}{result.median:>10.1f} us"
+            f"{result.p95:>10.1f} us{result.p99:>10.1f} us{result.calls_per_second:>10.1f}"
+        )
+
+    if args.output:
+        report = {
+            "revision": git_revision(),
+            "app": args.app,
+            "database": make_url(database_url).database,
+            "table_entries": table_rows,
+            "write_mode": models.settings.LEDGER_WRITE_MODE.value,
+            "partitions": models.settings.LEDGER_PARTITIONS,
+            "config": {"sizes": args.sizes, "number": args.number, "warmup": args.warmup, "max_time": args.max_time},
+            "results": [result._asdict() for result in results],
+        }
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
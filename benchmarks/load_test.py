@@ -0,0 +1,495 @@
+"""
+HTTP load test of the ledger applications, reporting throughput and tail latency as JSON.
+
+Runs a closed-loop workload: each of --concurrency clients sends one request
+at a time over its own keep-alive connection for --duration seconds. Every
+request is drawn from a workload mix:
+
+- balance: GET /ledger/{owner_id}, the read-heavy balance polling
+- history: GET /ledger/{owner_id}/entries
+- credit: POST /ledger/ with a fresh nonce
+- spend: POST /ledger/ spending from one of the --hot-owners most popular
+  owners, which were credited up front; overdrafts are expected rejections
+- retry: POST /ledger/ resending a nonce that was already used, as a client
+  retrying after a timeout would; the duplicate rejection is expected
+
+Owners are drawn from a Zipf distribution over --owners owners, so a few
+owners get most of the traffic. Expected rejections are counted apart from
+errors; any other non-2xx status or connection failure is an error.
+
+The target is either a server that is already running (--url) or the app,
+started with uvicorn inside this process (--app); the in-process server
+shares the event loop and CPU with the load generator, so use --url for
+numbers that compare with production. Both apps share the operation names
+used here. The in-process apps read their database settings as usual, such
+as HEALTHAI_DATABASE_URL.
+
+Usage:
+    PYTHONPATH=. python benchmarks/load_test.py --app healthai --mix read-heavy --duration 30
+    PYTHONPATH=. python benchmarks/load_test.py --url http://localhost:8001 --mix balance=50,spend=50 --output run.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import random
+import statistics
+import subprocess
+import time
+import urllib.parse
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+# ASGI application of each app for --app
+APPS = {
+    "healthai": "healthai.src.main:app",
+    "travelai": "travelai.src.main:app",
+}
+
+# Named workload mixes; custom mixes are given as kind=weight pairs
+MIXES: Dict[str, Dict[str, int]] = {
+    "read-heavy": {"balance": 90, "history": 5, "credit": 5},
+    "write-burst": {"credit": 90, "balance": 10},
+    "hot-spend": {"spend": 80, "balance": 20},
+    "retries": {"credit": 50, "retry": 50},
+    "mixed": {"balance": 60, "history": 5, "credit": 20, "spend": 10, "retry": 5},
+}
+
+# Shared operations every app implements
+CREDIT_OPERATION = "CREDIT_ADD"
+SPEND_OPERATION = "CREDIT_SPEND"
+
+# Rejection details that are the expected outcome of a request kind
+EXPECTED_REJECTIONS = {
+    "spend": b"Insufficient balance",
+    "retry": b"Duplicate transaction",
+}
+
+# Most recent nonces kept for retries
+RETRY_POOL_SIZE = 10000
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """
+    Parse a workload mix argument.
+
+    Args:
+        value: Name of a predefined mix, or comma-separated kind=weight pairs
+
+    Returns:
+        Weight of each request kind
+
+    Raises:
+        argparse.ArgumentTypeError: If the mix is unknown or malformed
+    """
+    if value in MIXES:
+        return MIXES[value]
+
+    kinds = {"balance", "history", "credit", "spend", "retry"}
+    mix = {}
+    try:
+        for pair in value.split(","):
+            kind, weight = pair.split("=")
+            mix[kind.strip()] = int(weight)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid mix: {value!r}")
+    if not set(mix) <= kinds or not any(mix.values()):
+        raise argparse.ArgumentTypeError(f"Mix kinds must be among {sorted(kinds)} with a positive weight")
+    return mix
+
+
+class ZipfOwners:
+    """
+    Draws owner IDs with Zipf-distributed popularity: owner k has weight 1 / k^s.
+    """
+
+    def __init__(self, prefix: str, owners: int, exponent: float, rng: random.Random):
+        """
+        Initialize the distribution.
+
+        Args:
+            prefix: Prefix of the owner IDs, unique per run
+            owners: Number of owners
+            exponent: Zipf exponent s; 0 is uniform, higher values concentrate traffic
+            rng: Random number generator
+        """
+        self.ids = [f"{prefix}-{rank}" for rank in range(1, owners + 1)]
+        self.cumulative = list(itertools.accumulate(1 / rank ** exponent for rank in range(1, owners + 1)))
+        self.rng = rng
+
+    def draw(self, limit: Optional[int] = None) -> str:
+        """
+        Draw an owner.
+
+        Args:
+            limit: Only draw among the limit most popular owners
+
+        Returns:
+            Owner ID
+        """
+        count = len(self.ids) if limit is None else min(limit, len(self.ids))
+        point = self.rng.random() * self.cumulative[count - 1]
+        return self.ids[bisect.bisect_left(self.cumulative, point, hi=count - 1)]
+
+
+class HTTPConnection:
+    """
+    Minimal HTTP/1.1 keep-alive client connection, enough for the ledger API.
+    """
+
+    def __init__(self, host: str, port: int):
+        """
+        Initialize the connection; it is opened on the first request.
+
+        Args:
+            host: Server host
+            port: Server port
+        """
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, bytes]:
+        """
+        Send a request and read its response.
+
+        Args:
+            method: HTTP method
+            path: Request path
+            body: JSON body
+
+        Returns:
+            Status code and response body
+
+        Raises:
+            ConnectionError: If the server closed the connection
+        """
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(payload)}\r\n"
+        if body is not None:
+            head += "Content-Type: application/json\r\n"
+        self._writer.write(head.encode() + b"\r\n" + payload)
+
+        try:
+            status_line = await self._reader.readline()
+            if not status_line:
+                raise ConnectionError("Server closed the connection")
+            status = int(status_line.split()[1])
+            headers = {}
+            while True:
+                line = await self._reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if headers.get("transfer-encoding", "").lower() == "chunked":
+                chunks = []
+                while True:
+                    size = int((await self._reader.readline()).split(b";")[0], 16)
+                    chunk = await self._reader.readexactly(size + 2)
+                    if size == 0:
+                        break
+                    chunks.append(chunk[:-2])
+                response_body = b"".join(chunks)
+            else:
+                response_body = await self._reader.readexactly(int(headers.get("content-length", 0)))
+        except BaseException:
+            await self.close()
+            raise
+
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, response_body
+
+    async def close(self) -> None:
+        """
+        Close the connection.
+        """
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._reader = None
+
+
+class LoadTest:
+    """
+    A load test run against one server.
+    """
+
+    def __init__(self, host: str, port: int, args: argparse.Namespace):
+        """
+        Initialize the run.
+
+        Args:
+            host: Server host
+            port: Server port
+            args: Parsed command line arguments
+        """
+        self.host = host
+        self.port = port
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.owners = ZipfOwners(f"load-{self.run_id}", args.owners, args.zipf, self.rng)
+        self.kinds = list(args.mix)
+        self.weights = list(itertools.accumulate(args.mix[kind] for kind in self.kinds))
+        self.used_nonces: List[Tuple[str, str]] = []
+        self.nonce_counter = itertools.count()
+        # Per request kind: latencies of completed requests, rejections and errors
+        self.latencies: Dict[str, List[float]] = {kind: [] for kind in self.kinds}
+        self.rejections: Dict[str, int] = {kind: 0 for kind in self.kinds}
+        self.errors: Dict[str, int] = {kind: 0 for kind in self.kinds}
+        self.statuses: Dict[str, int] = {}
+
+    def next_nonce(self) -> str:
+        """
+        Get a nonce that was not used before.
+        """
+        return f"load-{self.run_id}-{next(self.nonce_counter)}"
+
+    def build_request(self, kind: str) -> Tuple[str, str, Optional[dict]]:
+        """
+        Build a request of a kind.
+
+        Args:
+            kind: Request kind
+
+        Returns:
+            Method, path and JSON body
+        """
+        if kind == "balance":
+            return "GET", f"/ledger/{urllib.parse.quote(self.owners.draw())}", None
+        if kind == "history":
+            return "GET", f"/ledger/{urllib.parse.quote(self.owners.draw())}/entries?limit=20", None
+        if kind == "retry" and self.used_nonces:
+            owner_id, nonce = self.rng.choice(self.used_nonces)
+            return "POST", "/ledger/", {"owner_id": owner_id, "operation": CREDIT_OPERATION, "nonce": nonce}
+        if kind == "spend":
+            owner_id = self.owners.draw(self.args.hot_owners)
+            return "POST", "/ledger/", {"owner_id": owner_id, "operation": SPEND_OPERATION, "nonce": self.next_nonce()}
+
+        # Credits, and retries before any nonce was used
+        owner_id, nonce = self.owners.draw(), self.next_nonce()
+        self.used_nonces.append((owner_id, nonce))
+        if len(self.used_nonces) > RETRY_POOL_SIZE:
+            del self.used_nonces[:RETRY_POOL_SIZE // 2]
+        return "POST", "/ledger/", {"owner_id": owner_id, "operation": CREDIT_OPERATION, "nonce": nonce}
+
+    async def seed(self) -> None:
+        """
+        Credit the hot owners, so that their spends can succeed.
+        """
+        if "spend" not in self.kinds or self.args.seed_credits <= 0:
+            return
+
+        connection = HTTPConnection(self.host, self.port)
+        try:
+            for owner_id in self.owners.ids[:self.args.hot_owners]:
+                for _ in range(self.args.seed_credits):
+                    body = {"owner_id": owner_id, "operation": CREDIT_OPERATION, "nonce": self.next_nonce()}
+                    status, response = await connection.request("POST", "/ledger/", body)
+                    if status >= 300:
+                        raise RuntimeError(f"Seeding failed with {status}: {response[:200]!r}")
+        finally:
+            await connection.close()
+
+    async def client(self, deadline: float, measure_from: float) -> None:
+        """
+        Send requests one after another until the deadline.
+
+        Args:
+            deadline: Monotonic time at which to stop
+            measure_from: Monotonic time from which requests are recorded
+        """
+        connection = HTTPConnection(self.host, self.port)
+        try:
+            while True:
+                start = time.perf_counter()
+                if start >= deadline:
+                    break
+                kind = self.kinds[bisect.bisect_right(self.weights, self.rng.random() * self.weights[-1])]
+                method, path, body = self.build_request(kind)
+                try:
+                    status, response = await connection.request(method, path, body)
+                except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+                    status, response = None, b""
+                elapsed = time.perf_counter() - start
+                if start < measure_from:
+                    continue
+
+                self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+                if status is not None and status < 300:
+                    self.latencies[kind].append(elapsed)
+                elif status == 400 and kind in EXPECTED_REJECTIONS and EXPECTED_REJECTIONS[kind] in response:
+                    self.latencies[kind].append(elapsed)
+                    self.rejections[kind] += 1
+                else:
+                    self.errors[kind] += 1
+        finally:
+            await connection.close()
+
+    async def run(self) -> dict:
+        """
+        Seed the data, run the workload and summarize it.
+
+        Returns:
+            The report
+        """
+        await self.seed()
+        start = time.perf_counter()
+        measure_from = start + self.args.warmup
+        deadline = measure_from + self.args.duration
+        await asyncio.gather(*(self.client(deadline, measure_from) for _ in range(self.args.concurrency)))
+        elapsed = time.perf_counter() - measure_from
+
+        all_latencies = [latency for latencies in self.latencies.values() for latency in latencies]
+        report = summarize(all_latencies, sum(self.errors.values()), sum(self.rejections.values()), elapsed)
+        report["by_kind"] = {
+            kind: summarize(self.latencies[kind], self.errors[kind], self.rejections[kind], elapsed)
+            for kind in self.kinds
+        }
+        report["statuses"] = self.statuses
+        return report
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """
+    Get a percentile of sorted values by the nearest-rank method.
+    """
+    if not ordered:
+        return 0.0
+    return ordered[max(0, min(len(ordered) - 1, int(fraction * len(ordered) + 0.5) - 1))]
+
+
+def summarize(latencies: List[float], errors: int, rejections: int, elapsed: float) -> dict:
+    """
+    Summarize the requests of a run.
+
+    Args:
+        latencies: Seconds taken by each completed request, rejected ones included
+        errors: Number of failed requests
+        rejections: Number of expected rejections
+        elapsed: Measured seconds
+
+    Returns:
+        Counts, rates and latency percentiles in milliseconds
+    """
+    ordered = sorted(latencies)
+    requests = len(ordered) + errors
+    return {
+        "requests": requests,
+        "rps": round(requests / elapsed, 1) if elapsed > 0 else 0.0,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "rejections": rejections,
+        "latency_ms": {
+            "mean": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+            "p50": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99": round(percentile(ordered, 0.99) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+    }
+
+
+def git_revision() -> Optional[str]:
+    """
+    Get the commit the working tree is on, to tell runs apart.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_in_process(app: str, args: argparse.Namespace) -> dict:
+    """
+    Start an app with uvicorn in this process and run the load test against it.
+
+    Args:
+        app: Import string of the ASGI application
+        args: Parsed command line arguments
+
+    Returns:
+        The report
+    """
+    import uvicorn
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", access_log=False, lifespan="on")
+    server = uvicorn.Server(config)
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        if serve.done():
+            serve.result()
+            raise RuntimeError("The server stopped during startup")
+        await asyncio.sleep(0.05)
+
+    try:
+        port = server.servers[0].sockets[0].getsockname()[1]
+        return await LoadTest("127.0.0.1", port, args).run()
+    finally:
+        server.should_exit = True
+        await serve
+
+
+def main() -> None:
+    """
+    Run the load test and write the JSON report.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--app", choices=sorted(APPS), help="Start the app in this process")
+    target.add_argument("--url", help="Base URL of a running app, such as http://localhost:8000")
+    parser.add_argument("--mix", type=parse_mix, default="mixed",
+                        help=f"Workload mix: one of {', '.join(MIXES)}, or kind=weight pairs")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of load before measuring")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--owners", type=int, default=10000, help="Number of distinct owners")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of the owner popularity")
+    parser.add_argument("--hot-owners", type=int, default=10, help="Most popular owners that spends go to")
+    parser.add_argument("--seed-credits", type=int, default=20, help="Credits given to each hot owner up front")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument("--output", help="Write the report to this file instead of stdout")
+    args = parser.parse_args()
+
+    if args.app:
+        report = asyncio.run(run_in_process(APPS[args.app], args))
+    else:
+        url = urllib.parse.urlsplit(args.url)
+        report = asyncio.run(LoadTest(url.hostname, url.port or 80, args).run())
+
+    report = {
+        "revision": git_revision(),
+        "target": args.url or f"in-process {args.app}",
+        "config": {
+            "mix": args.mix,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "owners": args.owners,
+            "zipf": args.zipf,
+            "hot_owners": args.hot_owners,
+        },
+        **report,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
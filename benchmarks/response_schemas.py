@@ -0,0 +1,242 @@
+"""
+Micro-benchmark of the per-request CPU spent building and encoding ledger responses.
+
+Compares the previous response path with the current one for a single entry,
+a history page and a batch result:
+
+- before: the service copies the entry into a v1-style schema (GenericModel,
+  @validator, orm_mode), then FastAPI dumps it, validates the dump against
+  the route's response_model, serializes it to JSON-compatible Python and
+  encodes it with json.dumps.
+- after: the service validates the rows once into the app's native v2 schema
+  and LedgerJSONResponse encodes that model with pydantic-core.
+
+No database is needed; the rows are plain attribute objects.
+
+Usage:
+    PYTHONPATH=. python benchmarks/response_schemas.py [--number N]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import timeit
+import warnings
+from types import SimpleNamespace
+from typing import Callable, Dict, Generic, List, Optional, Tuple
+
+from pydantic import BaseModel, TypeAdapter, validator
+
+from monorepo.core.ledgers.pydantic_schemas import (
+    create_ledger_batch_schemas,
+    create_ledger_page_schema,
+    create_ledger_schemas
+)
+from monorepo.core.ledgers.responses import LedgerJSONResponse
+from monorepo.core.ledgers.schemas import LedgerEntryStatus, TLedgerOperation
+from travelai.src.api.ledgers.schemas import TravelAILedgerOperation
+
+# The legacy schemas use the deprecated v1 API on purpose
+warnings.simplefilter("ignore")
+from pydantic.generics import GenericModel  # noqa: E402
+
+
+class LegacyLedgerEntryRead(GenericModel, Generic[TLedgerOperation]):
+    """The read schema as it was defined before the native v2 schemas."""
+    operation: TLedgerOperation
+    amount: Optional[int] = None
+    nonce: str
+    owner_id: str
+    id: int
+    created_on: datetime.datetime
+
+    @validator("amount", pre=True, always=True)
+    def set_amount_from_operation(cls, v: Optional[int], values: dict) -> int:
+        if v is not None:
+            return v
+        return values["operation"].value_amount
+
+    class Config:
+        orm_mode = True
+
+
+class LegacyHistoryItem(GenericModel, Generic[TLedgerOperation]):
+    id: int
+    operation: TLedgerOperation
+    amount: int
+    nonce: str
+    created_on: datetime.datetime
+
+
+class LegacyEntryPage(GenericModel, Generic[TLedgerOperation]):
+    owner_id: str
+    entries: List[LegacyHistoryItem[TLedgerOperation]]
+    next_cursor: Optional[int] = None
+
+
+class LegacyBatchItemResult(GenericModel, Generic[TLedgerOperation]):
+    index: int
+    nonce: str
+    status: LedgerEntryStatus
+    entry: Optional[LegacyLedgerEntryRead[TLedgerOperation]] = None
+    detail: Optional[str] = None
+
+
+class LegacyBatchResponse(GenericModel, Generic[TLedgerOperation]):
+    created: int
+    rejected: int
+    results: List[LegacyBatchItemResult[TLedgerOperation]]
+
+
+def make_rows(count: int) -> List[SimpleNamespace]:
+    """
+    Build fake ledger rows.
+
+    Args:
+        count: Number of rows
+
+    Returns:
+        Objects with the attributes of a ledger entry row
+    """
+    now = datetime.datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=index,
+            owner_id="owner-1",
+            operation=TravelAILedgerOperation.DAILY_REWARD,
+            amount=1,
+            nonce=f"nonce-{index}",
+            created_on=now
+        )
+        for index in range(count)
+    ]
+
+
+def fastapi_response(model: BaseModel, response_model: type) -> bytes:
+    """
+    Encode a model the way FastAPI does for a route with a response_model.
+    """
+    adapter = TypeAdapter(response_model)
+    content = model.model_dump(by_alias=True)
+    validated = adapter.validate_python(content)
+    return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+
+
+def build_cases(batch_size: int, page_size: int) -> Dict[str, Tuple[int, Dict[str, Callable[[], bytes]]]]:
+    """
+    Build the before and after response paths of each payload.
+
+    The before paths use the unparametrized schemas, as the service did.
+
+    Args:
+        batch_size: Entries in the batch payload
+        page_size: Entries in the history page payload
+
+    Returns:
+        The entry count and the callables producing the response body, by payload
+    """
+    operation = TravelAILedgerOperation
+    _, read_schema = create_ledger_schemas(operation)
+    _, batch_schema = create_ledger_batch_schemas(operation)
+    page_schema = create_ledger_page_schema(operation)
+    entry = make_rows(1)[0]
+    page_rows = make_rows(page_size)
+    batch_rows = make_rows(batch_size)
+
+    def legacy_entry(row: SimpleNamespace) -> BaseModel:
+        return LegacyLedgerEntryRead(
+            id=row.id,
+            operation=row.operation,
+            amount=row.amount,
+            nonce=row.nonce,
+            owner_id=row.owner_id,
+            created_on=row.created_on
+        )
+
+    def single_before() -> bytes:
+        return fastapi_response(legacy_entry(entry), read_schema)
+
+    def single_after() -> bytes:
+        return LedgerJSONResponse(read_schema.model_validate(entry)).body
+
+    def page_before() -> bytes:
+        page = LegacyEntryPage(
+            owner_id="owner-1",
+            entries=[
+                LegacyHistoryItem(
+                    id=row.id,
+                    operation=row.operation,
+                    amount=row.amount,
+                    nonce=row.nonce,
+                    created_on=row.created_on
+                )
+                for row in page_rows
+            ],
+            next_cursor=None
+        )
+        return fastapi_response(page, page_schema)
+
+    def page_after() -> bytes:
+        page = page_schema.model_validate({"owner_id": "owner-1", "entries": page_rows, "next_cursor": None})
+        return LedgerJSONResponse(page).body
+
+    def batch_before() -> bytes:
+        results = [
+            LegacyBatchItemResult(
+                index=index, nonce=row.nonce, status=LedgerEntryStatus.CREATED, entry=legacy_entry(row)
+            )
+            for index, row in enumerate(batch_rows)
+        ]
+        response = LegacyBatchResponse(created=len(results), rejected=0, results=results)
+        return fastapi_response(response, batch_schema)
+
+    def batch_after() -> bytes:
+        response = batch_schema.model_validate({
+            "created": len(batch_rows),
+            "rejected": 0,
+            "results": [
+                {"index": index, "nonce": row.nonce, "status": LedgerEntryStatus.CREATED, "entry": row}
+                for index, row in enumerate(batch_rows)
+            ]
+        })
+        return LedgerJSONResponse(response).body
+
+    return {
+        "single entry": (1, {"before": single_before, "after": single_after}),
+        f"page of {page_size}": (page_size, {"before": page_before, "after": page_after}),
+        f"batch of {batch_size}": (batch_size, {"before": batch_before, "after": batch_after}),
+    }
+
+
+def main() -> None:
+    """
+    Run the benchmark and print the time per response.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="Entries encoded per measurement")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Entries in the batch payload")
+    parser.add_argument("--page-size", type=int, default=100, help="Entries in the history page payload")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per path; the fastest is reported")
+    args = parser.parse_args()
+
+    print(f"{'payload':<16}{'before':>14}{'after':>14}{'saved':>14}{'speedup':>9}")
+    for name, (entries, paths) in build_cases(args.batch_size, args.page_size).items():
+        if json.loads(paths["before"]()) != json.loads(paths["after"]()):
+            raise SystemExit(f"{name}: the responses differ")
+
+        # Keep the total work of each payload roughly equal
+        number = max(1, args.number // entries)
+        timings = {}
+        for path, func in paths.items():
+            best = min(timeit.repeat(func, number=number, repeat=args.repeat))
+            timings[path] = best / number * 1e6
+        saved = timings["before"] - timings["after"]
+        print(
+            f"{name:<16}{timings['before']:>11.1f} us{timings['after']:>11.1f} us"
+            f"{saved:>11.1f} us{timings['before'] / timings['after']:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
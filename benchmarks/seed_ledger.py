@@ -0,0 +1,526 @@
+"""
+Fast synthetic data generator for disposable ledger benchmark databases.
+
+Creates the benchmark database and the app's tables when they are missing,
+then loads entries with COPY from several processes at once, each streaming
+its share of the rows over its own connection with synchronous commit off.
+When a load adds more rows than the table holds, the secondary indexes and
+the nonce constraint are dropped first and rebuilt in parallel afterwards,
+since sorting the rows once beats updating every index row by row. Seeding
+100M entries this way takes minutes rather than the hours row-by-row
+inserts would.
+
+Two kinds of owners are seeded:
+
+- sized owners, bench-<entries>, whose history has an exact length, such as
+  bench-10, bench-10000 and bench-1000000; owners that already exist are
+  skipped, so rerunning the seeder only adds what is missing
+- background owners, owner-<n>, over which --background-entries entries are
+  spread evenly, to give the tables and indexes a realistic size
+
+Every owner's history repeats three credits and one spend of the shared
+operations, so balances never go negative, with timestamps spread over the
+last --days days in ID order. The materialized owner balances are rebuilt
+and the tables analyzed afterwards.
+
+The database defaults to the app's database with a _bench suffix, such as
+healthai_bench; never point --database-url at a database you want to keep.
+
+Usage:
+    PYTHONPATH=. python benchmarks/seed_ledger.py --app healthai --sizes 10,10000,1000000
+    PYTHONPATH=. python benchmarks/seed_ledger.py --app travelai --background-entries 100000000 --jobs 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import datetime
+import importlib
+import itertools
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import MetaData, exists, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from monorepo.core.db.ledger_repository import LedgerRepository
+from monorepo.core.db.models import BaseLedgerCheckpoint, BaseLedgerEntry, BaseLedgerNonce, BaseOwnerBalance
+from monorepo.core.ledgers.schemas import BaseLedgerOperation
+
+logger = logging.getLogger(__name__)
+
+# Settings and models modules and model name prefix of each app
+APPS = {
+    "healthai": ("healthai.src.api.config", "healthai.src.api.ledgers.models", "HealthAI"),
+    "travelai": ("travelai.src.api.config", "travelai.src.api.ledgers.models", "TravelAI"),
+}
+
+# Shared operations every app implements
+CREDIT_OPERATION = "CREDIT_ADD"
+SPEND_OPERATION = "CREDIT_SPEND"
+
+# Every owner's history repeats this many entries, the last of which is a spend
+SPEND_EVERY = 4
+
+# Columns of the ledger entries loaded with COPY; IDs come from the table's sequence
+COPY_COLUMNS = ["owner_id", "operation", "amount", "nonce", "created_on"]
+
+# Sort memory of each index rebuilt after a large load
+INDEX_BUILD_MEMORY = "512MB"
+
+
+class LedgerModels(NamedTuple):
+    """The settings, models and operations of an app."""
+    settings: object
+    metadata: MetaData
+    entry: Type[BaseLedgerEntry]
+    balance: Type[BaseOwnerBalance]
+    checkpoint: Type[BaseLedgerCheckpoint]
+    nonce: Optional[Type[BaseLedgerNonce]]
+    operation_enum: Type[BaseLedgerOperation]
+
+    def repository(self) -> LedgerRepository:
+        """
+        Build a ledger repository of the app's tables, without caches or filters.
+        """
+        return LedgerRepository(
+            self.entry,
+            balance_model=self.balance,
+            checkpoint_model=self.checkpoint,
+            nonce_model=self.nonce
+        )
+
+
+def load_models(app: str) -> LedgerModels:
+    """
+    Import the settings and ledger models of an app.
+
+    Args:
+        app: Name of the app
+
+    Returns:
+        The app's settings, models and operations
+    """
+    config_module, models_module, prefix = APPS[app]
+    settings = importlib.import_module(config_module).settings
+    models = importlib.import_module(models_module)
+    entry = getattr(models, f"{prefix}LedgerEntryModel")
+    return LedgerModels(
+        settings=settings,
+        metadata=models.metadata,
+        entry=entry,
+        balance=getattr(models, f"{prefix}OwnerBalanceModel"),
+        checkpoint=getattr(models, f"{prefix}LedgerCheckpointModel"),
+        nonce=getattr(models, f"{prefix}LedgerNonceModel"),
+        operation_enum=entry.__table__.c.operation.type.enum_class
+    )
+
+
+def bench_database_url(database_url: str) -> str:
+    """
+    Derive the URL of the disposable benchmark database from an app's database URL.
+
+    Args:
+        database_url: Database URL of the app
+
+    Returns:
+        The same URL with a _bench suffix on the database name
+    """
+    url = make_url(database_url)
+    return url.set(database=f"{url.database}_bench").render_as_string(hide_password=False)
+
+
+async def ensure_database(database_url: str, metadata: MetaData, drop: bool = False) -> None:
+    """
+    Create a database and the app's tables unless they exist.
+
+    Args:
+        database_url: URL of the database
+        metadata: MetaData of the app's tables
+        drop: Drop the tables first, discarding all seeded data
+    """
+    url = make_url(database_url)
+    server = create_async_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    try:
+        async with server.connect() as conn:
+            found = await conn.scalar(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": url.database}
+            )
+            if not found:
+                await conn.exec_driver_sql(f'CREATE DATABASE "{url.database}"')
+    finally:
+        await server.dispose()
+
+    engine = create_async_engine(database_url)
+    try:
+        async with engine.begin() as conn:
+            if drop:
+                await conn.run_sync(metadata.drop_all)
+            await conn.run_sync(metadata.create_all)
+    finally:
+        await engine.dispose()
+
+
+class SeedPlan:
+    """
+    The rows of one seeding run, addressed by a global row index.
+
+    Sized owners come first, one after the other, followed by the background
+    entries, which are dealt out to the background owners in turn. Rows are
+    computed from their index, so any range can be generated independently.
+    """
+
+    def __init__(self, sized_owners: Sequence[Tuple[str, int]], background_entries: int,
+                 background_owners: int, credit: Tuple[str, int], spend: Tuple[str, int], days: float):
+        """
+        Initialize the plan.
+
+        Args:
+            sized_owners: ID and number of entries of each sized owner
+            background_entries: Number of entries spread over the background owners
+            background_owners: Number of background owners
+            credit: Name and amount of the credit operation
+            spend: Name and amount of the spend operation
+            days: Days over which the entry timestamps are spread
+        """
+        self.sized_owners = list(sized_owners)
+        self.offsets = list(itertools.accumulate((count for _, count in self.sized_owners), initial=0))
+        self.background_entries = background_entries
+        self.background_owners = max(1, background_owners)
+        self.credit = credit
+        self.spend = spend
+        # Nonces of different runs never collide
+        self.run_id = uuid.uuid4().hex[:12]
+        self.total = self.offsets[-1] + background_entries
+        now = datetime.datetime.utcnow()
+        self.start_time = now - datetime.timedelta(days=days)
+        self.step = (now - self.start_time) / max(1, self.total)
+
+    def rows(self, start: int, stop: int) -> List[Tuple[str, str, int, str, datetime.datetime]]:
+        """
+        Generate a range of rows.
+
+        Args:
+            start: Index of the first row
+            stop: Index after the last row
+
+        Returns:
+            Values of the COPY_COLUMNS of each row
+        """
+        rows = []
+        credit_name, credit_amount = self.credit
+        spend_name, spend_amount = self.spend
+        sized_total = self.offsets[-1]
+
+        for index in range(start, stop):
+            if index < sized_total:
+                owner = bisect.bisect_right(self.offsets, index) - 1
+                owner_id = self.sized_owners[owner][0]
+                position = index - self.offsets[owner]
+            else:
+                background_index = index - sized_total
+                owner_id = f"owner-{background_index % self.background_owners}"
+                position = background_index // self.background_owners
+
+            if position % SPEND_EVERY == SPEND_EVERY - 1:
+                operation, amount = spend_name, spend_amount
+            else:
+                operation, amount = credit_name, credit_amount
+            rows.append((
+                owner_id, operation, amount, f"seed-{self.run_id}-{index}", self.start_time + self.step * index
+            ))
+        return rows
+
+
+def copy_rows(database_url: str, table: str, plan: SeedPlan, start: int, stop: int, chunk_size: int) -> int:
+    """
+    Load a range of the plan's rows with COPY, in a worker process.
+
+    Args:
+        database_url: URL of the database
+        table: Name of the ledger entry table
+        plan: The seeding plan
+        start: Index of the first row
+        stop: Index after the last row
+        chunk_size: Rows per COPY and transaction
+
+    Returns:
+        Number of rows loaded
+    """
+    async def copy() -> int:
+        engine = create_async_engine(database_url)
+        try:
+            async with engine.connect() as conn:
+                # Losing the last commits of a crashed seeding run does not matter
+                await conn.exec_driver_sql("SET synchronous_commit = off")
+                await conn.commit()
+                raw = await conn.get_raw_connection()
+                for chunk_start in range(start, stop, chunk_size):
+                    rows = plan.rows(chunk_start, min(chunk_start + chunk_size, stop))
+                    await raw.driver_connection.copy_records_to_table(table, records=rows, columns=COPY_COLUMNS)
+                    await conn.commit()
+        finally:
+            await engine.dispose()
+        return stop - start
+
+    return asyncio.run(copy())
+
+
+async def estimated_rows(engine: AsyncEngine, table: str) -> float:
+    """
+    Get the planner's estimate of the rows of a table and its partitions.
+
+    Args:
+        engine: Engine of the database
+        table: Name of the table
+
+    Returns:
+        Estimated number of rows; 0 for tables that were never analyzed
+    """
+    async with engine.connect() as conn:
+        return await conn.scalar(text(
+            "SELECT coalesce(sum(greatest(reltuples, 0)), 0) FROM pg_class "
+            "WHERE oid = CAST(:table AS regclass) "
+            "OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = CAST(:table AS regclass))"
+        ), {"table": table})
+
+
+async def drop_secondary_indexes(engine: AsyncEngine, table: str) -> List[str]:
+    """
+    Drop the unique constraints and indexes of a table, except its primary key.
+
+    Indexes of a partitioned table are dropped from all its partitions.
+
+    Args:
+        engine: Engine of the database
+        table: Name of the table
+
+    Returns:
+        Statements that recreate the dropped constraints and indexes
+    """
+    async with engine.begin() as conn:
+        constraints = (await conn.execute(text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) AND contype = 'u'"
+        ), {"table": table})).all()
+        indexes = (await conn.execute(text(
+            "SELECT index.relname, pg_get_indexdef(pg_index.indexrelid) FROM pg_index "
+            "JOIN pg_class AS index ON index.oid = pg_index.indexrelid "
+            "WHERE pg_index.indrelid = CAST(:table AS regclass) AND NOT pg_index.indisprimary "
+            "AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = pg_index.indexrelid)"
+        ), {"table": table})).all()
+
+        statements = []
+        for name, definition in constraints:
+            await conn.exec_driver_sql(f'ALTER TABLE "{table}" DROP CONSTRAINT "{name}"')
+            statements.append(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+        for name, definition in indexes:
+            await conn.exec_driver_sql(f'DROP INDEX "{name}"')
+            statements.append(definition)
+    return statements
+
+
+async def run_in_parallel(engine: AsyncEngine, statements: Sequence[str], jobs: int) -> None:
+    """
+    Run statements such as index builds, each on its own connection.
+
+    Args:
+        engine: Engine of the database
+        statements: The statements
+        jobs: Maximum number of statements running at once
+    """
+    semaphore = asyncio.Semaphore(max(1, jobs))
+
+    async def run(statement: str) -> None:
+        async with semaphore, engine.begin() as conn:
+            await conn.exec_driver_sql(f"SET LOCAL maintenance_work_mem = '{INDEX_BUILD_MEMORY}'")
+            await conn.exec_driver_sql(statement)
+
+    await asyncio.gather(*(run(statement) for statement in statements))
+
+
+async def missing_sized_owners(db: AsyncSession, models: LedgerModels, sizes: Sequence[int]) -> List[Tuple[str, int]]:
+    """
+    Find the sized owners that have not been seeded yet.
+
+    Args:
+        db: Database session
+        models: The app's models
+        sizes: Number of entries of each sized owner
+
+    Returns:
+        ID and number of entries of each missing sized owner
+    """
+    missing = []
+    for size in sizes:
+        owner_id = sized_owner_id(size)
+        found = await db.scalar(select(exists().where(models.entry.owner_id == owner_id)))
+        if not found:
+            missing.append((owner_id, size))
+    return missing
+
+
+def sized_owner_id(size: int) -> str:
+    """
+    Get the ID of the sized owner with a given number of entries.
+
+    Args:
+        size: Number of entries
+
+    Returns:
+        Owner ID
+    """
+    return f"bench-{size}"
+
+
+async def seed(database_url: str, models: LedgerModels, sizes: Sequence[int], background_entries: int = 0,
+               background_owners: int = 100000, jobs: int = 1, chunk_size: int = 100000, days: float = 365.0,
+               checkpoints: bool = False) -> int:
+    """
+    Seed a benchmark database.
+
+    Args:
+        database_url: URL of the database, whose tables must exist
+        models: The app's models
+        sizes: Number of entries of each sized owner to seed unless present
+        background_entries: Number of entries spread over the background owners
+        background_owners: Number of background owners
+        jobs: Worker processes loading rows in parallel
+        chunk_size: Rows per COPY and transaction
+        days: Days over which the entry timestamps are spread
+        checkpoints: Build the balance checkpoints after loading
+
+    Returns:
+        Number of entries loaded
+    """
+    engine = create_async_engine(database_url)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    try:
+        async with session_factory() as db:
+            sized_owners = await missing_sized_owners(db, models, sizes)
+        operations = models.operation_enum
+        plan = SeedPlan(
+            sized_owners,
+            background_entries,
+            background_owners,
+            credit=(CREDIT_OPERATION, operations[CREDIT_OPERATION].value_amount),
+            spend=(SPEND_OPERATION, operations[SPEND_OPERATION].value_amount),
+            days=days
+        )
+        if plan.total == 0:
+            return 0
+
+        # Indexes are built much faster from scratch than row by row, unless the
+        # table already holds more rows than are added
+        table = models.entry.__table__.name
+        rebuild_indexes = []
+        if plan.total > await estimated_rows(engine, table):
+            rebuild_indexes = await drop_secondary_indexes(engine, table)
+
+        # Contiguous ranges, so each worker's rows stay in ID order within the owner
+        jobs = max(1, min(jobs, plan.total // chunk_size + 1))
+        bounds = [plan.total * job // jobs for job in range(jobs + 1)]
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            loaded = sum(await asyncio.gather(*(
+                loop.run_in_executor(executor, copy_rows, database_url, table, plan, start, stop, chunk_size)
+                for start, stop in zip(bounds, bounds[1:])
+            )))
+        logger.info("Copied %d entries in %.1f s", loaded, time.perf_counter() - start)
+        start = time.perf_counter()
+        await run_in_parallel(engine, rebuild_indexes, jobs)
+        if rebuild_indexes:
+            logger.info("Rebuilt %d indexes in %.1f s", len(rebuild_indexes), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        repository = models.repository()
+        async with session_factory() as db:
+            await repository.rebuild_owner_balances(db)
+            if checkpoints:
+                await repository.build_checkpoints(db, lag=datetime.timedelta(0))
+        logger.info("Rebuilt owner balances in %.1f s", time.perf_counter() - start)
+
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for table_name in models.metadata.tables:
+                await conn.exec_driver_sql(f'ANALYZE "{table_name}"')
+        return loaded
+    finally:
+        await engine.dispose()
+
+
+def parse_sizes(value: str) -> List[int]:
+    """
+    Parse a comma-separated list of history sizes.
+
+    Args:
+        value: Sizes such as "10,10000,1000000"
+
+    Returns:
+        The sizes
+
+    Raises:
+        argparse.ArgumentTypeError: If a size is not a positive integer
+    """
+    try:
+        sizes = [int(size) for size in value.split(",") if size.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid sizes: {value!r}")
+    if any(size <= 0 for size in sizes):
+        raise argparse.ArgumentTypeError("Sizes must be positive")
+    return sizes
+
+
+def main() -> None:
+    """
+    Seed a benchmark database and print the load rate.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), default="healthai", help="App whose tables are seeded")
+    parser.add_argument("--database-url", help="Disposable database, defaults to the app's database with _bench")
+    parser.add_argument("--sizes", type=parse_sizes, default=[10, 10000, 1000000],
+                        help="History sizes of the sized owners")
+    parser.add_argument("--background-entries", type=int, default=0, help="Entries of the background owners")
+    parser.add_argument("--background-owners", type=int, default=100000, help="Number of background owners")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel COPY processes")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Rows per COPY and transaction")
+    parser.add_argument("--days", type=float, default=365.0, help="Days the timestamps are spread over")
+    parser.add_argument("--checkpoints", action="store_true", help="Build the balance checkpoints")
+    parser.add_argument("--drop", action="store_true", help="Drop the app's tables before seeding")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    models = load_models(args.app)
+    database_url = args.database_url or bench_database_url(models.settings.database_url_str)
+
+    async def run() -> int:
+        await ensure_database(database_url, models.metadata, drop=args.drop)
+        return await seed(
+            database_url,
+            models,
+            args.sizes,
+            background_entries=args.background_entries,
+            background_owners=args.background_owners,
+            jobs=args.jobs,
+            chunk_size=args.chunk_size,
+            days=args.days,
+            checkpoints=args.checkpoints
+        )
+
+    start = time.perf_counter()
+    loaded = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    print(f"Seeded {loaded} entries into {make_url(database_url).database} in {elapsed:.1f} s "
+          f"({loaded / elapsed:,.0f} entries/s including balances and ANALYZE)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+#!/bin/bash
+
+set -e
+
+# Let streaming replicas, such as the postgres-replica service, connect
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,46 @@
+"""
+Ledger maintenance commands for HealthAI.
+
+Usage:
+    python ledger_cli.py backfill-balances
+    python ledger_cli.py build-checkpoints [--chunk-size N] [--lag SECONDS]
+    python ledger_cli.py export [--format ndjson|csv] [--output FILE] [--owner-id ID]
+        [--operation NAME ...] [--created-from ISO] [--created-to ISO]
+    python ledger_cli.py archive --directory DIR [--older-than-days N] [--chunk-size N]
+    python ledger_cli.py read-archive --directory DIR [--format ndjson|csv] [--owner-id ID]
+    python ledger_cli.py relay-outbox [--sink file|notify] [--file PATH] [--channel NAME] [--name CURSOR]
+    python ledger_cli.py listen-changes [--channel NAME]
+"""
+import os
+import sys
+
+# Make the project root importable when run from the application directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from monorepo.core.db.ledger_repository import LedgerRepository
+from monorepo.core.ledgers.cli import run_ledger_cli
+from healthai.src.api.config import settings
+from healthai.src.api.ledgers.models import (
+    HealthAILedgerArchivedNonceModel,
+    HealthAILedgerCheckpointModel,
+    HealthAILedgerEntryModel,
+    HealthAILedgerNonceModel,
+    HealthAILedgerOutboxCursorModel,
+    HealthAILedgerOutboxModel,
+    HealthAIOwnerBalanceModel
+)
+
+
+if __name__ == "__main__":
+    run_ledger_cli(
+        settings.database_url_str,
+        LedgerRepository(
+            HealthAILedgerEntryModel,
+            balance_model=HealthAIOwnerBalanceModel,
+            checkpoint_model=HealthAILedgerCheckpointModel,
+            nonce_model=HealthAILedgerNonceModel,
+            outbox_model=HealthAILedgerOutboxModel,
+            outbox_cursor_model=HealthAILedgerOutboxCursorModel,
+            archived_nonce_model=HealthAILedgerArchivedNonceModel
+        )
+    )
@@ -10,8 +10,16 @@ from sqlalchemy.ext.asyncio import create_async_engine
 
 from alembic import context
 from healthai.src.api.config import settings
-from monorepo.core.db.models import Base
-from healthai.src.api.ledgers.models import HealthAILedgerEntryModel
+from healthai.src.api.ledgers.models import (
+    HealthAILedgerArchivedNonceModel,
+    HealthAILedgerCheckpointModel,
+    HealthAILedgerEntryModel,
+    HealthAILedgerNonceModel,
+    HealthAILedgerOutboxCursorModel,
+    HealthAILedgerOutboxModel,
+    HealthAIOwnerBalanceModel,
+    metadata
+)
 
 # This is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -27,7 +35,7 @@ if config.config_file_name is not None:
 
 # Add your model's MetaData object here
 # for 'autogenerate' support
-target_metadata = Base.metadata
+target_metadata = metadata
 
 
 def run_migrations_offline() -> None:
@@ -0,0 +1,41 @@
+"""Create ledger_entries table
+
+Revision ID: 0001_create_ledger_entries
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+Baseline schema for HealthAI. Databases created with setup_db.py already have
+this table, so it is only created when missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001_create_ledger_entries"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_entries",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("operation", sa.String(length=50), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column("nonce", sa.String(length=100), nullable=False),
+        sa.Column("owner_id", sa.String(length=100), nullable=False),
+        sa.Column("created_on", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("nonce"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_ledger_entries_operation", "ledger_entries", ["operation"], if_not_exists=True)
+    op.create_index("ix_ledger_entries_owner_id", "ledger_entries", ["owner_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ledger_entries_owner_id", table_name="ledger_entries")
+    op.drop_index("ix_ledger_entries_operation", table_name="ledger_entries")
+    op.drop_table("ledger_entries")
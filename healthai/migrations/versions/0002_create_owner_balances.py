@@ -0,0 +1,46 @@
+"""Create owner_balances table
+
+Revision ID: 0002_create_owner_balances
+Revises: 0001_create_ledger_entries
+Create Date: 2026-10-18 00:00:00
+
+Materialized per-owner balances for HealthAI, backfilled from the existing
+ledger entries.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002_create_owner_balances"
+down_revision = "0001_create_ledger_entries"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "owner_balances",
+        sa.Column("owner_id", sa.String(length=100), nullable=False),
+        sa.Column("balance", sa.Integer(), nullable=False),
+        sa.Column("updated_on", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("owner_id"),
+        if_not_exists=True,
+    )
+
+    # Backfill balances while blocking concurrent ledger writes
+    op.execute("LOCK TABLE ledger_entries IN SHARE MODE")
+    op.execute(
+        """
+        INSERT INTO owner_balances (owner_id, balance, updated_on)
+        SELECT owner_id, SUM(amount), now()
+        FROM ledger_entries
+        GROUP BY owner_id
+        ON CONFLICT (owner_id) DO UPDATE
+        SET balance = EXCLUDED.balance, updated_on = EXCLUDED.updated_on
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("owner_balances")
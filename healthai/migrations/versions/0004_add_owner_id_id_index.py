@@ -0,0 +1,37 @@
+"""Add (owner_id, id) index to ledger_entries
+
+Revision ID: 0004_add_owner_id_id_index
+Revises: 0003_create_ledger_checkpoints
+Create Date: 2026-10-18 00:00:00
+
+Composite index for keyset pagination of HealthAI ledger history. It is built
+concurrently so that writes to ledger_entries are not blocked meanwhile.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0004_add_owner_id_id_index"
+down_revision = "0003_create_ledger_checkpoints"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_ledger_entries_owner_id_id",
+            "ledger_entries",
+            ["owner_id", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_ledger_entries_owner_id_id",
+            table_name="ledger_entries",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,47 @@
+"""Create ledger_outbox and ledger_outbox_cursors tables
+
+Revision ID: 0006_create_ledger_outbox
+Revises: 0005_partition_ledger_entries
+Create Date: 2026-10-18 00:00:00
+
+Transactional outbox of the HealthAI ledger and the cursors of the relays that
+publish it. Entries are only added to the outbox while LEDGER_OUTBOX_ENABLED
+is set; entries written before are not backfilled.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006_create_ledger_outbox"
+down_revision = "0005_partition_ledger_entries"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_outbox",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("entry_id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.String(length=100), nullable=False),
+        sa.Column("operation", sa.String(length=50), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column("nonce", sa.String(length=100), nullable=False),
+        sa.Column("created_on", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "ledger_outbox_cursors",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("updated_on", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ledger_outbox_cursors")
+    op.drop_table("ledger_outbox")
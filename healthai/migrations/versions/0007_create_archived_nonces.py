@@ -0,0 +1,45 @@
+"""Create ledger_archived_nonces table
+
+Revision ID: 0007_create_archived_nonces
+Revises: 0006_create_ledger_outbox
+Create Date: 2026-10-18 00:00:00
+
+Nonces of the archived HealthAI ledger entries, and the trigger on ledger_entries
+that rejects them, so retried writes stay duplicates once their original
+entry is archived. A partitioned ledger keeps every nonce in ledger_nonces
+and is left unchanged. Entries archived before this revision are not
+registered.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from monorepo.core.db.archive import ARCHIVED_NONCE_TRIGGER, archived_nonce_trigger_ddl
+from monorepo.core.db.partitioning import is_partitioned
+
+
+# revision identifiers, used by Alembic.
+revision = "0007_create_archived_nonces"
+down_revision = "0006_create_ledger_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if is_partitioned(op.get_bind()):
+        return
+
+    op.create_table(
+        "ledger_archived_nonces",
+        sa.Column("nonce", sa.String(length=100), nullable=False),
+        sa.Column("owner_id", sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint("nonce"),
+        if_not_exists=True,
+    )
+    for statement in archived_nonce_trigger_ddl():
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.execute(f"DROP TRIGGER IF EXISTS {ARCHIVED_NONCE_TRIGGER} ON ledger_entries")
+    op.execute(f"DROP FUNCTION IF EXISTS {ARCHIVED_NONCE_TRIGGER}()")
+    op.drop_table("ledger_archived_nonces", if_exists=True)
@@ -0,0 +1,50 @@
+"""Drop the owner_id index of ledger_entries
+
+Revision ID: 0008_drop_owner_id_index
+Revises: 0007_create_archived_nonces
+Create Date: 2026-10-18 00:00:00
+
+The (owner_id, id) index added by 0004 serves every lookup by owner_id, so
+the single-column index only costs HealthAI ledger writes. It is dropped
+concurrently so that writes to ledger_entries are not blocked meanwhile; an
+index of a partitioned table cannot be, and is dropped directly.
+"""
+from alembic import op
+
+from monorepo.core.db.partitioning import is_partitioned
+
+
+# revision identifiers, used by Alembic.
+revision = "0008_drop_owner_id_index"
+down_revision = "0007_create_archived_nonces"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if is_partitioned(op.get_bind()):
+        op.drop_index("ix_ledger_entries_owner_id", table_name="ledger_entries", if_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_ledger_entries_owner_id",
+            table_name="ledger_entries",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    # A partitioned ledger never had the index
+    if is_partitioned(op.get_bind()):
+        return
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_ledger_entries_owner_id",
+            "ledger_entries",
+            ["owner_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
@@ -0,0 +1,18 @@
+"""
+Production server for HealthAI.
+
+Usage:
+    python serve.py [--host HOST] [--port PORT] [--workers N]
+"""
+import os
+import sys
+
+# Make the project root importable when run from the application directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from monorepo.core.server import run_server
+from healthai.src.api.config import settings
+
+
+if __name__ == "__main__":
+    run_server("healthai.src.main:app", settings)
@@ -1,20 +1,19 @@
 """
 Database configuration for HealthAI.
 """
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from fastapi import Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from healthai.src.api.config import settings
+from monorepo.core.db.engine import create_engine
+from monorepo.core.db.replicas import CONSISTENCY_TOKEN_HEADER, ReplicaRouter, parse_consistency_token
 
 
-# Create database engine
-engine = create_async_engine(
-    str(settings.DATABASE_URL),  # PostgresDsn'yi string'e dönüştür
-    echo=settings.DEBUG,
-    future=True  # Use SQLAlchemy 2.0 style
-)
+# Create database engine; pool and statement cache options come from the settings
+engine = create_engine(settings.database_url_str, settings, echo=settings.DEBUG)
 
 # Create session factory
 AsyncSessionLocal = sessionmaker(
@@ -23,6 +22,16 @@ AsyncSessionLocal = sessionmaker(
     class_=AsyncSession
 )
 
+# Replica engines serving reads; without replicas reads use the primary
+replica_engines = [
+    create_engine(url, settings, echo=settings.DEBUG) for url in settings.DATABASE_REPLICA_URLS
+]
+read_router = ReplicaRouter(
+    AsyncSessionLocal,
+    [sessionmaker(replica, expire_on_commit=False, class_=AsyncSession) for replica in replica_engines],
+    max_wait=settings.DATABASE_REPLICA_MAX_WAIT_MS / 1000
+)
+
 
 # Dependency for FastAPI endpoints
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -33,4 +42,23 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+# Dependency for read-only FastAPI endpoints
+async def get_read_db(
+        consistency_token: Optional[str] = Header(None, alias=CONSISTENCY_TOKEN_HEADER)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides a session for reads, on a replica when possible.
+
+    A consistency token returned by a write makes the read observe that write.
+    """
+    if consistency_token is not None:
+        try:
+            parse_consistency_token(consistency_token)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    async with read_router.session(consistency_token) as session:
+        yield session
\ No newline at end of file
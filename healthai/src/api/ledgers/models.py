@@ -1,12 +1,66 @@
 """
 HealthAI specific ledger SQLAlchemy models.
 """
-from monorepo.core.db.models import BaseLedgerEntry, EnumType
+from sqlalchemy import MetaData
+
+from monorepo.core.db.models import (
+    BaseLedgerArchivedNonce,
+    BaseLedgerCheckpoint,
+    BaseLedgerEntry,
+    BaseLedgerNonce,
+    BaseLedgerOutbox,
+    BaseLedgerOutboxCursor,
+    BaseOwnerBalance,
+    EnumType
+)
+from healthai.src.api.config import settings
 from healthai.src.api.ledgers.schemas import HealthAILedgerOperation
 
+# Tables of HealthAI, kept apart from those of the other apps that may share the process
+metadata = MetaData()
 
 # Create a concrete ledger entry model for HealthAI
 HealthAILedgerEntryModel = BaseLedgerEntry.create_concrete_model(
-    "HealthAILedgerEntryModel", 
-    HealthAILedgerOperation
-)
\ No newline at end of file
+    "HealthAILedgerEntryModel",
+    HealthAILedgerOperation,
+    partitions=settings.LEDGER_PARTITIONS,
+    metadata=metadata
+)
+
+# Create a concrete owner balance model for HealthAI
+HealthAIOwnerBalanceModel = BaseOwnerBalance.create_concrete_model(
+    "HealthAIOwnerBalanceModel",
+    metadata=metadata
+)
+
+# Create a concrete ledger checkpoint model for HealthAI
+HealthAILedgerCheckpointModel = BaseLedgerCheckpoint.create_concrete_model(
+    "HealthAILedgerCheckpointModel",
+    metadata=metadata
+)
+
+# Nonce registry enforcing nonce uniqueness across the ledger partitions
+HealthAILedgerNonceModel = None
+if settings.LEDGER_PARTITIONS > 0:
+    HealthAILedgerNonceModel = BaseLedgerNonce.create_concrete_model(
+        "HealthAILedgerNonceModel",
+        metadata=metadata
+    )
+
+# Nonces of archived entries, which a plain ledger keeps rejecting
+HealthAILedgerArchivedNonceModel = None
+if settings.LEDGER_PARTITIONS == 0:
+    HealthAILedgerArchivedNonceModel = BaseLedgerArchivedNonce.create_concrete_model(
+        "HealthAILedgerArchivedNonceModel",
+        metadata=metadata
+    )
+
+# Transactional outbox of the written entries, and the cursors of the relays draining it
+HealthAILedgerOutboxModel = BaseLedgerOutbox.create_concrete_model(
+    "HealthAILedgerOutboxModel",
+    metadata=metadata
+)
+HealthAILedgerOutboxCursorModel = BaseLedgerOutboxCursor.create_concrete_model(
+    "HealthAILedgerOutboxCursorModel",
+    metadata=metadata
+)
@@ -2,7 +2,11 @@
 HealthAI specific ledger schemas.
 """
 from monorepo.core.ledgers.schemas import BaseLedgerOperation
-from monorepo.core.ledgers.pydantic_schemas import create_ledger_schemas
+from monorepo.core.ledgers.pydantic_schemas import (
+    create_ledger_batch_schemas,
+    create_ledger_page_schema,
+    create_ledger_schemas
+)
 
 
 class HealthAILedgerOperation(BaseLedgerOperation):
@@ -23,4 +27,6 @@ class HealthAILedgerOperation(BaseLedgerOperation):
 
 
 # Create Pydantic schemas for HealthAI
-HealthAILedgerEntryCreate, HealthAILedgerEntryRead = create_ledger_schemas(HealthAILedgerOperation)
\ No newline at end of file
+HealthAILedgerEntryCreate, HealthAILedgerEntryRead = create_ledger_schemas(HealthAILedgerOperation)
+HealthAILedgerBatchCreate, HealthAILedgerBatchResponse = create_ledger_batch_schemas(HealthAILedgerOperation)
+HealthAILedgerEntryPage = create_ledger_page_schema(HealthAILedgerOperation)
\ No newline at end of file
@@ -1,11 +1,123 @@
 """
 Main entry point for HealthAI application.
 """
-from fastapi import FastAPI
+import datetime
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 
 from healthai.src.api.config import settings
-from healthai.src.api.ledgers.router import router as ledger_router
+from healthai.src.api.db import AsyncSessionLocal, engine, read_router, replica_engines
+from healthai.src.api.ledgers.router import (
+    balance_cache,
+    balance_cache_listener,
+    ledger_service,
+    nonce_filter,
+    result_cache,
+    router as ledger_router
+)
+from monorepo.core.db.engine import pool_stats, warm_pool
+from monorepo.core.ledgers.operation_amounts import OperationAmountsReloader
+from monorepo.core.metrics import CONTENT_TYPE, LedgerMetrics, MetricsMiddleware
+from monorepo.core.profiling import ProfilingMiddleware, QueryProfiler
+from monorepo.core.ledgers.services.checkpoint_worker import CheckpointWorker
+from monorepo.core.ledgers.services.outbox_relay import OutboxRelay, create_outbox_sink
+
+# Request, query, pool and ledger metrics exposed on /metrics
+metrics = LedgerMetrics()
+metrics.instrument_engine(engine)
+metrics.instrument_sessions(AsyncSessionLocal)
+for index, replica_engine in enumerate(replica_engines):
+    metrics.instrument_engine(replica_engine, f"replica{index}")
+metrics.track_entries(ledger_service.entry_stats)
+
+# Opt-in per-request statement profiling
+profiler = None
+if settings.PROFILER_ENABLED:
+    profiler = QueryProfiler(
+        slow_request_threshold=settings.PROFILER_SLOW_REQUEST_MS / 1000,
+        explain_threshold=settings.PROFILER_EXPLAIN_MS / 1000 if settings.PROFILER_EXPLAIN_MS > 0 else None
+    )
+    profiler.instrument_sessions(AsyncSessionLocal)
+    for profiled_engine in [engine, *replica_engines]:
+        profiler.instrument_engine(profiled_engine)
+
+# Background job folding new entries into the balance checkpoints
+checkpoint_worker = None
+if settings.LEDGER_CHECKPOINT_INTERVAL > 0:
+    checkpoint_worker = CheckpointWorker(
+        AsyncSessionLocal,
+        ledger_service.repository,
+        interval=settings.LEDGER_CHECKPOINT_INTERVAL,
+        chunk_size=settings.LEDGER_CHECKPOINT_CHUNK_SIZE,
+        lag=datetime.timedelta(seconds=settings.LEDGER_CHECKPOINT_LAG)
+    )
+
+# Background job publishing the ledger outbox as a change feed
+outbox_relay = None
+if settings.LEDGER_OUTBOX_ENABLED:
+    outbox_relay = OutboxRelay(
+        AsyncSessionLocal,
+        ledger_service.repository,
+        create_outbox_sink(
+            settings.LEDGER_OUTBOX_SINK,
+            path=settings.LEDGER_OUTBOX_FILE or f"{settings.APP_NAME.lower()}_ledger_changes.ndjson",
+            channel=settings.LEDGER_OUTBOX_CHANNEL
+        ),
+        batch_size=settings.LEDGER_OUTBOX_BATCH_SIZE,
+        interval=settings.LEDGER_OUTBOX_INTERVAL
+    )
+
+# Watches the operation amount config file for new versions
+operation_amounts_reloader = None
+if settings.LEDGER_OPERATION_CONFIG_FILE:
+    operation_amounts_reloader = OperationAmountsReloader(
+        settings.LEDGER_OPERATION_CONFIG_FILE,
+        interval=settings.LEDGER_OPERATION_CONFIG_RELOAD_INTERVAL
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start and stop the background resources of the application.
+
+    The worker only reports ready once its connection pools are open and the
+    hot statements are prepared, so the first requests do not pay for it.
+    """
+    if operation_amounts_reloader is not None:
+        # An invalid config file fails the startup instead of serving built-in amounts
+        operation_amounts_reloader.reload()
+        operation_amounts_reloader.start()
+    async with AsyncSessionLocal() as db:
+        await ledger_service.repository.warm_nonce_filter(db, settings.LEDGER_NONCE_FILTER_WARM_SIZE)
+    # Preparing the statements also checks that the database and its tables are usable
+    await warm_pool(AsyncSessionLocal, settings.DATABASE_POOL_SIZE, ledger_service.prepare_statements)
+    await read_router.warm(settings.DATABASE_POOL_SIZE, ledger_service.repository.prepare_statements)
+    if balance_cache_listener is not None:
+        await balance_cache_listener.start(engine)
+    if checkpoint_worker is not None:
+        checkpoint_worker.start()
+    if outbox_relay is not None:
+        outbox_relay.start()
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        if ledger_service.group_commit is not None:
+            await ledger_service.group_commit.stop()
+        if checkpoint_worker is not None:
+            await checkpoint_worker.stop()
+        if outbox_relay is not None:
+            await outbox_relay.stop()
+        if balance_cache_listener is not None:
+            await balance_cache_listener.stop()
+        if operation_amounts_reloader is not None:
+            await operation_amounts_reloader.stop()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -14,7 +126,9 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
+app.state.ready = False
 
 # Add CORS middleware
 app.add_middleware(
@@ -25,6 +139,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record request metrics
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+if profiler is not None:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
 # Include routers
 app.include_router(ledger_router)
 
@@ -43,9 +162,48 @@ async def root():
 @app.get("/health")
 async def health_check():
     """
-    Health check endpoint.
+    Health check endpoint; answers 503 until the worker has warmed up and once it shuts down.
     """
+    if not app.state.ready:
+        return JSONResponse(
+            {"status": "unavailable", "app": settings.APP_NAME},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
     return {
         "status": "healthy",
         "app": settings.APP_NAME,
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/stats")
+async def stats():
+    """
+    Counters of the in-process ledger caches.
+    """
+    return {
+        "balance_cache": balance_cache.stats() if balance_cache is not None else None,
+        "nonce_filter": nonce_filter.stats() if nonce_filter is not None else None,
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+        "operation_amounts_version": (
+            operation_amounts_reloader.version if operation_amounts_reloader is not None else None
+        ),
+        "group_commit": ledger_service.group_commit.stats() if ledger_service.group_commit is not None else None,
+        "read_routing": read_router.stats,
+        "outbox_relay": outbox_relay.stats() if outbox_relay is not None else None,
+    }
+
+
+@app.get("/stats/pool")
+async def database_pool_stats():
+    """
+    Live usage and checkout wait times of the database connection pool.
+    """
+    return pool_stats(engine)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Metrics of this worker in the Prometheus text format.
+    """
+    return Response(metrics.registry.render(), media_type=CONTENT_TYPE)
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Single-process host serving all ledger applications.
+
+Each application is mounted under its own prefix, such as /healthai/ledger
+and /travelai/ledger, so one worker loads FastAPI, SQLAlchemy and the
+monorepo core once instead of once per application, and all applications
+share its event loop. The applications keep their own engines, caches and
+background jobs; an engine opens connections only when they are needed.
+
+Settings of a single application are given with its prefix, such as
+HEALTHAI_DATABASE_URL and TRAVELAI_DATABASE_URL. A LEDGER_OPERATION_CONFIG_FILE
+shared by the applications must list the operations of all of them.
+
+Usage:
+    uvicorn ledger_host.main:app --port 8000
+    python -m ledger_host.serve --workers 4
+"""
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Dict
+
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse
+
+from healthai.src.main import app as healthai_app
+from travelai.src.main import app as travelai_app
+
+# Hosted applications by mount path
+HOSTED_APPS: Dict[str, FastAPI] = {
+    "/healthai": healthai_app,
+    "/travelai": travelai_app,
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start and stop the background resources of all hosted applications.
+
+    Mounted applications do not get lifespan events of their own, so their
+    lifespans run here, and stop in reverse order.
+    """
+    async with AsyncExitStack() as stack:
+        for hosted_app in HOSTED_APPS.values():
+            await stack.enter_async_context(hosted_app.router.lifespan_context(hosted_app))
+        yield
+
+
+# Create FastAPI application
+app = FastAPI(
+    title="Ledger host",
+    description="Hosts the ledger applications in one process",
+    version="0.1.0",
+    lifespan=lifespan,
+)
+
+for path, hosted_app in HOSTED_APPS.items():
+    app.mount(path, hosted_app)
+
+
+@app.get("/health")
+async def health_check():
+    """
+    Health check endpoint; answers 503 while any hosted application is not ready.
+    """
+    apps = [hosted_app.title for hosted_app in HOSTED_APPS.values()]
+    if not all(hosted_app.state.ready for hosted_app in HOSTED_APPS.values()):
+        return JSONResponse({"status": "unavailable", "apps": apps}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {
+        "status": "healthy",
+        "apps": apps,
+    }
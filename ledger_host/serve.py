@@ -0,0 +1,14 @@
+"""
+Production server for the single-process host of all ledger applications.
+
+The server options are read from the unprefixed SERVER_* variables.
+
+Usage:
+    python -m ledger_host.serve [--host HOST] [--port PORT] [--workers N]
+"""
+from monorepo.core.config import CoreSettings
+from monorepo.core.server import run_server
+
+
+if __name__ == "__main__":
+    run_server("ledger_host.main:app", CoreSettings())
@@ -0,0 +1,130 @@
+"""
+Settings shared by all applications built on the monorepo core.
+"""
+from typing import ClassVar, List, Optional, Tuple, Type
+
+from pydantic_settings import BaseSettings, EnvSettingsSource, PydanticBaseSettingsSource
+
+from monorepo.core.ledgers.config import LedgerWriteMode, OutboxSinkKind
+
+
+class CoreSettings(BaseSettings):
+    """
+    Base settings for ledger applications.
+    Application settings inherit from this class to pick up the core options.
+
+    Every setting can also be given with the application's APP_ENV_PREFIX,
+    such as HEALTHAI_DATABASE_URL, which wins over the unprefixed variable.
+    Applications hosted in one process share its environment and tell their
+    settings apart this way.
+    """
+    APP_ENV_PREFIX: ClassVar[str] = ""
+
+    # Connection pool of each worker; a recycle time of -1 keeps connections open
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_RECYCLE: int = -1
+    DATABASE_POOL_PRE_PING: bool = False
+    # Per-connection statement caches of asyncpg and of SQLAlchemy's asyncpg dialect
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100
+    DATABASE_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    # Connect through PgBouncer in transaction pooling mode; disables both statement caches
+    DATABASE_PGBOUNCER: bool = False
+    # Streaming replicas serving balance and history reads, as a JSON list of URLs
+    DATABASE_REPLICA_URLS: List[str] = []
+    # How long a read with a consistency token waits for a replica before using the primary
+    DATABASE_REPLICA_MAX_WAIT_MS: float = 100.0
+
+    # Production server started by serve.py; a worker count of 0 starts one worker per CPU.
+    # The "auto" loop and HTTP parser use uvloop and httptools when they are installed.
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_LOOP: str = "auto"
+    SERVER_HTTP: str = "auto"
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_TIMEOUT: int = 5
+    # Seconds in-flight requests get to finish after SIGTERM before workers shut down
+    SERVER_GRACEFUL_SHUTDOWN_TIMEOUT: int = 30
+    SERVER_ACCESS_LOG: bool = False
+
+    # Per-request SQL profiling with a Server-Timing header and a slow request log
+    PROFILER_ENABLED: bool = False
+    PROFILER_SLOW_REQUEST_MS: float = 200.0
+    # SELECTs slower than this are logged with EXPLAIN (ANALYZE, BUFFERS); 0 disables it
+    PROFILER_EXPLAIN_MS: float = 0.0
+
+    # Atomic writes need the materialized owner balances to guard spends;
+    # applications that create them opt in
+    LEDGER_WRITE_MODE: LedgerWriteMode = LedgerWriteMode.CHECKED
+    # Serialize spending writes per owner; needed to prevent overdrafts in checked mode
+    LEDGER_OWNER_LOCKS: bool = False
+    # JSON file with versioned operation amounts, watched for new versions;
+    # the built-in LEDGER_OPERATION_CONFIG applies when unset
+    LEDGER_OPERATION_CONFIG_FILE: Optional[str] = None
+    LEDGER_OPERATION_CONFIG_RELOAD_INTERVAL: float = 5.0
+
+    # Hash partitions of ledger_entries on owner_id; 0 keeps a single table.
+    # Existing databases are converted by the partitioning migration.
+    LEDGER_PARTITIONS: int = 0
+    # Commit concurrent single-entry writes together; a batch size of 0 disables it
+    LEDGER_GROUP_COMMIT_MAX_BATCH_SIZE: int = 0
+    LEDGER_GROUP_COMMIT_MAX_DELAY_MS: float = 2.0
+
+    # Balance cache; a size of 0 disables it. A write only invalidates the cache
+    # of its own worker, so deployments with several workers must also set
+    # LEDGER_BALANCE_NOTIFY_CHANNEL before enabling it
+    LEDGER_BALANCE_CACHE_SIZE: int = 0
+    LEDGER_BALANCE_CACHE_TTL: float = 2.0
+    # Postgres channel used to invalidate the balance caches of other workers
+    LEDGER_BALANCE_NOTIFY_CHANNEL: Optional[str] = None
+
+    # Answer a write repeating the nonce, owner and operation of an earlier write with
+    # the original entry instead of a duplicate rejection, from a cache of recent
+    # results or one fetch; a cache size of 0 disables the cache
+    LEDGER_IDEMPOTENT_REPLAY: bool = False
+    LEDGER_RESULT_CACHE_SIZE: int = 10000
+
+    # Nonce pre-filter; a capacity of 0 disables it. Each worker keeps its own
+    # filter of about 1.8 MB per million nonces at a 0.1% error rate
+    LEDGER_NONCE_FILTER_CAPACITY: int = 0
+    LEDGER_NONCE_FILTER_ERROR_RATE: float = 0.001
+    # Number of most recent nonces loaded into the filter at startup
+    LEDGER_NONCE_FILTER_WARM_SIZE: int = 100_000
+
+    # Balance checkpoints; an interval of 0 disables the background job
+    LEDGER_CHECKPOINT_INTERVAL: float = 300.0
+    LEDGER_CHECKPOINT_CHUNK_SIZE: int = 100_000
+    # Seconds an entry must be old before it is folded into a checkpoint
+    LEDGER_CHECKPOINT_LAG: float = 60.0
+
+    # Transactional outbox feeding a change feed of the written entries. Every
+    # worker runs a relay; the relays take turns draining the outbox in batches
+    # into the sink, and a durable cursor numbers the published events.
+    LEDGER_OUTBOX_ENABLED: bool = False
+    LEDGER_OUTBOX_SINK: OutboxSinkKind = OutboxSinkKind.FILE
+    # NDJSON file of the file sink; defaults to <app name>_ledger_changes.ndjson
+    LEDGER_OUTBOX_FILE: Optional[str] = None
+    LEDGER_OUTBOX_CHANNEL: str = "ledger_changes"
+    LEDGER_OUTBOX_BATCH_SIZE: int = 500
+    # Seconds between two relay rounds once the outbox is drained
+    LEDGER_OUTBOX_INTERVAL: float = 1.0
+
+    @classmethod
+    def settings_customise_sources(
+            cls,
+            settings_cls: Type[BaseSettings],
+            init_settings: PydanticBaseSettingsSource,
+            env_settings: PydanticBaseSettingsSource,
+            dotenv_settings: PydanticBaseSettingsSource,
+            file_secret_settings: PydanticBaseSettingsSource
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        """
+        Read the application-prefixed environment variables before the unprefixed ones.
+        """
+        if not cls.APP_ENV_PREFIX:
+            return init_settings, env_settings, dotenv_settings, file_secret_settings
+
+        app_env_settings = EnvSettingsSource(settings_cls, env_prefix=cls.APP_ENV_PREFIX)
+        return init_settings, app_env_settings, env_settings, dotenv_settings, file_secret_settings
@@ -0,0 +1,285 @@
+"""
+Compressed segment files holding archived ledger entries.
+
+A segment file starts with SEGMENT_MAGIC followed by blocks. Each block is a
+4-byte big-endian length and a zlib-compressed payload of length-prefixed
+entry records, so a reader holds at most one block in memory. Segments are
+named after the first and last entry ID they contain.
+
+A plain ledger table forgets the nonces of archived entries, so their
+nonces are kept in the ledger_archived_nonces table, and a trigger on the
+entries rejects them like the unique constraint rejects live ones.
+Partitioned ledgers keep every nonce in their registry and need neither.
+"""
+from __future__ import annotations
+
+import datetime
+import heapq
+import os
+import struct
+import zlib
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional
+
+SEGMENT_MAGIC = b"LEDGERSEG1\n"
+SEGMENT_SUFFIX = ".seg"
+
+# Records per compressed block
+DEFAULT_BLOCK_SIZE = 10000
+
+_LENGTH = struct.Struct(">I")
+# id, amount, created_on in microseconds since the epoch, then the lengths of
+# owner_id, operation and nonce, which follow as UTF-8
+_RECORD_HEADER = struct.Struct(">qqqHHH")
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+ARCHIVED_NONCE_TABLE = "ledger_archived_nonces"
+
+# Name of the trigger rejecting archived nonces and of its function
+ARCHIVED_NONCE_TRIGGER = "ledger_entries_reject_archived_nonce"
+
+
+class ArchivedEntry(NamedTuple):
+    """A ledger entry read back from an archive segment."""
+    id: int
+    owner_id: str
+    operation: str
+    amount: int
+    nonce: str
+    created_on: datetime.datetime
+
+
+class SegmentWriter:
+    """
+    Writes ledger entries to a new segment file.
+
+    Entries go to a temporary file that is fsynced and renamed into place by
+    close(), so a segment is either complete or absent. Entries must be
+    written in ascending ID order.
+    """
+
+    def __init__(self, directory: str, table: str, block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Initialize the writer.
+
+        Args:
+            directory: Directory the segment is written to
+            table: Name of the archived table, used as the file name prefix
+            block_size: Records per compressed block
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.table = table
+        self.block_size = block_size
+        self.first_id: Optional[int] = None
+        self.last_id: Optional[int] = None
+        self.count = 0
+        self._temp_path = os.path.join(directory, f".{table}-{os.getpid()}.tmp")
+        self._file: BinaryIO = open(self._temp_path, "wb")
+        self._file.write(SEGMENT_MAGIC)
+        self._block: List[bytes] = []
+
+    def write(self, rows: Iterable) -> None:
+        """
+        Append entries to the segment.
+
+        Args:
+            rows: Rows with id, owner_id, operation, amount, nonce and created_on
+        """
+        for row in rows:
+            if self.last_id is not None and row.id <= self.last_id:
+                raise ValueError("Entries must be written in ascending ID order")
+
+            owner_id = row.owner_id.encode()
+            operation = getattr(row.operation, "name", row.operation).encode()
+            nonce = row.nonce.encode()
+            micros = (row.created_on - _EPOCH) // datetime.timedelta(microseconds=1)
+            self._block.append(
+                _RECORD_HEADER.pack(row.id, row.amount, micros, len(owner_id), len(operation), len(nonce))
+                + owner_id + operation + nonce
+            )
+
+            if self.first_id is None:
+                self.first_id = row.id
+            self.last_id = row.id
+            self.count += 1
+            if len(self._block) >= self.block_size:
+                self._flush_block()
+
+    def close(self) -> Optional[str]:
+        """
+        Finish the segment and move it into place.
+
+        Returns:
+            Path of the segment, or None if no entries were written
+        """
+        self._flush_block()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+        if self.count == 0:
+            os.remove(self._temp_path)
+            return None
+
+        path = os.path.join(
+            self.directory, f"{self.table}-{self.first_id:012d}-{self.last_id:012d}{SEGMENT_SUFFIX}"
+        )
+        os.replace(self._temp_path, path)
+        directory_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+        return path
+
+    def abort(self) -> None:
+        """
+        Discard the segment.
+        """
+        self._file.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    def _flush_block(self) -> None:
+        if not self._block:
+            return
+
+        payload = zlib.compress(b"".join(self._block), 6)
+        self._file.write(_LENGTH.pack(len(payload)))
+        self._file.write(payload)
+        self._block = []
+
+
+def read_segment(path: str) -> Iterator[ArchivedEntry]:
+    """
+    Stream the entries of a segment file.
+
+    Args:
+        path: Path of the segment
+
+    Yields:
+        The archived entries in ascending ID order
+    """
+    with open(path, "rb") as segment:
+        if segment.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+            raise ValueError(f"Not a ledger archive segment: {path}")
+
+        while True:
+            prefix = segment.read(_LENGTH.size)
+            if not prefix:
+                return
+            (length,) = _LENGTH.unpack(prefix)
+            block = zlib.decompress(segment.read(length))
+
+            offset = 0
+            while offset < len(block):
+                entry_id, amount, micros, owner_length, operation_length, nonce_length = (
+                    _RECORD_HEADER.unpack_from(block, offset)
+                )
+                offset += _RECORD_HEADER.size
+                owner_id = block[offset:offset + owner_length].decode()
+                offset += owner_length
+                operation = block[offset:offset + operation_length].decode()
+                offset += operation_length
+                nonce = block[offset:offset + nonce_length].decode()
+                offset += nonce_length
+                yield ArchivedEntry(
+                    entry_id,
+                    owner_id,
+                    operation,
+                    amount,
+                    nonce,
+                    _EPOCH + datetime.timedelta(microseconds=micros)
+                )
+
+
+def list_segments(directory: str) -> List[str]:
+    """
+    List the segment files of an archive directory in ID order.
+
+    Args:
+        directory: The archive directory
+
+    Returns:
+        Paths of the segments
+    """
+    if not os.path.isdir(directory):
+        return []
+
+    names = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_archive(directory: str, owner_id: Optional[str] = None) -> Iterator[ArchivedEntry]:
+    """
+    Stream all archived entries of a directory in ID order.
+
+    A run interrupted between writing a segment and deleting its entries
+    archives them again on the next run, so segments with overlapping ID
+    ranges are merged and each entry is yielded once.
+
+    Args:
+        directory: The archive directory
+        owner_id: Only yield entries of this owner
+
+    Yields:
+        The archived entries
+    """
+    for group in _overlapping_groups(list_segments(directory)):
+        last_id = None
+        for entry in heapq.merge(*(read_segment(path) for path in group)):
+            if entry.id == last_id:
+                continue
+            last_id = entry.id
+            if owner_id is None or entry.owner_id == owner_id:
+                yield entry
+
+
+def _overlapping_groups(paths: List[str]) -> Iterator[List[str]]:
+    """
+    Group segment paths, sorted by first ID, into runs of overlapping ID ranges.
+    """
+    group: List[str] = []
+    group_last_id = 0
+    for path in paths:
+        name = os.path.basename(path)[:-len(SEGMENT_SUFFIX)]
+        first_id, last_id = (int(part) for part in name.split("-")[-2:])
+        if group and first_id > group_last_id:
+            yield group
+            group = []
+        group_last_id = max(group_last_id, last_id) if group else last_id
+        group.append(path)
+    if group:
+        yield group
+
+
+def archived_nonce_trigger_ddl(table: str = "ledger_entries", nonce_table: str = ARCHIVED_NONCE_TABLE) -> List[str]:
+    """
+    Build the statements creating the trigger that rejects the nonces of archived entries.
+
+    The trigger is a BEFORE INSERT row trigger on a plain ledger table. It
+    raises a unique violation, as the nonce registry of partitioned ledgers
+    does, so every write path handles it as a duplicate nonce.
+
+    Args:
+        table: Name of the ledger entries table
+        nonce_table: Name of the archived nonce table
+
+    Returns:
+        The CREATE FUNCTION and CREATE TRIGGER statements
+    """
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION {ARCHIVED_NONCE_TRIGGER}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM {nonce_table} WHERE nonce = NEW.nonce) THEN
+                RAISE unique_violation USING MESSAGE = 'nonce ' || NEW.nonce || ' belongs to an archived entry';
+            END IF;
+            RETURN NEW;
+        END
+        $$
+        """,
+        f"DROP TRIGGER IF EXISTS {ARCHIVED_NONCE_TRIGGER} ON {table}",
+        f"CREATE TRIGGER {ARCHIVED_NONCE_TRIGGER} BEFORE INSERT ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {ARCHIVED_NONCE_TRIGGER}()",
+    ]
@@ -0,0 +1,244 @@
+"""
+Database engine construction shared by all applications.
+
+The engine's connection pool records how long requests wait to check out a
+connection, so pool exhaustion under bursts shows up in the pool stats
+instead of only as slow requests.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from contextlib import AsyncExitStack
+from typing import Any, Awaitable, Callable, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from monorepo.core.config import CoreSettings
+
+# Execution option naming the kind of a statement in query metrics and profiles
+STATEMENT_LABEL = "statement_label"
+
+
+class PoolWaitStats:
+    """Checkout counters of a connection pool; timed out checkouts only count as timeouts."""
+
+    def __init__(self):
+        """
+        Initialize the counters.
+        """
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait: float) -> None:
+        """
+        Record a finished checkout.
+
+        Args:
+            wait: Seconds the checkout took
+        """
+        self.checkouts += 1
+        self.wait_total += wait
+        if wait > self.wait_max:
+            self.wait_max = wait
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that times connection checkouts.
+
+    The measured time covers waiting for a free connection as well as opening
+    a new one while the pool is still growing.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        self.wait_stats.waiting += 1
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        finally:
+            self.wait_stats.waiting -= 1
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> InstrumentedAsyncPool:
+        # Keep the counters when the engine replaces its pool after a disconnect
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+def statement_label(context: ExecutionContext) -> str:
+    """
+    Name the kind of an executed statement.
+
+    Args:
+        context: Execution context of the statement
+
+    Returns:
+        The STATEMENT_LABEL execution option if set, else insert, update,
+        delete, select or other
+    """
+    label = context.execution_options.get(STATEMENT_LABEL)
+    if label is not None:
+        return label
+    if context.isinsert:
+        return "insert"
+    if context.isupdate:
+        return "update"
+    if context.isdelete:
+        return "delete"
+    if context.statement.lstrip()[:6].upper() == "SELECT":
+        return "select"
+    return "other"
+
+
+def observe_commits(session_factory: sessionmaker, observe: Callable[[float], None]) -> None:
+    """
+    Time the commits of the sessions a factory creates, flush included.
+
+    The factory is switched to a session subclass of its own, so that hooks
+    are not shared with other factories or applications in the process.
+
+    Args:
+        session_factory: Session factory of AsyncSession instances
+        observe: Called with the duration of every successful commit in seconds
+    """
+    base_class = session_factory.kw.get("sync_session_class", Session)
+    session_class = type(f"Timed{base_class.__name__}", (base_class,), {})
+    # Hooks of base classes fire too, so each hook keeps its start time under its own key
+    start_key = object()
+
+    def before_commit(session: Session) -> None:
+        session.info[start_key] = time.perf_counter()
+
+    def after_commit(session: Session) -> None:
+        start = session.info.pop(start_key, None)
+        if start is not None:
+            observe(time.perf_counter() - start)
+
+    event.listen(session_class, "before_commit", before_commit)
+    event.listen(session_class, "after_commit", after_commit)
+    session_factory.configure(sync_session_class=session_class)
+
+
+def _unique_statement_name() -> str:
+    """
+    Name prepared statements uniquely, so that statements of different
+    clients never collide on a server connection shared by PgBouncer.
+    """
+    return f"__asyncpg_{uuid.uuid4().hex}__"
+
+
+def create_engine(database_url: str, settings: CoreSettings, echo: bool = False) -> AsyncEngine:
+    """
+    Create the async engine of an application from its settings.
+
+    In PgBouncer mode the server connection changes between transactions, so
+    the asyncpg and SQLAlchemy prepared statement caches are turned off and
+    statements get unique names. Session state does not survive a transaction
+    either, so the balance notification listener cannot be used.
+
+    Args:
+        database_url: Database URL of the application
+        settings: Settings of the application
+        echo: Log all statements
+
+    Returns:
+        The engine
+
+    Raises:
+        ValueError: If the settings combine PgBouncer mode with a balance notification channel
+    """
+    connect_args: Dict[str, Any] = {
+        "statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DATABASE_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+    if settings.DATABASE_PGBOUNCER:
+        if settings.LEDGER_BALANCE_NOTIFY_CHANNEL:
+            raise ValueError("LEDGER_BALANCE_NOTIFY_CHANNEL needs a direct connection and cannot be used with PgBouncer")
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": _unique_statement_name,
+        }
+
+    return create_async_engine(
+        database_url,
+        echo=echo,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        connect_args=connect_args
+    )
+
+
+async def warm_pool(
+        session_factory: sessionmaker,
+        connections: int,
+        prepare: Callable[[AsyncSession], Awaitable[None]]
+) -> None:
+    """
+    Open pool connections up front and prepare statements on each of them.
+
+    All sessions are held at once, so every one of them runs on its own
+    connection; the connections then stay in the pool for the first requests.
+
+    Args:
+        session_factory: Session factory of the pool's engine
+        connections: Number of connections to open; at most the pool size stays open
+        prepare: Coroutine function running the statements to prepare on a session
+    """
+    async with AsyncExitStack() as stack:
+        sessions = [await stack.enter_async_context(session_factory()) for _ in range(connections)]
+        await asyncio.gather(*(db.connection() for db in sessions))
+        await asyncio.gather(*(prepare(db) for db in sessions))
+
+
+def pool_stats(engine: AsyncEngine) -> Dict[str, Any]:
+    """
+    Get live statistics of an engine's connection pool.
+
+    Args:
+        engine: The engine
+
+    Returns:
+        Pool size and usage, plus checkout wait times if the pool records them
+    """
+    pool = engine.pool
+    stats: Dict[str, Any] = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+    }
+
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update({
+            "waiting": wait_stats.waiting,
+            "checkouts": wait_stats.checkouts,
+            "timeouts": wait_stats.timeouts,
+            "wait_seconds_total": wait_stats.wait_total,
+            "wait_seconds_max": wait_stats.wait_max,
+            "wait_seconds_average": wait_stats.wait_total / wait_stats.checkouts if wait_stats.checkouts else 0.0,
+        })
+    return stats
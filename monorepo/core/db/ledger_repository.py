@@ -3,18 +3,75 @@ Repository layer for ledger database operations.
 """
 from __future__ import annotations
 
+import asyncio
 import datetime
-from typing import Generic, List, Optional, Type, TypeVar
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
 
-from sqlalchemy import func, select, and_, exists
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    String,
+    any_,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    and_,
+    exists,
+    text,
+    tuple_,
+    union_all
+)
+from sqlalchemy.dialects.postgresql import ARRAY, Insert, insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.expression import CTE
 
-from monorepo.core.db.models import BaseLedgerEntry
-from monorepo.core.ledgers.schemas import BaseLedgerOperation, TLedgerOperation
+from monorepo.core.db.archive import SegmentWriter
+from monorepo.core.db.engine import STATEMENT_LABEL
+from monorepo.core.db.models import (
+    BaseLedgerArchivedNonce,
+    BaseLedgerCheckpoint,
+    BaseLedgerEntry,
+    BaseLedgerNonce,
+    BaseLedgerOutbox,
+    BaseLedgerOutboxCursor,
+    BaseOwnerBalance
+)
+from monorepo.core.db.nonce_filter import BloomNonceFilter
+from monorepo.core.ledgers.schemas import BaseLedgerOperation, LedgerEntryStatus, TLedgerOperation
 
 TLedgerEntry = TypeVar('TLedgerEntry', bound=BaseLedgerEntry)
 
+# Number of times a batch is retried when a concurrent writer inserts one of its nonces
+BATCH_INSERT_ATTEMPTS = 3
+
+# Longest time a checkpoint build waits for the entry writers in flight to end,
+# and the seconds between two checks of whether they have
+CHECKPOINT_WRITER_TIMEOUT = datetime.timedelta(seconds=30)
+CHECKPOINT_WRITER_POLL_INTERVAL = 0.05
+
+# SQLSTATE of the error Postgres raises in the transaction it aborts to break a deadlock
+DEADLOCK_DETECTED = "40P01"
+
+# Entries younger than this are left out of checkpoints, so that a build does
+# not rewrite the checkpoints of the owners active right now
+DEFAULT_CHECKPOINT_LAG = datetime.timedelta(seconds=60)
+
+# SQLSTATE of the error Postgres raises for a write in a read-only transaction
+READ_ONLY_SQL_TRANSACTION = "25006"
+
+# Placeholder owner of the statements run to prepare them at startup
+WARMUP_OWNER_ID = "__warmup__"
+
 
 class LedgerRepository(Generic[TLedgerEntry, TLedgerOperation]):
     """
@@ -22,14 +79,50 @@ class LedgerRepository(Generic[TLedgerEntry, TLedgerOperation]):
     This class provides a generic interface for ledger operations.
     """
 
-    def __init__(self, model: Type[TLedgerEntry]):
+    def __init__(self, model: Type[TLedgerEntry], balance_model: Optional[Type[BaseOwnerBalance]] = None,
+                 notify_channel: Optional[str] = None, nonce_filter: Optional[BloomNonceFilter] = None,
+                 checkpoint_model: Optional[Type[BaseLedgerCheckpoint]] = None,
+                 nonce_model: Optional[Type[BaseLedgerNonce]] = None,
+                 outbox_model: Optional[Type[BaseLedgerOutbox]] = None,
+                 outbox_cursor_model: Optional[Type[BaseLedgerOutboxCursor]] = None,
+                 archived_nonce_model: Optional[Type[BaseLedgerArchivedNonce]] = None):
         """
         Initialize the repository.
 
         Args:
             model: The SQLAlchemy model class to use
+            balance_model: Optional materialized owner balance model. When given,
+                balances are read from it instead of summing the ledger.
+            notify_channel: Optional Postgres channel on which the owner ID of
+                every write is sent with pg_notify when the write commits
+            nonce_filter: Optional in-memory filter that lets nonce lookups be
+                skipped for nonces this process has never seen
+            checkpoint_model: Optional checkpoint model. When given, balances
+                derived from the ledger add up the owner's checkpoint and the
+                entries after it instead of the owner's full history.
+            nonce_model: Nonce registry model, required when the entry table is
+                partitioned. Nonces are then looked up in the registry, and a
+                duplicate nonce fails the insert instead of being skipped.
+            outbox_model: Optional outbox model. When given, every write also
+                adds a row per created entry to the outbox, in the same
+                transaction, for a relay to publish.
+            outbox_cursor_model: Cursor model of the outbox relays
+            archived_nonce_model: Archived nonce model of a plain entry table,
+                required to archive its entries. Nonces are then also looked
+                up among the archived ones.
         """
+        if nonce_model is None and model.__table__.dialect_options["postgresql"].get("partition_by"):
+            raise ValueError("A partitioned ledger table requires a nonce model")
+
         self.model = model
+        self.balance_model = balance_model
+        self.notify_channel = notify_channel
+        self.nonce_filter = nonce_filter
+        self.checkpoint_model = checkpoint_model
+        self.nonce_model = nonce_model
+        self.outbox_model = outbox_model
+        self.outbox_cursor_model = outbox_cursor_model
+        self.archived_nonce_model = archived_nonce_model if nonce_model is None else None
 
     async def create_entry(self, db: AsyncSession, owner_id: str, operation: TLedgerOperation,
                            nonce: str) -> TLedgerEntry:
@@ -46,26 +139,373 @@ class LedgerRepository(Generic[TLedgerEntry, TLedgerOperation]):
             The created ledger entry
         """
         # Check if the nonce already exists
-        stmt = select(exists().where(self.model.nonce == nonce))
-        result = await db.execute(stmt)
-        if result.scalar():
+        if await self.check_nonce_exists(db, nonce):
             raise ValueError(f"Duplicate transaction with nonce: {nonce}")
 
         # Create new entry
         amount = operation.value_amount
+        created_on = datetime.datetime.utcnow()
         entry = self.model(
             owner_id=owner_id,
             operation=operation,
             amount=amount,
             nonce=nonce,
-            created_on=datetime.datetime.utcnow()
+            created_on=created_on
         )
 
         db.add(entry)
-        await db.commit()
+        try:
+            if self.balance_model is not None:
+                await self._apply_balance_delta(db, owner_id, amount, created_on)
+            if self.notify_channel is not None:
+                await self._notify_balance_changes(db, [owner_id])
+            if self.outbox_model is not None:
+                await self._append_to_outbox(db, entry)
+            await db.commit()
+        except IntegrityError:
+            # The unique constraint is the final guard for nonces the filter let through
+            await db.rollback()
+            raise ValueError(f"Duplicate transaction with nonce: {nonce}")
+
+        self._remember_nonces([nonce])
         await db.refresh(entry)
         return entry
 
+    async def create_entry_atomic(self, db: AsyncSession, owner_id: str, operation: TLedgerOperation,
+                                  nonce: str) -> Optional[Row]:
+        """
+        Create a new ledger entry with a single statement.
+
+        The nonce dedupe (ON CONFLICT DO NOTHING), the balance guard and the insert
+        run as one INSERT ... SELECT ... RETURNING. When a materialized balance model
+        is configured, the owner's balance row is locked by the guard and updated by
+        the same statement, so concurrent spends cannot overdraw the account.
+
+        Args:
+            db: Database session
+            owner_id: ID of the owner
+            operation: The ledger operation
+            nonce: Unique identifier to prevent duplicate transactions
+
+        Returns:
+            The created entry row, or None if the nonce already exists or the
+            balance is insufficient
+        """
+        stmt = self._atomic_insert_statement(owner_id, operation, nonce)
+        try:
+            result = await db.execute(stmt, execution_options={STATEMENT_LABEL: "insert"})
+        except IntegrityError:
+            # Raised by the nonce registry, which cannot skip duplicates
+            await db.rollback()
+            return None
+        row = result.first()
+        await db.commit()
+        if row is not None:
+            self._remember_nonces([nonce])
+        return row
+
+    def _atomic_insert_statement(self, owner_id: str, operation: TLedgerOperation, nonce: str) -> Select:
+        """
+        Build the single-statement insert of create_entry_atomic.
+
+        Args:
+            owner_id: ID of the owner
+            operation: The ledger operation
+            nonce: Unique identifier to prevent duplicate transactions
+
+        Returns:
+            A SELECT over the data-modifying CTEs, returning the created entry row
+        """
+        table = self.model.__table__
+        amount = operation.value_amount
+        created_on = datetime.datetime.utcnow()
+
+        values = select(
+            literal(owner_id, String),
+            literal(operation, table.c.operation.type),
+            literal(amount, Integer),
+            literal(nonce, String),
+            literal(created_on, DateTime)
+        )
+        if amount < 0:
+            values = values.where(self._balance_guard(owner_id, amount))
+
+        inserted = (
+            self._skip_duplicate_nonces(
+                pg_insert(table).from_select(["owner_id", "operation", "amount", "nonce", "created_on"], values)
+            )
+            .returning(
+                table.c.id,
+                table.c.operation,
+                table.c.amount,
+                table.c.nonce,
+                table.c.owner_id,
+                table.c.created_on
+            )
+            .cte("inserted")
+        )
+        stmt = select(inserted)
+        if self.notify_channel is not None:
+            stmt = stmt.add_columns(func.pg_notify(self.notify_channel, inserted.c.owner_id).label("notified"))
+
+        if self.balance_model is not None:
+            balances = pg_insert(self.balance_model.__table__).from_select(
+                ["owner_id", "balance", "updated_on"],
+                select(inserted.c.owner_id, inserted.c.amount, inserted.c.created_on)
+            )
+            balances = balances.on_conflict_do_update(
+                index_elements=[self.balance_model.__table__.c.owner_id],
+                set_={
+                    "balance": self.balance_model.__table__.c.balance + balances.excluded.balance,
+                    "updated_on": balances.excluded.updated_on
+                }
+            )
+            stmt = stmt.add_cte(balances.cte("balances"))
+        if self.outbox_model is not None:
+            stmt = stmt.add_cte(self._outbox_insert(inserted).cte("outbox"))
+        return stmt
+
+    async def create_entries(
+            self,
+            db: AsyncSession,
+            entries: Sequence[Tuple[str, TLedgerOperation, str]]
+    ) -> List[Tuple[LedgerEntryStatus, Optional[Row]]]:
+        """
+        Create many ledger entries in one transaction.
+
+        Nonces are deduplicated within the batch and against the database, and
+        balance checks are applied per owner in submission order, so an entry may
+        spend credits added by an earlier entry of the same batch. All accepted
+        entries are written with a single multi-row INSERT. Concurrent batches for
+        the same owners are serialized by the owners' balance row locks, or by
+        their advisory locks (see lock_owner) without a materialized balance model.
+
+        Args:
+            db: Database session
+            entries: Sequence of (owner_id, operation, nonce) tuples
+
+        Returns:
+            One (status, row) tuple per submitted entry, in submission order.
+            The row is only set for created entries.
+        """
+        for attempt in range(BATCH_INSERT_ATTEMPTS):
+            # Retries bypass the nonce filter, which cannot see nonces of other workers
+            results = await self._try_create_entries(db, entries, use_nonce_filter=attempt == 0)
+            if results is not None:
+                await db.commit()
+                self._remember_nonces(row.nonce for _, row in results if row is not None)
+                return results
+            await db.rollback()
+
+        raise RuntimeError("Could not write ledger batch due to concurrent duplicate nonces")
+
+    async def _try_create_entries(
+            self,
+            db: AsyncSession,
+            entries: Sequence[Tuple[str, TLedgerOperation, str]],
+            use_nonce_filter: bool = True
+    ) -> Optional[List[Tuple[LedgerEntryStatus, Optional[Row]]]]:
+        """
+        Validate and insert a batch of ledger entries without committing.
+
+        Args:
+            db: Database session
+            entries: Sequence of (owner_id, operation, nonce) tuples
+            use_nonce_filter: Only look up nonces the nonce filter cannot rule out
+
+        Returns:
+            One (status, row) tuple per entry, or None if a concurrent writer
+            inserted one of the accepted nonces and the batch must be retried
+        """
+        results: List[Tuple[LedgerEntryStatus, Optional[Row]]] = []
+        existing_nonces = await self._get_existing_nonces(
+            db,
+            {nonce for _, _, nonce in entries},
+            use_nonce_filter=use_nonce_filter
+        )
+        # Lock every owner in the batch up front, in a fixed order, so that concurrent
+        # batches cannot overdraw an owner nor deadlock on the balance update below
+        balances = await self._load_balances(db, {owner_id for owner_id, _, _ in entries}, lock=True)
+
+        seen_nonces = set(existing_nonces)
+        accepted: Dict[str, int] = {}
+        for index, (owner_id, operation, nonce) in enumerate(entries):
+            amount = operation.value_amount
+            if nonce in seen_nonces:
+                results.append((LedgerEntryStatus.DUPLICATE, None))
+                continue
+            balance = balances.get(owner_id, 0)
+            if amount < 0 and balance + amount < 0:
+                results.append((LedgerEntryStatus.INSUFFICIENT_BALANCE, None))
+                continue
+
+            seen_nonces.add(nonce)
+            balances[owner_id] = balance + amount
+            accepted[nonce] = index
+            results.append((LedgerEntryStatus.CREATED, None))
+
+        if not accepted:
+            return results
+
+        rows = await self._insert_entries(db, [entries[index] for index in accepted.values()])
+        if len(rows) != len(accepted):
+            return None
+
+        for row in rows:
+            index = accepted[row.nonce]
+            results[index] = (LedgerEntryStatus.CREATED, row)
+
+        if self.notify_channel is not None:
+            await self._notify_balance_changes(db, {row.owner_id for row in rows})
+        return results
+
+    async def _insert_entries(self, db: AsyncSession, entries: Sequence[Tuple[str, TLedgerOperation, str]]) -> List[Row]:
+        """
+        Insert validated entries with one multi-row statement.
+
+        The rows are fed to Postgres as arrays through unnest(), so the statement
+        size and parameter count do not grow with the batch. Materialized balances
+        are updated by a data-modifying CTE of the same statement.
+
+        Args:
+            db: Database session
+            entries: Sequence of (owner_id, operation, nonce) tuples
+
+        Returns:
+            The inserted rows; nonces inserted concurrently by another writer are skipped
+        """
+        table = self.model.__table__
+        created_on = datetime.datetime.utcnow()
+
+        source = func.unnest(
+            literal([owner_id for owner_id, _, _ in entries], ARRAY(String)),
+            literal([operation.name for _, operation, _ in entries], ARRAY(String)),
+            literal([operation.value_amount for _, operation, _ in entries], ARRAY(Integer)),
+            literal([nonce for _, _, nonce in entries], ARRAY(String))
+        ).table_valued(
+            "owner_id", "operation", "amount", "nonce", with_ordinality="position"
+        ).render_derived(name="source")
+        values = select(
+            source.c.owner_id,
+            source.c.operation,
+            source.c.amount,
+            source.c.nonce,
+            literal(created_on, DateTime)
+        ).order_by(source.c.position)
+
+        inserted = (
+            self._skip_duplicate_nonces(
+                pg_insert(table).from_select(["owner_id", "operation", "amount", "nonce", "created_on"], values)
+            )
+            .returning(
+                table.c.id,
+                table.c.operation,
+                table.c.amount,
+                table.c.nonce,
+                table.c.owner_id,
+                table.c.created_on
+            )
+            .cte("inserted")
+        )
+        stmt = select(inserted).order_by(inserted.c.id)
+
+        if self.balance_model is not None:
+            balance_table = self.balance_model.__table__
+            totals = (
+                select(inserted.c.owner_id, func.sum(inserted.c.amount), func.max(inserted.c.created_on))
+                .group_by(inserted.c.owner_id)
+                .order_by(inserted.c.owner_id)
+            )
+            balances = pg_insert(balance_table).from_select(["owner_id", "balance", "updated_on"], totals)
+            balances = balances.on_conflict_do_update(
+                index_elements=[balance_table.c.owner_id],
+                set_={
+                    "balance": balance_table.c.balance + balances.excluded.balance,
+                    "updated_on": balances.excluded.updated_on
+                }
+            )
+            stmt = stmt.add_cte(balances.cte("balances"))
+        if self.outbox_model is not None:
+            stmt = stmt.add_cte(self._outbox_insert(inserted).cte("outbox"))
+
+        try:
+            result = await db.execute(stmt, execution_options={STATEMENT_LABEL: "insert"})
+        except IntegrityError:
+            # Raised by the nonce registry; returning no rows makes the caller retry
+            return []
+        except DBAPIError as exc:
+            # Batches inserting the same nonces in different orders can deadlock on
+            # the nonce index; Postgres aborts one of them, which is then retried
+            if getattr(exc.orig, "pgcode", None) != DEADLOCK_DETECTED:
+                raise
+            return []
+        return list(result.all())
+
+    async def _get_existing_nonces(self, db: AsyncSession, nonces: Iterable[str],
+                                   use_nonce_filter: bool = True) -> set:
+        """
+        Find which of the given nonces are already stored.
+
+        Args:
+            db: Database session
+            nonces: Nonces to look up
+            use_nonce_filter: Skip nonces the nonce filter rules out
+
+        Returns:
+            Set of nonces that already exist
+        """
+        if use_nonce_filter and self.nonce_filter is not None:
+            candidates = [nonce for nonce in nonces if self.nonce_filter.might_contain(nonce)]
+        else:
+            candidates = list(nonces)
+        if not candidates:
+            return set()
+
+        candidate_array = literal(candidates, ARRAY(String))
+        lookups = [select(column).where(column == any_(candidate_array)) for column in self._nonce_columns()]
+        stmt = lookups[0] if len(lookups) == 1 else union_all(*lookups)
+        result = await db.execute(stmt, execution_options={STATEMENT_LABEL: "nonce_check"})
+        existing = set(result.scalars().all())
+
+        if use_nonce_filter and self.nonce_filter is not None:
+            for _ in range(len(candidates) - len(existing)):
+                self.nonce_filter.record_false_positive()
+        return existing
+
+    async def _load_balances(self, db: AsyncSession, owner_ids: Iterable[str], lock: bool = False) -> Dict[str, int]:
+        """
+        Load the balances of several owners with one query.
+
+        Args:
+            db: Database session
+            owner_ids: IDs of the owners
+            lock: Lock the owners until the transaction ends: their materialized
+                balance rows, or their advisory locks without a balance model
+
+        Returns:
+            Mapping of owner ID to balance; owners without history are omitted
+        """
+        owner_ids = sorted(set(owner_ids))
+        if not owner_ids:
+            return {}
+
+        owner_array = literal(owner_ids, ARRAY(String))
+        if self.balance_model is not None:
+            balance_table = self.balance_model.__table__
+            stmt = (
+                select(balance_table.c.owner_id, balance_table.c.balance)
+                .where(balance_table.c.owner_id == any_(owner_array))
+                .order_by(balance_table.c.owner_id)
+            )
+            if lock:
+                stmt = stmt.with_for_update()
+        else:
+            if lock:
+                await self._lock_owners(db, owner_ids)
+            stmt = self._derived_balances(owner_ids)
+        result = await db.execute(stmt, execution_options={STATEMENT_LABEL: "balance"})
+        return {owner_id: balance or 0 for owner_id, balance in result.all()}
+
     async def get_entries_by_owner(self, db: AsyncSession, owner_id: str) -> List[TLedgerEntry]:
         """
         Get all ledger entries for an owner.
@@ -81,6 +521,102 @@ class LedgerRepository(Generic[TLedgerEntry, TLedgerOperation]):
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    async def get_entries_page(
+            self,
+            db: AsyncSession,
+            owner_id: str,
+            limit: int,
+            before_id: Optional[int] = None,
+            operations: Optional[Sequence[TLedgerOperation]] = None,
+            created_from: Optional[datetime.datetime] = None,
+            created_to: Optional[datetime.datetime] = None
+    ) -> List[Row]:
+        """
+        Get one page of an owner's ledger entries, newest first.
+
+        Pages are addressed by the ID of the last entry of the previous page, so
+        every page is a range scan on (owner_id, id) that reads at most limit
+        rows no matter how deep it is.
+
+        Args:
+            db: Database session
+            owner_id: ID of the owner
+            limit: Maximum number of entries to return
+            before_id: Only return entries with a lower ID
+            operations: Only return entries with one of these operations
+            created_from: Only return entries created at or after this time
+            created_to: Only return entries created before this time
+
+        Returns:
+            Rows with id, operation, amount, nonce and created_on
+        """
+        model = self.model
+        stmt = (
+            select(model.id, model.operation, model.amount, model.nonce, model.created_on)
+            .where(model.owner_id == owner_id)
+            .order_by(model.id.desc())
+            .limit(limit)
+        )
+        if before_id is not None:
+            stmt = stmt.where(model.id < before_id)
+        if operations:
+            stmt = stmt.where(model.operation.in_(list(operations)))
+        if created_from is not None:
+            stmt = stmt.where(model.created_on >= created_from)
+        if created_to is not None:
+            stmt = stmt.where(model.created_on < created_to)
+
+        result = await db.execute(stmt, execution_options={STATEMENT_LABEL: "history"})
+        return result.all()
+
+    async def stream_entries(
+            self,
+            db: AsyncSession,
+            owner_id: Optional[str] = None,
+            operations: Optional[Sequence[TLedgerOperation]] = None,
+            created_from: Optional[datetime.datetime] = None,
+            created_to: Optional[datetime.datetime] = None,
+            fetch_size: int = 1000
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Stream ledger entries in ID order through a server-side cursor.
+
+        Rows are fetched fetch_size at a time and yielded batch by batch, so
+        memory use does not depend on the number of matching entries.
+
+        Args:
+            db: Database session
+            owner_id: Only include entries of this owner
+            operations: Only include entries with one of these operations
+            created_from: Only include entries created at or after this time
+            created_to: Only include entries created before this time
+            fetch_size: Rows fetched from the cursor per round trip
+
+        Yields:
+            Batches of rows with id, owner_id, operation, amount, nonce and created_on
+        """
+        model = self.model
+        stmt = (
+            select(model.id, model.owner_id, model.operation, model.amount, model.nonce, model.created_on)
+            .order_by(model.id)
+            .execution_options(yield_per=fetch_size)
+        )
+        if owner_id is not None:
+            stmt = stmt.where(model.owner_id == owner_id)
+        if operations:
+            stmt = stmt.where(model.operation.in_(list(operations)))
+        if created_from is not None:
+            stmt = stmt.where(model.created_on >= created_from)
+        if created_to is not None:
+            stmt = stmt.where(model.created_on < created_to)
+
+        result = await db.stream(stmt)
+        try:
+            async for rows in result.partitions():
+                yield rows
+        finally:
+            await result.close()
+
     async def get_owner_balance(self, db: AsyncSession, owner_id: str) -> int:
         """
         Calculate the current balance for an owner.
@@ -92,8 +628,42 @@ class LedgerRepository(Generic[TLedgerEntry, TLedgerOperation]):
         Returns:
             Current balance
         """
-        stmt = select(func.sum(self.model.amount)).where(self.model.owner_id == owner_id)
-        result = await db.execute(stmt)
+        if self.balance_model is None:
+            return await self.compute_owner_balance(db, owner_id)
+
+        stmt = select(self.balance_model.balance).where(self.balance_model.owner_id == owner_id)
+        result = await db.execute(stmt, execution_options={STATEMENT_LABEL: "balance"})
+        balance = result.scalar() or 0
+        return balance
+
+    async def get_owner_balances(self, db: AsyncSession, owner_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        Get the current balances of several owners with one query.
+
+        Args:
+            db: Database session
+            owner_ids: IDs of the owners
+
+        Returns:
+            Mapping of owner ID to balance; owners without history have a balance of 0
+        """
+        owner_ids = set(owner_ids)
+        balances = await self._load_balances(db, owner_ids)
+        return {owner_id: balances.get(owner_id, 0) for owner_id in owner_ids}
+
+    async def compute_owner_balance(self, db: AsyncSession, owner_id: str) -> int:
+        """
+        Calculate the balance of an owner from the ledger, ignoring the materialized balance.
+
+        Args:
+            db: Database session
+            owner_id: ID of the owner
+
+        Returns:
+            Current balance
+        """
+        derived = self._derived_balances([owner_id]).subquery()
+        result = await db.execute(select(derived.c.balance), execution_options={STATEMENT_LABEL: "balance_sum"})
         balance = result.scalar() or 0
         return balance
 
@@ -116,17 +686,747 @@ class LedgerRepository(Generic[TLedgerEntry, TLedgerOperation]):
         balance = await self.get_owner_balance(db, owner_id)
         return balance + amount >= 0  # Check if balance after operation would still be >= 0
 
-    async def check_nonce_exists(self, db: AsyncSession, nonce: str) -> bool:
+    async def lock_owner(self, db: AsyncSession, owner_id: str) -> None:
+        """
+        Take a transaction-scoped advisory lock on an owner.
+
+        The lock key is computed by Postgres, so every worker maps an owner to
+        the same key. It is released when the transaction commits or rolls back.
+
+        Args:
+            db: Database session
+            owner_id: ID of the owner
+        """
+        await db.execute(
+            select(func.pg_advisory_xact_lock(func.hashtextextended(owner_id, 0))),
+            execution_options={STATEMENT_LABEL: "owner_lock"}
+        )
+
+    async def _lock_owners(self, db: AsyncSession, owner_ids: Sequence[str]) -> None:
+        """
+        Take the advisory locks of lock_owner on several owners with one query.
+
+        The locks are taken in the order of their keys, so writers locking
+        overlapping sets of owners cannot deadlock.
+
+        Args:
+            db: Database session
+            owner_ids: IDs of the owners
+        """
+        owners = func.unnest(
+            literal(list(owner_ids), ARRAY(String))
+        ).table_valued("owner_id").render_derived(name="owners")
+        keys = (
+            select(func.hashtextextended(owners.c.owner_id, 0).label("key"))
+            .order_by("key")
+            .subquery()
+        )
+        await db.execute(
+            select(func.pg_advisory_xact_lock(keys.c.key)),
+            execution_options={STATEMENT_LABEL: "owner_lock"}
+        )
+
+    async def check_nonce_exists(self, db: AsyncSession, nonce: str, use_nonce_filter: bool = True) -> bool:
         """
         Check if a nonce already exists to prevent duplicate transactions.
 
+        When a nonce filter is configured and rules the nonce out, no query is
+        made; the unique constraint on the nonce, or the trigger of the nonce
+        registry or of the archived nonces, still rejects the insert if the
+        nonce is taken.
+
         Args:
             db: Database session
             nonce: The nonce to check
+            use_nonce_filter: Consult the nonce filter before querying
 
         Returns:
             True if nonce exists, False otherwise
         """
-        stmt = select(exists().where(self.model.nonce == nonce))
+        filtered = use_nonce_filter and self.nonce_filter is not None
+        if filtered and not self.nonce_filter.might_contain(nonce):
+            return False
+
+        stmt = select(or_(*(exists().where(column == nonce) for column in self._nonce_columns())))
+        result = await db.execute(stmt, execution_options={STATEMENT_LABEL: "nonce_check"})
+        found = result.scalar()
+        if filtered and not found:
+            self.nonce_filter.record_false_positive()
+        return found
+
+    async def get_entry_by_nonce(self, db: AsyncSession, owner_id: str, nonce: str) -> Optional[Row]:
+        """
+        Get the entry an owner wrote with a nonce.
+
+        A plain table finds the entry through the unique nonce index. A
+        partitioned table has no nonce index, so the lookup is pruned to the
+        owner's partition and walks the owner's entries newest first; the
+        retried writes it serves are among the newest.
+
+        Args:
+            db: Database session
+            owner_id: ID of the owner
+            nonce: The nonce
+
+        Returns:
+            Row with id, owner_id, operation, amount, nonce and created_on, or
+            None if the owner has no entry with the nonce
+        """
+        model = self.model
+        stmt = (
+            select(model.id, model.owner_id, model.operation, model.amount, model.nonce, model.created_on)
+            .where(model.owner_id == owner_id, model.nonce == nonce)
+            .order_by(model.id.desc())
+            .limit(1)
+        )
+        result = await db.execute(stmt, execution_options={STATEMENT_LABEL: "replay"})
+        return result.first()
+
+    async def warm_nonce_filter(self, db: AsyncSession, limit: int) -> int:
+        """
+        Load the most recent nonces into the nonce filter.
+
+        Args:
+            db: Database session
+            limit: Maximum number of nonces to load
+
+        Returns:
+            Number of nonces loaded
+        """
+        if self.nonce_filter is None or limit <= 0:
+            return 0
+
+        stmt = select(self.model.nonce).order_by(self.model.id.desc()).limit(limit)
+        loaded = 0
+        async for nonce in await db.stream_scalars(stmt.execution_options(yield_per=10000)):
+            self.nonce_filter.add(nonce)
+            loaded += 1
+        return loaded
+
+    async def prepare_statements(self, db: AsyncSession, operations: Sequence[TLedgerOperation] = ()) -> None:
+        """
+        Run the hot ledger statements once on the session's connection.
+
+        asyncpg prepares a statement the first time a connection runs it, so
+        running the balance, history, nonce and replay reads and the single, atomic
+        and batch inserts (with their outbox writes) at startup spares the first
+        requests the parse and plan round trips. Everything runs in a read-only
+        transaction: Postgres prepares each write and then rejects it before it
+        touches a row or the entry ID sequence.
+
+        Args:
+            db: Database session, with no statement run in its transaction yet
+            operations: Operations whose inserts are prepared; pass one operation
+                of each sign, since spends add the balance guard. Without
+                operations only the reads are prepared, as for a replica.
+        """
+        await db.execute(text("SET TRANSACTION READ ONLY"))
+        try:
+            await self.get_owner_balance(db, WARMUP_OWNER_ID)
+            await self.compute_owner_balance(db, WARMUP_OWNER_ID)
+            await self.get_entries_page(db, WARMUP_OWNER_ID, 1)
+            await self.check_nonce_exists(db, WARMUP_OWNER_ID, use_nonce_filter=False)
+            await self.get_entry_by_nonce(db, WARMUP_OWNER_ID, WARMUP_OWNER_ID)
+            if not operations:
+                return
+
+            await self._get_existing_nonces(db, [WARMUP_OWNER_ID], use_nonce_filter=False)
+            async with self._rejected_write(db):
+                await self._load_balances(db, [WARMUP_OWNER_ID], lock=True)
+            for operation in operations:
+                created_on = datetime.datetime.utcnow()
+                async with self._rejected_write(db):
+                    await db.execute(
+                        self._atomic_insert_statement(WARMUP_OWNER_ID, operation, uuid.uuid4().hex),
+                        execution_options={STATEMENT_LABEL: "insert"}
+                    )
+                async with self._rejected_write(db):
+                    await self._insert_entries(db, [(WARMUP_OWNER_ID, operation, uuid.uuid4().hex)])
+                entry = self.model(
+                    owner_id=WARMUP_OWNER_ID,
+                    operation=operation,
+                    amount=operation.value_amount,
+                    nonce=uuid.uuid4().hex,
+                    created_on=created_on
+                )
+                async with self._rejected_write(db):
+                    db.add(entry)
+                    await db.flush()
+                if self.balance_model is not None:
+                    async with self._rejected_write(db):
+                        await self._apply_balance_delta(db, WARMUP_OWNER_ID, operation.value_amount, created_on)
+                if self.outbox_model is not None:
+                    # The entry left the session with its savepoint, so nothing is flushed
+                    async with self._rejected_write(db):
+                        await self._append_to_outbox(db, entry)
+            if self.notify_channel is not None:
+                async with self._rejected_write(db):
+                    await self._notify_balance_changes(db, [WARMUP_OWNER_ID])
+        finally:
+            await db.rollback()
+
+    @asynccontextmanager
+    async def _rejected_write(self, db: AsyncSession) -> AsyncIterator[None]:
+        """
+        Run a write of prepare_statements in a savepoint of its read-only transaction.
+
+        The error Postgres raises for the write is swallowed and only rolls the
+        savepoint back; the statement stays prepared on the connection.
+
+        Args:
+            db: Database session
+        """
+        try:
+            async with db.begin_nested():
+                yield
+        except DBAPIError as exc:
+            if getattr(exc.orig, "pgcode", None) != READ_ONLY_SQL_TRANSACTION:
+                raise
+
+    async def rebuild_owner_balances(self, db: AsyncSession) -> int:
+        """
+        Recompute the materialized balance of every owner from the ledger.
+
+        The ledger table is locked against writes while the balances are
+        rebuilt, so this is meant as a one-shot backfill for existing ledgers.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of owner balances written
+        """
+        if self.balance_model is None:
+            raise ValueError("Repository has no owner balance model configured")
+
+        await db.execute(text(f'LOCK TABLE "{self.model.__table__.name}" IN SHARE MODE'))
+
+        derived = self._derived_balances().subquery()
+        totals = select(derived.c.owner_id, derived.c.balance, func.now())
+        stmt = pg_insert(self.balance_model).from_select(["owner_id", "balance", "updated_on"], totals)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.balance_model.owner_id],
+            set_={"balance": stmt.excluded.balance, "updated_on": stmt.excluded.updated_on}
+        )
         result = await db.execute(stmt)
-        return result.scalar()
\ No newline at end of file
+        await db.commit()
+        return result.rowcount
+
+    async def build_checkpoints(self, db: AsyncSession, chunk_size: int = 100000,
+                                lag: datetime.timedelta = DEFAULT_CHECKPOINT_LAG) -> int:
+        """
+        Advance the balance checkpoints over the entries recorded since the last run.
+
+        Entries are folded into the checkpoints in ID ranges of chunk_size, each
+        range in its own transaction, so a large backlog is processed
+        incrementally and an interrupted run resumes where it stopped. Entries
+        younger than the lag are left for a later run, and so are entries whose
+        IDs are not settled yet (see _settled_entry_id) after waiting up to
+        CHECKPOINT_WRITER_TIMEOUT for the writers in flight. Concurrent builders
+        are serialized with an advisory lock; a builder that cannot take it returns.
+
+        Args:
+            db: Database session
+            chunk_size: Number of entry IDs folded per transaction
+            lag: Minimum age of the entries to fold
+
+        Returns:
+            Number of checkpoint rows written
+        """
+        if self.checkpoint_model is None:
+            raise ValueError("Repository has no checkpoint model configured")
+
+        entries = self.model.__table__
+        checkpoints = self.checkpoint_model.__table__
+        cutoff = datetime.datetime.utcnow() - lag
+
+        settled_id = await self._settled_entry_id(db, CHECKPOINT_WRITER_TIMEOUT)
+        if settled_id is None:
+            await db.rollback()
+            return 0
+        # Walks the primary key backwards and stops at the first entry older than the cutoff
+        result = await db.execute(
+            select(entries.c.id)
+            .where(entries.c.created_on < cutoff, entries.c.id <= settled_id)
+            .order_by(entries.c.id.desc())
+            .limit(1)
+        )
+        high_watermark = result.scalar()
+        await db.commit()
+        if high_watermark is None:
+            return 0
+
+        written = 0
+        low: Optional[int] = None
+        while True:
+            result = await db.execute(select(func.pg_try_advisory_xact_lock(func.hashtext(checkpoints.name))))
+            if not result.scalar():
+                await db.rollback()
+                return written
+
+            if low is None:
+                # Every entry up to the highest checkpointed ID has been folded, as
+                # builds only fold settled IDs, below which no entry can appear later
+                result = await db.execute(select(func.coalesce(func.max(checkpoints.c.up_to_entry_id), 0)))
+                low = result.scalar()
+            if low >= high_watermark:
+                await db.rollback()
+                return written
+            high = min(low + chunk_size, high_watermark)
+
+            # Entries already covered by an owner's checkpoint are skipped, which
+            # makes folding a range that another builder processed a no-op
+            totals = (
+                select(
+                    entries.c.owner_id,
+                    func.max(entries.c.id),
+                    func.sum(entries.c.amount),
+                    func.now()
+                )
+                .select_from(entries.outerjoin(checkpoints, checkpoints.c.owner_id == entries.c.owner_id))
+                .where(
+                    entries.c.id > low,
+                    entries.c.id <= high,
+                    entries.c.id > func.coalesce(checkpoints.c.up_to_entry_id, 0)
+                )
+                .group_by(entries.c.owner_id)
+            )
+            stmt = pg_insert(checkpoints).from_select(["owner_id", "up_to_entry_id", "balance", "created_on"], totals)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[checkpoints.c.owner_id],
+                set_={
+                    "up_to_entry_id": stmt.excluded.up_to_entry_id,
+                    "balance": checkpoints.c.balance + stmt.excluded.balance,
+                    "created_on": stmt.excluded.created_on
+                }
+            )
+            result = await db.execute(stmt)
+            await db.commit()
+            written += result.rowcount
+            low = high
+
+    async def _settled_entry_id(self, db: AsyncSession, timeout: datetime.timedelta) -> Optional[int]:
+        """
+        Find an entry ID below which no more entries can appear.
+
+        Entry IDs are drawn from the sequence when an entry is inserted, not when
+        it commits, so a writer still in flight can commit an ID lower than one
+        that is already visible. The last ID drawn is settled once every
+        transaction that was writing the entries when it was read has ended.
+
+        Args:
+            db: Database session
+            timeout: Longest time to wait for the writers in flight
+
+        Returns:
+            The settled entry ID, or None if no ID was drawn yet or the writers
+            did not end within the timeout
+        """
+        table_name = self.model.__table__.name
+        result = await db.execute(
+            text("SELECT pg_sequence_last_value(pg_get_serial_sequence(:table_name, 'id')::regclass)"),
+            {"table_name": table_name}
+        )
+        last_id = result.scalar()
+        if last_id is None:
+            return None
+
+        # Writers lock the table before they draw an ID and hold the lock until they end
+        result = await db.execute(
+            text(
+                "SELECT DISTINCT virtualtransaction FROM pg_locks"
+                " WHERE relation = CAST(:table_name AS regclass) AND mode = 'RowExclusiveLock'"
+                " AND granted AND pid <> pg_backend_pid()"
+            ),
+            {"table_name": table_name}
+        )
+        writers = list(result.scalars().all())
+        deadline = time.monotonic() + timeout.total_seconds()
+        while writers:
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(CHECKPOINT_WRITER_POLL_INTERVAL)
+            # Every transaction holds the lock on its own virtual transaction ID until it ends
+            result = await db.execute(
+                text("SELECT virtualxid FROM pg_locks WHERE locktype = 'virtualxid' AND virtualxid = ANY(:writers)"),
+                {"writers": writers}
+            )
+            writers = list(result.scalars().all())
+        return last_id
+
+    async def archive_entries(self, db: AsyncSession, directory: str, before: datetime.datetime,
+                              chunk_size: int = 50000) -> int:
+        """
+        Move entries created before a horizon out of the ledger table into segment files.
+
+        New entries are folded into the balance checkpoints first, and only
+        entries covered by their owner's checkpoint are archived, so balances
+        derived from the checkpoints stay correct. Each chunk is written to
+        its own segment, which is synced to disk before the deletion of its
+        entries commits.
+
+        Archived entries are no longer returned by history or export queries.
+        Their nonces stay taken: a nonce registry keeps them, and a plain
+        ledger table registers them in the archived nonce table, in a
+        transaction that commits before the entries are deleted, so each nonce
+        is always in one of the two tables.
+
+        Args:
+            db: Database session
+            directory: Directory the segment files are written to
+            before: Archive entries created before this time
+            chunk_size: Number of entries per segment and transaction
+
+        Returns:
+            Number of entries archived
+
+        Raises:
+            ValueError: If the checkpoint model, or the archived nonce model of a
+                plain ledger table, is not configured
+        """
+        if self.checkpoint_model is None:
+            raise ValueError("Repository has no checkpoint model configured")
+        if self.nonce_model is None and self.archived_nonce_model is None:
+            raise ValueError("Archiving a plain ledger table requires an archived nonce model")
+
+        await self.build_checkpoints(db)
+
+        entries = self.model.__table__
+        checkpoints = self.checkpoint_model.__table__
+        covered = (
+            select(entries.c.owner_id, entries.c.id)
+            .select_from(entries.join(checkpoints, checkpoints.c.owner_id == entries.c.owner_id))
+            .where(entries.c.created_on < before, entries.c.id <= checkpoints.c.up_to_entry_id)
+            .order_by(entries.c.id)
+            .limit(chunk_size)
+        )
+        stmt = (
+            delete(entries)
+            .where(tuple_(entries.c.owner_id, entries.c.id).in_(covered))
+            .returning(
+                entries.c.id,
+                entries.c.owner_id,
+                entries.c.operation,
+                entries.c.amount,
+                entries.c.nonce,
+                entries.c.created_on
+            )
+        )
+        register = None
+        if self.archived_nonce_model is not None:
+            archived_nonces = self.archived_nonce_model.__table__
+            register = pg_insert(archived_nonces).from_select(
+                ["nonce", "owner_id"],
+                select(entries.c.nonce, entries.c.owner_id).where(tuple_(entries.c.owner_id, entries.c.id).in_(covered))
+            ).on_conflict_do_nothing(index_elements=[archived_nonces.c.nonce])
+            # Only entries whose nonce is registered are deleted
+            stmt = stmt.where(exists().where(archived_nonces.c.nonce == entries.c.nonce))
+
+        archived = 0
+        while True:
+            if register is not None:
+                await db.execute(register)
+                await db.commit()
+            result = await db.execute(stmt)
+            rows = sorted(result.all(), key=lambda row: row.id)
+            if not rows:
+                await db.rollback()
+                return archived
+
+            writer = SegmentWriter(directory, entries.name)
+            try:
+                writer.write(rows)
+                writer.close()
+            except BaseException:
+                writer.abort()
+                await db.rollback()
+                raise
+            await db.commit()
+            archived += len(rows)
+
+    async def lock_outbox_cursor(self, db: AsyncSession, name: str) -> Optional[int]:
+        """
+        Lock the cursor of an outbox relay until the transaction ends.
+
+        The cursor is created at position 0 on first use. A cursor locked by
+        another relay is skipped rather than waited for, so relays of several
+        workers take turns instead of queueing up.
+
+        Args:
+            db: Database session
+            name: Name of the relay's cursor
+
+        Returns:
+            Position of the last published event, or None if another relay holds the cursor
+        """
+        if self.outbox_cursor_model is None:
+            raise ValueError("Repository has no outbox cursor model configured")
+
+        cursors = self.outbox_cursor_model.__table__
+        result = await db.execute(
+            select(cursors.c.position).where(cursors.c.name == name).with_for_update(skip_locked=True),
+            execution_options={STATEMENT_LABEL: "outbox"}
+        )
+        position = result.scalar()
+        if position is not None:
+            return position
+
+        # Either the cursor does not exist yet, or another relay holds it
+        stmt = (
+            pg_insert(cursors)
+            .values(name=name, position=0, updated_on=datetime.datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=[cursors.c.name])
+            .returning(cursors.c.position)
+        )
+        result = await db.execute(stmt, execution_options={STATEMENT_LABEL: "outbox"})
+        return result.scalar()
+
+    async def get_outbox_batch(self, db: AsyncSession, limit: int) -> List[Row]:
+        """
+        Get the oldest rows of the outbox.
+
+        Args:
+            db: Database session
+            limit: Maximum number of rows
+
+        Returns:
+            Outbox rows in ID order
+        """
+        if self.outbox_model is None:
+            raise ValueError("Repository has no outbox model configured")
+
+        outbox = self.outbox_model.__table__
+        result = await db.execute(
+            select(outbox).order_by(outbox.c.id).limit(limit),
+            execution_options={STATEMENT_LABEL: "outbox"}
+        )
+        return list(result.all())
+
+    async def acknowledge_outbox(self, db: AsyncSession, name: str, outbox_ids: Sequence[int],
+                                 position: int) -> None:
+        """
+        Delete published outbox rows and advance the relay's cursor, without committing.
+
+        The rows are deleted by ID rather than by ID range: a transaction that
+        took a lower outbox ID may commit after the batch was read, and its
+        rows must stay for the next batch.
+
+        Args:
+            db: Database session holding the cursor lock
+            name: Name of the relay's cursor
+            outbox_ids: IDs of the published outbox rows
+            position: Position of the last published event
+        """
+        outbox = self.outbox_model.__table__
+        cursors = self.outbox_cursor_model.__table__
+        await db.execute(
+            delete(outbox).where(outbox.c.id == any_(literal(list(outbox_ids), ARRAY(Integer)))),
+            execution_options={STATEMENT_LABEL: "outbox"}
+        )
+        await db.execute(
+            cursors.update()
+            .where(cursors.c.name == name)
+            .values(position=position, updated_on=datetime.datetime.utcnow()),
+            execution_options={STATEMENT_LABEL: "outbox"}
+        )
+
+    def _balance_guard(self, owner_id: str, amount: int) -> ColumnElement[bool]:
+        """
+        Build the SQL condition that the owner's balance covers a negative amount.
+
+        With a materialized balance model the owner's balance row is locked
+        (FOR UPDATE) so that concurrent writers for the same owner queue up.
+
+        Args:
+            owner_id: ID of the owner
+            amount: Amount of the operation
+
+        Returns:
+            A boolean SQL expression
+        """
+        if self.balance_model is not None:
+            balance = (
+                select(self.balance_model.__table__.c.balance)
+                .where(self.balance_model.__table__.c.owner_id == owner_id)
+                .with_for_update()
+                .scalar_subquery()
+            )
+        else:
+            derived = self._derived_balances([owner_id]).subquery()
+            balance = select(derived.c.balance).scalar_subquery()
+        return func.coalesce(balance, 0) + amount >= 0
+
+    def _derived_balances(self, owner_ids: Optional[Sequence[str]] = None) -> Select:
+        """
+        Build a query summing balances from the ledger, per owner.
+
+        With a checkpoint model, each owner's checkpoint balance is added to the
+        sum of the entries recorded after it, so the cost is bounded by recent
+        activity rather than by the owner's full history.
+
+        Args:
+            owner_ids: Restrict the query to these owners; all owners if omitted
+
+        Returns:
+            A select of (owner_id, balance) rows
+        """
+        entries = self.model.__table__
+
+        if self.checkpoint_model is None:
+            stmt = select(entries.c.owner_id, func.sum(entries.c.amount).label("balance"))
+            if owner_ids is not None:
+                stmt = stmt.where(self._owner_filter(entries.c.owner_id, owner_ids))
+            return stmt.group_by(entries.c.owner_id)
+
+        checkpoints = self.checkpoint_model.__table__
+        checkpointed = select(checkpoints.c.owner_id, checkpoints.c.balance.label("amount"))
+        recent = select(entries.c.owner_id, entries.c.amount).select_from(
+            entries.outerjoin(checkpoints, checkpoints.c.owner_id == entries.c.owner_id)
+        ).where(entries.c.id > func.coalesce(checkpoints.c.up_to_entry_id, 0))
+        if owner_ids is not None:
+            checkpointed = checkpointed.where(self._owner_filter(checkpoints.c.owner_id, owner_ids))
+            recent = recent.where(self._owner_filter(entries.c.owner_id, owner_ids))
+
+        parts = checkpointed.union_all(recent).subquery()
+        return select(parts.c.owner_id, func.sum(parts.c.amount).label("balance")).group_by(parts.c.owner_id)
+
+    @staticmethod
+    def _owner_filter(column: ColumnElement, owner_ids: Sequence[str]) -> ColumnElement[bool]:
+        """
+        Build the SQL condition restricting a column to the given owners.
+
+        A single owner is compared with =, which Postgres can use to prune a
+        partitioned table to one partition even with a generic plan.
+
+        Args:
+            column: The owner ID column
+            owner_ids: IDs of the owners
+
+        Returns:
+            A boolean SQL expression
+        """
+        owner_ids = list(owner_ids)
+        if len(owner_ids) == 1:
+            return column == owner_ids[0]
+        return column == any_(literal(owner_ids, ARRAY(String)))
+
+    def _nonce_columns(self) -> List[ColumnElement]:
+        """
+        Get the columns nonces are looked up in: the registry if there is one,
+        else the entries and the archived nonces.
+        """
+        if self.nonce_model is not None:
+            return [self.nonce_model.__table__.c.nonce]
+        columns = [self.model.__table__.c.nonce]
+        if self.archived_nonce_model is not None:
+            columns.append(self.archived_nonce_model.__table__.c.nonce)
+        return columns
+
+    def _skip_duplicate_nonces(self, stmt: Insert) -> Insert:
+        """
+        Make an entry INSERT skip rows whose nonce already exists.
+
+        With a nonce registry there is no unique index on the entries to arbitrate
+        on; the registry trigger raises a unique violation instead.
+
+        Args:
+            stmt: A PostgreSQL INSERT into the entries table
+
+        Returns:
+            The statement, with ON CONFLICT (nonce) DO NOTHING when supported
+        """
+        if self.nonce_model is not None:
+            return stmt
+        return stmt.on_conflict_do_nothing(index_elements=[self.model.__table__.c.nonce])
+
+    def _remember_nonces(self, nonces: Iterable[str]) -> None:
+        """
+        Add committed nonces to the nonce filter.
+
+        Args:
+            nonces: Nonces that were stored
+        """
+        if self.nonce_filter is None:
+            return
+
+        for nonce in nonces:
+            self.nonce_filter.add(nonce)
+
+    async def _notify_balance_changes(self, db: AsyncSession, owner_ids: Iterable[str]) -> None:
+        """
+        Queue a notification per owner on the repository's channel.
+        Postgres delivers the notifications only if the transaction commits.
+
+        Args:
+            db: Database session
+            owner_ids: IDs of the owners whose balance changed
+        """
+        owners = func.unnest(
+            literal(sorted(set(owner_ids)), ARRAY(String))
+        ).table_valued("owner_id").render_derived(name="owners")
+        stmt = select(func.pg_notify(self.notify_channel, owners.c.owner_id)).select_from(owners)
+        await db.execute(stmt, execution_options={STATEMENT_LABEL: "notify"})
+
+    async def _apply_balance_delta(self, db: AsyncSession, owner_id: str, amount: int,
+                                   updated_on: datetime.datetime) -> None:
+        """
+        Add an amount to the materialized balance of an owner, creating the row if needed.
+
+        Args:
+            db: Database session
+            owner_id: ID of the owner
+            amount: Amount to add to the balance
+            updated_on: Timestamp of the change
+        """
+        stmt = pg_insert(self.balance_model).values(owner_id=owner_id, balance=amount, updated_on=updated_on)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.balance_model.owner_id],
+            set_={
+                "balance": self.balance_model.balance + stmt.excluded.balance,
+                "updated_on": stmt.excluded.updated_on
+            }
+        )
+        await db.execute(stmt, execution_options={STATEMENT_LABEL: "balance_update"})
+
+    def _outbox_insert(self, inserted: CTE) -> Insert:
+        """
+        Build the INSERT copying the rows of an entry insert CTE to the outbox.
+
+        Args:
+            inserted: CTE returning the inserted entry rows
+
+        Returns:
+            An INSERT ... SELECT into the outbox, in entry ID order
+        """
+        outbox = self.outbox_model.__table__
+        rows = select(
+            inserted.c.id,
+            inserted.c.owner_id,
+            inserted.c.operation,
+            inserted.c.amount,
+            inserted.c.nonce,
+            inserted.c.created_on
+        ).order_by(inserted.c.id)
+        return pg_insert(outbox).from_select(
+            ["entry_id", "owner_id", "operation", "amount", "nonce", "created_on"],
+            rows
+        )
+
+    async def _append_to_outbox(self, db: AsyncSession, entry: TLedgerEntry) -> None:
+        """
+        Add a pending ORM entry to the outbox.
+
+        Args:
+            db: Database session
+            entry: The entry; it is flushed first to get its ID
+        """
+        await db.flush()
+        stmt = pg_insert(self.outbox_model).values(
+            entry_id=entry.id,
+            owner_id=entry.owner_id,
+            operation=entry.operation.name,
+            amount=entry.amount,
+            nonce=entry.nonce,
+            created_on=entry.created_on
+        )
+        await db.execute(stmt, execution_options={STATEMENT_LABEL: "outbox"})
@@ -6,11 +6,25 @@ from __future__ import annotations
 import datetime
 from typing import Any, Dict, List, Optional, Type, TypeVar, Generic, Union
 
-from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, func
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    PrimaryKeyConstraint,
+    String,
+    event,
+    func
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.types import TypeDecorator
 
+from monorepo.core.db.archive import archived_nonce_trigger_ddl
+from monorepo.core.db.partitioning import hash_partitions_ddl, nonce_trigger_ddl
 from monorepo.core.ledgers.schemas import BaseLedgerOperation, TLedgerOperation
 
 
@@ -56,27 +70,217 @@ class BaseLedgerEntry(Base):
     # operation type will be defined in the concrete class
     amount = Column(Integer, nullable=False)
     nonce = Column(String(100), nullable=False, unique=True)
-    owner_id = Column(String(100), nullable=False, index=True)
+    owner_id = Column(String(100), nullable=False)
     created_on = Column(DateTime, nullable=False, default=func.now())
 
     def __repr__(self) -> str:
         return f"<LedgerEntry(id={self.id}, operation={self.operation}, amount={self.amount}, owner_id={self.owner_id})>"
 
     @classmethod
-    def create_concrete_model(cls, name: str, operation_enum: Type[BaseLedgerOperation]) -> Type[BaseLedgerEntry]:
+    def create_concrete_model(cls, name: str, operation_enum: Type[BaseLedgerOperation], partitions: int = 0,
+                              metadata: Optional[MetaData] = None) -> Type[BaseLedgerEntry]:
         """
         Create a concrete ledger entry model for a specific application.
 
         Args:
             name: Name of the concrete model
             operation_enum: The enum class to use for operations
+            partitions: Number of hash partitions on owner_id; 0 creates a plain
+                table. A partitioned table needs a BaseLedgerNonce registry,
+                which enforces nonce uniqueness in its place.
+            metadata: MetaData of the application's tables, defaults to Base.metadata.
+                Applications loaded into one process need their own MetaData,
+                since their tables share names.
 
         Returns:
             A concrete SQLAlchemy model class
         """
         attrs = {
             "__tablename__": "ledger_entries",
-            "operation": Column(EnumType(operation_enum), nullable=False, index=True)
+            "operation": Column(EnumType(operation_enum), nullable=False, index=True),
+            # Serves keyset pagination of an owner's history and every lookup by owner_id
+            "__table_args__": (Index("ix_ledger_entries_owner_id_id", "owner_id", "id"),),
         }
 
-        return type(name, (cls,), attrs)
\ No newline at end of file
+        if partitions > 0:
+            # The primary key must contain the partition key; (owner_id, id) also
+            # serves keyset pagination, and the id index serves ID range scans
+            attrs.update({
+                "id": Column(Integer, autoincrement=True, nullable=False),
+                "nonce": Column(String(100), nullable=False),
+                "owner_id": Column(String(100), nullable=False),
+                "__table_args__": (
+                    PrimaryKeyConstraint("owner_id", "id"),
+                    Index("ix_ledger_entries_id", "id"),
+                    {"postgresql_partition_by": "HASH (owner_id)"},
+                ),
+            })
+
+        if metadata is not None:
+            attrs["metadata"] = metadata
+
+        model = type(name, (cls,), attrs)
+        if partitions > 0:
+            for statement in hash_partitions_ddl("ledger_entries", partitions) + nonce_trigger_ddl():
+                event.listen(model.__table__, "after_create", DDL(statement))
+        return model
+
+
+TLedgerTable = TypeVar('TLedgerTable', bound='BaseLedgerTable')
+
+
+class BaseLedgerTable(Base):
+    """
+    Abstract base of the ledger's auxiliary tables, whose concrete models only
+    differ by the application's class name and MetaData.
+    """
+    __abstract__ = True
+
+    @classmethod
+    def create_concrete_model(cls: Type[TLedgerTable], name: str,
+                              metadata: Optional[MetaData] = None) -> Type[TLedgerTable]:
+        """
+        Create a concrete model of the table for a specific application.
+
+        Args:
+            name: Name of the concrete model
+            metadata: MetaData of the application's tables, defaults to Base.metadata
+
+        Returns:
+            A concrete SQLAlchemy model class
+        """
+        attrs = {
+            "__tablename__": cls.__tablename__,
+        }
+        if metadata is not None:
+            attrs["metadata"] = metadata
+
+        return type(name, (cls,), attrs)
+
+
+class BaseOwnerBalance(BaseLedgerTable):
+    """
+    Base SQLAlchemy model for materialized per-owner balances.
+    Each row holds the running total of an owner's ledger entries and is
+    maintained in the same transaction that inserts the entries.
+    """
+    __tablename__ = "owner_balances"
+    __abstract__ = True
+
+    owner_id = Column(String(100), primary_key=True)
+    balance = Column(Integer, nullable=False, default=0)
+    updated_on = Column(DateTime, nullable=False, default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<OwnerBalance(owner_id={self.owner_id}, balance={self.balance})>"
+
+
+class BaseLedgerCheckpoint(BaseLedgerTable):
+    """
+    Base SQLAlchemy model for ledger balance checkpoints.
+    A checkpoint stores the sum of an owner's entries up to and including
+    up_to_entry_id, so a balance only needs to add the entries after it.
+    """
+    __tablename__ = "ledger_checkpoints"
+    __abstract__ = True
+
+    owner_id = Column(String(100), primary_key=True)
+    up_to_entry_id = Column(Integer, nullable=False, index=True)
+    balance = Column(Integer, nullable=False)
+    created_on = Column(DateTime, nullable=False, default=func.now())
+
+    def __repr__(self) -> str:
+        return (f"<LedgerCheckpoint(owner_id={self.owner_id}, up_to_entry_id={self.up_to_entry_id}, "
+                f"balance={self.balance})>")
+
+
+class BaseLedgerNonce(BaseLedgerTable):
+    """
+    Base SQLAlchemy model for the nonce registry of partitioned ledgers.
+    Every ledger entry registers its nonce here from an insert trigger, and
+    the primary key rejects duplicates across all partitions.
+    """
+    __tablename__ = "ledger_nonces"
+    __abstract__ = True
+
+    nonce = Column(String(100), primary_key=True)
+    owner_id = Column(String(100), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<LedgerNonce(nonce={self.nonce}, owner_id={self.owner_id})>"
+
+
+class BaseLedgerArchivedNonce(BaseLedgerTable):
+    """
+    Base SQLAlchemy model for the nonces of archived entries of plain ledgers.
+    Archiving registers the nonces here before it deletes the entries, and an
+    insert trigger on the entries rejects them, so a retried write stays a
+    duplicate after its original entry was archived.
+    """
+    __tablename__ = "ledger_archived_nonces"
+    __abstract__ = True
+
+    nonce = Column(String(100), primary_key=True)
+    owner_id = Column(String(100), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<LedgerArchivedNonce(nonce={self.nonce}, owner_id={self.owner_id})>"
+
+    @classmethod
+    def create_concrete_model(cls, name: str, metadata: Optional[MetaData] = None) -> Type[BaseLedgerArchivedNonce]:
+        """
+        Create a concrete archived nonce model for a specific application.
+
+        The model's metadata also creates the trigger rejecting archived nonces.
+
+        Args:
+            name: Name of the concrete model
+            metadata: MetaData of the application's tables, defaults to Base.metadata
+
+        Returns:
+            A concrete SQLAlchemy model class
+        """
+        model = super().create_concrete_model(name, metadata)
+        # The trigger goes on the entries, which exist once all tables are created
+        for statement in archived_nonce_trigger_ddl():
+            event.listen(model.metadata, "after_create", DDL(statement))
+        return model
+
+
+class BaseLedgerOutbox(BaseLedgerTable):
+    """
+    Base SQLAlchemy model for the transactional outbox of ledger entries.
+    Every written entry adds a row here in the same transaction, so the
+    change feed holds exactly the committed entries. A relay publishes the
+    rows in ID order and deletes them.
+    """
+    __tablename__ = "ledger_outbox"
+    __abstract__ = True
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entry_id = Column(Integer, nullable=False)
+    owner_id = Column(String(100), nullable=False)
+    operation = Column(String(50), nullable=False)
+    amount = Column(Integer, nullable=False)
+    nonce = Column(String(100), nullable=False)
+    created_on = Column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<LedgerOutbox(id={self.id}, entry_id={self.entry_id}, owner_id={self.owner_id})>"
+
+
+class BaseLedgerOutboxCursor(BaseLedgerTable):
+    """
+    Base SQLAlchemy model for the durable cursors of outbox relays.
+    A cursor holds the position of the last event its relay published, and
+    advances in the transaction that deletes the published outbox rows.
+    """
+    __tablename__ = "ledger_outbox_cursors"
+    __abstract__ = True
+
+    name = Column(String(100), primary_key=True)
+    position = Column(Integer, nullable=False, default=0)
+    updated_on = Column(DateTime, nullable=False, default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<LedgerOutboxCursor(name={self.name}, position={self.position})>"
@@ -0,0 +1,135 @@
+"""
+In-memory Bloom filter used to skip nonce lookups for nonces that were never seen.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Dict, Union
+
+
+class BloomNonceFilter:
+    """
+    Bloom filter over ledger nonces.
+
+    A negative answer means this process has not seen the nonce, either from
+    the startup warm-up or from its own inserts. That is not proof that the
+    nonce is absent from the database, because other workers insert nonces
+    too. Callers must therefore keep the unique constraint on the nonce column
+    as the final guard, and only use the filter to skip lookups.
+
+    When the number of added nonces reaches the capacity the filter is cleared
+    instead of letting its false-positive rate degrade. This is safe for the
+    same reason: a forgotten nonce only costs a constraint check.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Initialize the filter.
+
+        Args:
+            capacity: Number of nonces the filter is sized for
+            error_rate: Target false-positive rate at full capacity
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.resets = 0
+        self.definite_misses = 0
+        self.possible_hits = 0
+        self.false_positives = 0
+
+    def add(self, nonce: str) -> None:
+        """
+        Add a nonce to the filter.
+
+        Args:
+            nonce: The nonce to add
+        """
+        if self.count >= self.capacity:
+            self.clear()
+            self.resets += 1
+
+        for position in self._positions(nonce):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def might_contain(self, nonce: str) -> bool:
+        """
+        Check whether the nonce may have been added.
+
+        Args:
+            nonce: The nonce to check
+
+        Returns:
+            False if the nonce was definitely not added, True otherwise
+        """
+        for position in self._positions(nonce):
+            if not self._bits[position >> 3] & (1 << (position & 7)):
+                self.definite_misses += 1
+                return False
+
+        self.possible_hits += 1
+        return True
+
+    def record_false_positive(self) -> None:
+        """
+        Record that a possible hit turned out to be absent from the database.
+        """
+        self.false_positives += 1
+
+    def clear(self) -> None:
+        """
+        Remove all nonces from the filter.
+        """
+        self._bits = bytearray(len(self._bits))
+        self.count = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the bit array in bytes."""
+        return len(self._bits)
+
+    @property
+    def estimated_false_positive_rate(self) -> float:
+        """Theoretical false-positive rate at the current fill level."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    @property
+    def observed_false_positive_rate(self) -> float:
+        """Share of lookups for new nonces that the filter could not rule out."""
+        negatives = self.false_positives + self.definite_misses
+        return self.false_positives / negatives if negatives else 0.0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Get the filter counters and rates.
+
+        Returns:
+            Mapping of metric name to value
+        """
+        return {
+            "memory_bytes": self.memory_bytes,
+            "count": self.count,
+            "capacity": self.capacity,
+            "num_hashes": self.num_hashes,
+            "resets": self.resets,
+            "definite_misses": self.definite_misses,
+            "possible_hits": self.possible_hits,
+            "false_positives": self.false_positives,
+            "estimated_false_positive_rate": self.estimated_false_positive_rate,
+            "observed_false_positive_rate": self.observed_false_positive_rate,
+        }
+
+    def _positions(self, nonce: str):
+        """
+        Yield the bit positions of a nonce using double hashing.
+        """
+        digest = hashlib.blake2b(nonce.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (first + i * second) % self.num_bits
@@ -0,0 +1,168 @@
+"""
+DDL for the hash-partitioned ledger layout.
+
+With partitioning enabled, ledger_entries is split into a fixed number of
+hash partitions on owner_id, so each partition keeps its own small indexes
+and vacuum works partition by partition. Postgres cannot enforce a unique
+index on a partitioned table unless it contains the partition key, so nonce
+uniqueness moves to the ledger_nonces registry. A trigger registers the
+nonce of every inserted entry, and a duplicate nonce fails the insert with
+a unique violation.
+"""
+from __future__ import annotations
+
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+LEDGER_TABLE = "ledger_entries"
+NONCE_TABLE = "ledger_nonces"
+
+# Name of the trigger and of its function
+NONCE_TRIGGER = "ledger_entries_register_nonce"
+
+
+def hash_partitions_ddl(parent: str, partitions: int, prefix: str = LEDGER_TABLE) -> List[str]:
+    """
+    Build the statements creating the hash partitions of a table.
+
+    Args:
+        parent: Name of the partitioned table
+        partitions: Number of partitions
+        prefix: Prefix of the partition names, which end in _p<remainder>
+
+    Returns:
+        One CREATE TABLE statement per partition
+    """
+    return [
+        f"CREATE TABLE IF NOT EXISTS {prefix}_p{remainder} PARTITION OF {parent} "
+        f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        for remainder in range(partitions)
+    ]
+
+
+def nonce_trigger_ddl(table: str = LEDGER_TABLE, nonce_table: str = NONCE_TABLE) -> List[str]:
+    """
+    Build the statements creating the trigger that registers entry nonces.
+
+    The trigger is a BEFORE INSERT row trigger on the partitioned table, which
+    Postgres 13 and later clone to every partition.
+
+    Args:
+        table: Name of the ledger entries table
+        nonce_table: Name of the nonce registry table
+
+    Returns:
+        The CREATE FUNCTION and CREATE TRIGGER statements
+    """
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION {NONCE_TRIGGER}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO {nonce_table} (nonce, owner_id) VALUES (NEW.nonce, NEW.owner_id);
+            RETURN NEW;
+        END
+        $$
+        """,
+        f"DROP TRIGGER IF EXISTS {NONCE_TRIGGER} ON {table}",
+        f"CREATE TRIGGER {NONCE_TRIGGER} BEFORE INSERT ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {NONCE_TRIGGER}()",
+    ]
+
+
+def partition_ledger_ddl(partitions: int) -> List[str]:
+    """
+    Build the statements converting a plain ledger_entries table to the partitioned layout.
+
+    The entries are copied into a new partitioned table that keeps using the
+    existing ID sequence, then the old table is dropped. The table is locked
+    for the whole conversion, so run it in a maintenance window. The nonce
+    registry table must already exist.
+
+    Args:
+        partitions: Number of hash partitions
+
+    Returns:
+        The statements, to run in order in one transaction
+    """
+    staging = f"{LEDGER_TABLE}_partitioned"
+    return [
+        f"LOCK TABLE {LEDGER_TABLE} IN ACCESS EXCLUSIVE MODE",
+        f"""
+        CREATE TABLE {staging} (
+            id INTEGER NOT NULL DEFAULT nextval('{LEDGER_TABLE}_id_seq'::regclass),
+            operation VARCHAR(50) NOT NULL,
+            amount INTEGER NOT NULL,
+            nonce VARCHAR(100) NOT NULL,
+            owner_id VARCHAR(100) NOT NULL,
+            created_on TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        ) PARTITION BY HASH (owner_id)
+        """,
+        *hash_partitions_ddl(staging, partitions),
+        f"INSERT INTO {staging} (id, operation, amount, nonce, owner_id, created_on) "
+        f"SELECT id, operation, amount, nonce, owner_id, created_on FROM {LEDGER_TABLE}",
+        f"INSERT INTO {NONCE_TABLE} (nonce, owner_id) SELECT nonce, owner_id FROM {LEDGER_TABLE}",
+        f"ALTER SEQUENCE {LEDGER_TABLE}_id_seq OWNED BY {staging}.id",
+        f"DROP TABLE {LEDGER_TABLE}",
+        f"ALTER TABLE {staging} RENAME TO {LEDGER_TABLE}",
+        f"ALTER TABLE {LEDGER_TABLE} ADD CONSTRAINT {LEDGER_TABLE}_pkey PRIMARY KEY (owner_id, id)",
+        f"CREATE INDEX ix_{LEDGER_TABLE}_id ON {LEDGER_TABLE} (id)",
+        f"CREATE INDEX ix_{LEDGER_TABLE}_operation ON {LEDGER_TABLE} (operation)",
+        *nonce_trigger_ddl(),
+    ]
+
+
+def unpartition_ledger_ddl() -> List[str]:
+    """
+    Build the statements converting a partitioned ledger_entries table back to a plain table.
+
+    Returns:
+        The statements, to run in order in one transaction
+    """
+    staging = f"{LEDGER_TABLE}_unpartitioned"
+    return [
+        f"LOCK TABLE {LEDGER_TABLE} IN ACCESS EXCLUSIVE MODE",
+        f"""
+        CREATE TABLE {staging} (
+            id INTEGER NOT NULL DEFAULT nextval('{LEDGER_TABLE}_id_seq'::regclass),
+            operation VARCHAR(50) NOT NULL,
+            amount INTEGER NOT NULL,
+            nonce VARCHAR(100) NOT NULL,
+            owner_id VARCHAR(100) NOT NULL,
+            created_on TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+        """,
+        f"INSERT INTO {staging} (id, operation, amount, nonce, owner_id, created_on) "
+        f"SELECT id, operation, amount, nonce, owner_id, created_on FROM {LEDGER_TABLE}",
+        f"ALTER SEQUENCE {LEDGER_TABLE}_id_seq OWNED BY {staging}.id",
+        f"DROP TABLE {LEDGER_TABLE}",
+        f"DROP FUNCTION IF EXISTS {NONCE_TRIGGER}()",
+        f"ALTER TABLE {staging} RENAME TO {LEDGER_TABLE}",
+        f"ALTER TABLE {LEDGER_TABLE} ADD CONSTRAINT {LEDGER_TABLE}_pkey PRIMARY KEY (id)",
+        f"ALTER TABLE {LEDGER_TABLE} ADD CONSTRAINT {LEDGER_TABLE}_nonce_key UNIQUE (nonce)",
+        f"CREATE INDEX ix_{LEDGER_TABLE}_operation ON {LEDGER_TABLE} (operation)",
+        f"CREATE INDEX ix_{LEDGER_TABLE}_owner_id ON {LEDGER_TABLE} (owner_id)",
+        f"CREATE INDEX ix_{LEDGER_TABLE}_owner_id_id ON {LEDGER_TABLE} (owner_id, id)",
+    ]
+
+
+def is_partitioned(connection: Connection, table: str = LEDGER_TABLE) -> bool:
+    """
+    Check whether a table is partitioned.
+
+    Args:
+        connection: Database connection
+        table: Name of the table
+
+    Returns:
+        True if the table exists and is partitioned
+    """
+    result = connection.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table)"
+        ),
+        {"table": table},
+    )
+    return bool(result.scalar())
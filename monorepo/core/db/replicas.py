@@ -0,0 +1,177 @@
+"""
+Routing of read-only requests to streaming replicas.
+
+Writes return a consistency token, the primary's WAL position after the
+commit. A read that passes the token back is served by a replica only once
+the replica has replayed the WAL up to that position; a replica that does
+not catch up in time is skipped in favour of the primary, so a client
+always reads its own writes.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from monorepo.core.db.engine import warm_pool
+
+logger = logging.getLogger(__name__)
+
+# Request and response header carrying the consistency token
+CONSISTENCY_TOKEN_HEADER = "X-Consistency-Token"
+
+# Seconds between two checks of a replica that has not caught up yet
+REPLICA_POLL_INTERVAL = 0.01
+
+# Textual form of a Postgres WAL position (pg_lsn)
+_LSN_PATTERN = re.compile(r"^[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}$")
+
+
+def parse_consistency_token(token: str) -> str:
+    """
+    Validate a consistency token.
+
+    Args:
+        token: Token passed by a client
+
+    Returns:
+        The token
+
+    Raises:
+        ValueError: If the token is not a WAL position
+    """
+    if not _LSN_PATTERN.match(token):
+        raise ValueError(f"Invalid consistency token: {token!r}")
+    return token
+
+
+class ReplicaRouter:
+    """
+    Hands out sessions for reads, spread round robin over the replicas.
+
+    Without replicas every session comes from the primary.
+    """
+
+    def __init__(
+            self,
+            primary: sessionmaker,
+            replicas: List[sessionmaker],
+            max_wait: float = 0.1
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            primary: Session factory of the primary
+            replicas: Session factories of the replicas
+            max_wait: Seconds a read with a consistency token waits for a replica to catch up
+        """
+        self.primary = primary
+        self.replicas = replicas
+        self.max_wait = max_wait
+        self._next_replica = itertools.cycle(range(len(replicas)))
+        self.stats = {"replica_reads": 0, "primary_reads": 0, "fallbacks": 0}
+
+    async def warm(self, connections: int, prepare: Callable[[AsyncSession], Awaitable[None]]) -> None:
+        """
+        Open and warm the connection pools of the replicas.
+
+        An unreachable replica is only logged, as reads skip it anyway.
+
+        Args:
+            connections: Number of connections to open per replica
+            prepare: Coroutine function running the statements to prepare on a session
+        """
+        for replica in self.replicas:
+            try:
+                await warm_pool(replica, connections, prepare)
+            except (exc.DBAPIError, exc.TimeoutError, OSError):
+                logger.warning("Could not warm up a replica", exc_info=True)
+
+    async def consistency_token(self, db: AsyncSession) -> Optional[str]:
+        """
+        Get the token of the writes committed so far.
+
+        Call it after the write has committed; the session may belong to any
+        connection of the primary.
+
+        Args:
+            db: Session of the primary
+
+        Returns:
+            The primary's current WAL position, or None without replicas
+        """
+        if not self.replicas:
+            return None
+
+        result = await db.execute(text("SELECT pg_current_wal_lsn()::text"))
+        return result.scalar()
+
+    @asynccontextmanager
+    async def session(self, consistency_token: Optional[str] = None) -> AsyncIterator[AsyncSession]:
+        """
+        Open a session for a read.
+
+        Args:
+            consistency_token: Token of a write the read must observe
+
+        Yields:
+            A replica session, or a primary session if there are no replicas
+            or the chosen replica is unreachable or too far behind
+
+        Raises:
+            ValueError: If the consistency token is invalid
+        """
+        if consistency_token is not None:
+            parse_consistency_token(consistency_token)
+
+        session = await self._replica_session(consistency_token) if self.replicas else None
+        if session is None:
+            self.stats["primary_reads"] += 1
+            session = self.primary()
+        else:
+            self.stats["replica_reads"] += 1
+
+        async with session:
+            yield session
+
+    async def _replica_session(self, consistency_token: Optional[str]) -> Optional[AsyncSession]:
+        """
+        Open a session on the next replica, waiting for it to replay the token.
+
+        Returns:
+            The session, or None if the primary has to serve the read
+        """
+        session = self.replicas[next(self._next_replica)]()
+        try:
+            if consistency_token is None:
+                # Check out the connection now, so an unreachable replica is skipped
+                await session.connection()
+                return session
+
+            deadline = time.monotonic() + self.max_wait
+            while True:
+                # pg_last_wal_replay_lsn() is NULL on a server that is not a standby
+                result = await session.execute(
+                    text("SELECT pg_last_wal_replay_lsn() >= CAST(CAST(:token AS text) AS pg_lsn)"),
+                    {"token": consistency_token}
+                )
+                if result.scalar():
+                    return session
+                if time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(REPLICA_POLL_INTERVAL)
+        except (exc.DBAPIError, exc.TimeoutError, OSError):
+            logger.warning("Replica unavailable, reading from the primary", exc_info=True)
+
+        self.stats["fallbacks"] += 1
+        await session.close()
+        return None
@@ -0,0 +1,250 @@
+"""
+Command line maintenance tools for ledger databases.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import sys
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from monorepo.core.db.archive import read_archive
+from monorepo.core.db.ledger_repository import LedgerRepository
+from monorepo.core.ledgers.config import OutboxSinkKind
+from monorepo.core.ledgers.export import DEFAULT_EXPORT_FETCH_SIZE, ExportFormat, encode_header, encode_rows
+from monorepo.core.ledgers.services.outbox_relay import DEFAULT_RELAY_NAME, OutboxRelay, create_outbox_sink
+
+
+async def backfill_balances(db: AsyncSession, repository: LedgerRepository, args: argparse.Namespace) -> None:
+    """
+    Rebuild the materialized owner balances from the ledger entries.
+    """
+    count = await repository.rebuild_owner_balances(db)
+    print(f"Backfilled {count} owner balances.")
+
+
+async def build_checkpoints(db: AsyncSession, repository: LedgerRepository, args: argparse.Namespace) -> None:
+    """
+    Fold new ledger entries into the balance checkpoints, chunk by chunk.
+    """
+    count = await repository.build_checkpoints(
+        db,
+        chunk_size=args.chunk_size,
+        lag=datetime.timedelta(seconds=args.lag)
+    )
+    print(f"Wrote {count} ledger checkpoints.")
+
+
+async def export_entries(db: AsyncSession, repository: LedgerRepository, args: argparse.Namespace) -> None:
+    """
+    Stream ledger entries to a file or stdout as NDJSON or CSV.
+    """
+    export_format = ExportFormat(args.format)
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    count = 0
+
+    try:
+        output.write(encode_header(export_format))
+        async for rows in repository.stream_entries(
+                db,
+                owner_id=args.owner_id,
+                operations=args.operation,
+                created_from=args.created_from,
+                created_to=args.created_to,
+                fetch_size=args.fetch_size
+        ):
+            output.write(encode_rows(rows, export_format))
+            count += len(rows)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Exported {count} ledger entries.", file=sys.stderr)
+
+
+async def archive_entries(db: AsyncSession, repository: LedgerRepository, args: argparse.Namespace) -> None:
+    """
+    Move ledger entries older than the horizon into archive segment files.
+    """
+    before = datetime.datetime.utcnow() - datetime.timedelta(days=args.older_than_days)
+    count = await repository.archive_entries(db, args.directory, before, chunk_size=args.chunk_size)
+    print(f"Archived {count} ledger entries.")
+
+
+async def read_archived_entries(db: AsyncSession, repository: LedgerRepository, args: argparse.Namespace) -> None:
+    """
+    Stream archived ledger entries to a file or stdout as NDJSON or CSV.
+    """
+    export_format = ExportFormat(args.format)
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    count = 0
+    batch = []
+
+    try:
+        output.write(encode_header(export_format))
+        for entry in read_archive(args.directory, owner_id=args.owner_id):
+            batch.append(entry)
+            if len(batch) >= DEFAULT_EXPORT_FETCH_SIZE:
+                output.write(encode_rows(batch, export_format))
+                count += len(batch)
+                batch = []
+        output.write(encode_rows(batch, export_format))
+        count += len(batch)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Read {count} archived ledger entries.", file=sys.stderr)
+
+
+async def relay_outbox(db: AsyncSession, repository: LedgerRepository, args: argparse.Namespace) -> None:
+    """
+    Drain the ledger outbox into a sink once.
+    """
+    relay = OutboxRelay(
+        sessionmaker(db.bind, expire_on_commit=False, class_=AsyncSession),
+        repository,
+        create_outbox_sink(OutboxSinkKind(args.sink), path=args.file, channel=args.channel),
+        name=args.name,
+        batch_size=args.batch_size
+    )
+    try:
+        count = await relay.run_once()
+    finally:
+        await relay.stop()
+    print(f"Published {count} ledger changes, up to position {relay.position}.")
+
+
+async def listen_changes(db: AsyncSession, repository: LedgerRepository, args: argparse.Namespace) -> None:
+    """
+    Print the ledger changes published on a notification channel as NDJSON until interrupted.
+    """
+    payloads: asyncio.Queue = asyncio.Queue()
+    async with db.bind.connect() as connection:
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.add_listener(
+            args.channel,
+            lambda conn, pid, channel, payload: payloads.put_nowait(payload)
+        )
+        print(f"Listening for ledger changes on channel {args.channel}.", file=sys.stderr)
+        while True:
+            print(await payloads.get(), flush=True)
+
+
+def build_parser(prog: Optional[str] = None) -> argparse.ArgumentParser:
+    """
+    Build the argument parser for the ledger maintenance commands.
+
+    Args:
+        prog: Program name shown in the usage text
+
+    Returns:
+        The configured argument parser
+    """
+    parser = argparse.ArgumentParser(prog=prog, description="Ledger maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill = subparsers.add_parser(
+        "backfill-balances",
+        help="Rebuild materialized owner balances from the ledger"
+    )
+    backfill.set_defaults(handler=backfill_balances)
+
+    checkpoints = subparsers.add_parser(
+        "build-checkpoints",
+        help="Fold new ledger entries into the balance checkpoints"
+    )
+    checkpoints.add_argument("--chunk-size", type=int, default=100000, help="Entry IDs folded per transaction")
+    checkpoints.add_argument("--lag", type=float, default=60.0, help="Minimum entry age in seconds")
+    checkpoints.set_defaults(handler=build_checkpoints)
+
+    export = subparsers.add_parser(
+        "export",
+        help="Stream ledger entries as NDJSON or CSV"
+    )
+    export.add_argument("--format", choices=[f.value for f in ExportFormat], default=ExportFormat.NDJSON.value)
+    export.add_argument("--output", help="Output file, defaults to stdout")
+    export.add_argument("--owner-id", help="Only export entries of this owner")
+    export.add_argument("--operation", action="append", help="Only export this operation, may be repeated")
+    export.add_argument("--created-from", type=datetime.datetime.fromisoformat,
+                        help="Only export entries created at or after this ISO time")
+    export.add_argument("--created-to", type=datetime.datetime.fromisoformat,
+                        help="Only export entries created before this ISO time")
+    export.add_argument("--fetch-size", type=int, default=DEFAULT_EXPORT_FETCH_SIZE,
+                        help="Rows fetched per round trip")
+    export.set_defaults(handler=export_entries)
+
+    archive = subparsers.add_parser(
+        "archive",
+        help="Move old ledger entries into compressed archive segments"
+    )
+    archive.add_argument("--directory", required=True, help="Directory of the archive segments")
+    archive.add_argument("--older-than-days", type=float, default=90.0, help="Archive entries older than this")
+    archive.add_argument("--chunk-size", type=int, default=50000, help="Entries per segment and transaction")
+    archive.set_defaults(handler=archive_entries)
+
+    read = subparsers.add_parser(
+        "read-archive",
+        help="Stream archived ledger entries as NDJSON or CSV"
+    )
+    read.add_argument("--directory", required=True, help="Directory of the archive segments")
+    read.add_argument("--format", choices=[f.value for f in ExportFormat], default=ExportFormat.NDJSON.value)
+    read.add_argument("--output", help="Output file, defaults to stdout")
+    read.add_argument("--owner-id", help="Only read entries of this owner")
+    read.set_defaults(handler=read_archived_entries)
+
+    relay = subparsers.add_parser(
+        "relay-outbox",
+        help="Publish the pending ledger outbox events once"
+    )
+    relay.add_argument("--sink", choices=[k.value for k in OutboxSinkKind], default=OutboxSinkKind.FILE.value)
+    relay.add_argument("--file", help="NDJSON file of the file sink")
+    relay.add_argument("--channel", default="ledger_changes", help="Notification channel of the notify sink")
+    relay.add_argument("--name", default=DEFAULT_RELAY_NAME, help="Name of the relay's cursor")
+    relay.add_argument("--batch-size", type=int, default=500, help="Events per batch and transaction")
+    relay.set_defaults(handler=relay_outbox)
+
+    listen = subparsers.add_parser(
+        "listen-changes",
+        help="Print the ledger changes of a notification channel as NDJSON"
+    )
+    listen.add_argument("--channel", default="ledger_changes", help="Notification channel of the notify sink")
+    listen.set_defaults(handler=listen_changes)
+
+    return parser
+
+
+async def run_command(database_url: str, repository: LedgerRepository, args: argparse.Namespace) -> None:
+    """
+    Run a parsed command against the given database.
+
+    Args:
+        database_url: Database URL of the application
+        repository: The application's ledger repository
+        args: Parsed command line arguments
+    """
+    engine = create_async_engine(database_url)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    try:
+        async with session_factory() as db:
+            await args.handler(db, repository, args)
+    finally:
+        await engine.dispose()
+
+
+def run_ledger_cli(database_url: str, repository: LedgerRepository, argv: Optional[List[str]] = None) -> None:
+    """
+    Entry point used by the application specific ledger CLI scripts.
+
+    Args:
+        database_url: Database URL of the application
+        repository: The application's ledger repository
+        argv: Command line arguments, defaults to sys.argv
+    """
+    args = build_parser().parse_args(argv)
+    asyncio.run(run_command(database_url, repository, args))
@@ -1,6 +1,7 @@
 """
 Configuration for ledger operations.
 """
+import enum
 from typing import Dict
 
 # Configuration for ledger operations and their associated credit values
@@ -18,4 +19,26 @@ LEDGER_OPERATION_CONFIG: Dict[str, int] = {
     # TravelAI specific operations
     "BOOKING_REWARD": 5,
     "LOYALTY_BONUS": 2,
-}
\ No newline at end of file
+}
+
+
+class LedgerWriteMode(str, enum.Enum):
+    """
+    Strategies for writing a ledger entry.
+
+    CHECKED runs the nonce and balance checks as separate queries before the insert.
+    ATOMIC performs the nonce dedupe, the balance guard and the insert in a single statement.
+    """
+    CHECKED = "checked"
+    ATOMIC = "atomic"
+
+
+class OutboxSinkKind(str, enum.Enum):
+    """
+    Destinations of the ledger change feed published by the outbox relay.
+
+    FILE appends the events as NDJSON to a local file.
+    NOTIFY sends each event with pg_notify to the listeners of a Postgres channel.
+    """
+    FILE = "file"
+    NOTIFY = "notify"
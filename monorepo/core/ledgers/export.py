@@ -0,0 +1,69 @@
+"""
+Encoding of ledger exports as NDJSON or CSV.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from enum import Enum
+from typing import Sequence
+
+from sqlalchemy.engine import Row
+
+# Rows fetched from the server-side cursor per round trip
+DEFAULT_EXPORT_FETCH_SIZE = 1000
+
+# Exported columns, in CSV column order
+EXPORT_COLUMNS = ("id", "owner_id", "operation", "amount", "nonce", "created_on")
+
+
+class ExportFormat(str, Enum):
+    """Output formats of ledger exports."""
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    @property
+    def media_type(self) -> str:
+        """Content type of the encoded export."""
+        return "application/x-ndjson" if self is ExportFormat.NDJSON else "text/csv"
+
+
+def encode_header(export_format: ExportFormat) -> str:
+    """
+    Encode the text that precedes the first row of an export.
+
+    Args:
+        export_format: The output format
+
+    Returns:
+        The CSV header line, or an empty string for NDJSON
+    """
+    if export_format is ExportFormat.NDJSON:
+        return ""
+    return ",".join(EXPORT_COLUMNS) + "\r\n"
+
+
+def encode_rows(rows: Sequence[Row], export_format: ExportFormat) -> str:
+    """
+    Encode a batch of ledger rows.
+
+    Args:
+        rows: Rows with the EXPORT_COLUMNS columns; operations may be enum members or names
+        export_format: The output format
+
+    Returns:
+        The encoded rows, one line per row
+    """
+    values = [
+        (row.id, row.owner_id, getattr(row.operation, "name", row.operation), row.amount, row.nonce,
+         row.created_on.isoformat())
+        for row in rows
+    ]
+
+    if export_format is ExportFormat.NDJSON:
+        return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, value))) + "\n" for value in values)
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(values)
+    return buffer.getvalue()
@@ -0,0 +1,133 @@
+"""
+Versioned operation amount configs that can be reloaded without a restart.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from monorepo.core.ledgers.schemas import apply_operation_amounts
+
+logger = logging.getLogger(__name__)
+
+
+class OperationAmounts(NamedTuple):
+    """A versioned set of operation amounts."""
+    version: int
+    amounts: Dict[str, int]
+
+
+def load_operation_amounts(path: str) -> OperationAmounts:
+    """
+    Load an operation amount config file.
+
+    The file is JSON of the form {"version": 2, "amounts": {"CREDIT_ADD": 10, ...}}.
+
+    Args:
+        path: Path of the config file
+
+    Returns:
+        The versioned amounts
+
+    Raises:
+        ValueError: If the file is not a valid config
+    """
+    with open(path, encoding="utf-8") as config_file:
+        data = json.load(config_file)
+
+    if not isinstance(data, dict):
+        raise ValueError(f"Operation amount config {path} must be a JSON object")
+    version = data.get("version")
+    amounts = data.get("amounts")
+    if not isinstance(version, int) or not isinstance(amounts, dict):
+        raise ValueError(f"Operation amount config {path} needs an integer version and an amounts object")
+    return OperationAmounts(version, amounts)
+
+
+class OperationAmountsReloader:
+    """
+    Applies an operation amount config file and keeps watching it for new versions.
+
+    Only versions newer than the applied one are swapped in; to roll back,
+    publish the old amounts under a new version. A file that fails to load or
+    validate is logged and the current amounts stay in effect.
+    """
+
+    def __init__(self, path: str, interval: float = 5.0):
+        """
+        Initialize the reloader.
+
+        Args:
+            path: Path of the config file
+            interval: Seconds between two checks of the file
+        """
+        self.path = path
+        self.interval = interval
+        self.version: Optional[int] = None
+        self._stat: Optional[Tuple[float, int]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def reload(self) -> bool:
+        """
+        Apply the config file if it changed and holds a newer version.
+
+        Returns:
+            True if new amounts were applied
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If the file is not a valid config
+            TypeError: If an operation has no integer amount
+        """
+        stat = os.stat(self.path)
+        file_stat = (stat.st_mtime, stat.st_size)
+        if file_stat == self._stat:
+            return False
+
+        # A broken file is reported once and read again when it changes
+        self._stat = file_stat
+        config = load_operation_amounts(self.path)
+        if self.version is not None and config.version <= self.version:
+            if config.version < self.version:
+                logger.warning(
+                    "Ignoring operation amounts version %d, version %d is already applied",
+                    config.version, self.version
+                )
+            return False
+
+        apply_operation_amounts(config.amounts)
+        self.version = config.version
+        logger.info("Applied operation amounts version %d", config.version)
+        return True
+
+    def start(self) -> None:
+        """
+        Start watching the config file in the background.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop watching the config file.
+        """
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.reload()
+            except Exception:
+                logger.exception("Could not reload operation amounts from %s", self.path)
@@ -4,47 +4,51 @@ Pydantic schemas for ledger functionality.
 from __future__ import annotations
 
 import datetime
-from typing import Generic, List, Optional, TypeVar
+from functools import lru_cache
+from typing import Generic, List, Optional
 
-from pydantic import BaseModel, Field, validator
-from pydantic.generics import GenericModel
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
-from monorepo.core.ledgers.schemas import BaseLedgerOperation, TLedgerOperation
+from monorepo.core.ledgers.schemas import BaseLedgerOperation, LedgerEntryStatus, TLedgerOperation
 
+# Maximum number of entries accepted by a single batch request
+MAX_LEDGER_BATCH_SIZE = 10000
 
-class LedgerEntryBase(GenericModel, Generic[TLedgerOperation]):
+# Maximum number of owners accepted by a single balance lookup
+MAX_BALANCE_LOOKUP_SIZE = 1000
+
+# Default and maximum number of entries returned per history page
+DEFAULT_LEDGER_PAGE_SIZE = 100
+MAX_LEDGER_PAGE_SIZE = 1000
+
+
+class LedgerEntryBase(BaseModel, Generic[TLedgerOperation]):
     """Base Pydantic model for ledger entry data."""
     operation: TLedgerOperation
     amount: Optional[int] = None
     nonce: str
     owner_id: str
 
-    @validator('amount', pre=True, always=True)
-    def set_amount_from_operation(cls, v: Optional[int], values: dict) -> int:
-        """Automatically set the amount based on the operation if not provided."""
-        if v is not None:
-            return v
-
-        operation = values.get('operation')
-        if operation is None:
-            raise ValueError('Operation is required to calculate amount')
-
-        return operation.value_amount
-
 
 class LedgerEntryCreate(LedgerEntryBase[TLedgerOperation]):
     """Model for creating a new ledger entry."""
-    pass
+
+    @model_validator(mode='after')
+    def set_amount_from_operation(self) -> LedgerEntryCreate:
+        """Automatically set the amount based on the operation if not provided."""
+        if self.amount is None:
+            self.amount = self.operation.value_amount
+        return self
 
 
 class LedgerEntryRead(LedgerEntryBase[TLedgerOperation]):
-    """Model for reading a ledger entry."""
+    """Model for reading a ledger entry; validates directly from ORM objects and rows."""
+    model_config = ConfigDict(from_attributes=True)
+
+    amount: int
     id: int
     created_on: datetime.datetime
 
-    class Config:
-        orm_mode = True
-
 
 class LedgerBalanceResponse(BaseModel):
     """Response model for balance inquiries."""
@@ -53,10 +57,62 @@ class LedgerBalanceResponse(BaseModel):
     last_updated: datetime.datetime
 
 
+class LedgerBalancesRequest(BaseModel):
+    """Request model for looking up the balances of several owners."""
+    owner_ids: List[str] = Field(..., min_length=1, max_length=MAX_BALANCE_LOOKUP_SIZE)
+
+
+class LedgerBatchCreate(BaseModel, Generic[TLedgerOperation]):
+    """Model for creating many ledger entries in one request."""
+    entries: List[LedgerEntryCreate[TLedgerOperation]] = Field(
+        ..., min_length=1, max_length=MAX_LEDGER_BATCH_SIZE
+    )
+
+
+class LedgerBatchItemResult(BaseModel, Generic[TLedgerOperation]):
+    """Result of a single entry in a batch request."""
+    model_config = ConfigDict(from_attributes=True)
+
+    index: int
+    nonce: str
+    status: LedgerEntryStatus
+    entry: Optional[LedgerEntryRead[TLedgerOperation]] = None
+    detail: Optional[str] = None
+
+
+class LedgerBatchResponse(BaseModel, Generic[TLedgerOperation]):
+    """Response model for batch requests, with one result per submitted entry."""
+    created: int
+    rejected: int
+    results: List[LedgerBatchItemResult[TLedgerOperation]]
+
+
+class LedgerHistoryItem(BaseModel, Generic[TLedgerOperation]):
+    """A ledger entry in an owner's history; the owner is given once by the page."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    operation: TLedgerOperation
+    amount: int
+    nonce: str
+    created_on: datetime.datetime
+
+
+class LedgerEntryPage(BaseModel, Generic[TLedgerOperation]):
+    """One page of an owner's ledger history, newest first."""
+    owner_id: str
+    entries: List[LedgerHistoryItem[TLedgerOperation]]
+    next_cursor: Optional[int] = None
+
+
+@lru_cache(maxsize=None)
 def create_ledger_schemas(operation_enum: type[BaseLedgerOperation]):
     """
     Factory function to create concrete Pydantic schema classes for a specific app.
 
+    The classes are created once per enum, so the ledger service validates
+    into the same classes the app's routes declare.
+
     Args:
         operation_enum: The enum class to use for operations
 
@@ -70,4 +126,47 @@ def create_ledger_schemas(operation_enum: type[BaseLedgerOperation]):
     class ConcreteLedgerEntryRead(LedgerEntryRead[operation_enum]):
         pass
 
-    return ConcreteLedgerEntryCreate, ConcreteLedgerEntryRead
\ No newline at end of file
+    return ConcreteLedgerEntryCreate, ConcreteLedgerEntryRead
+
+
+@lru_cache(maxsize=None)
+def create_ledger_batch_schemas(operation_enum: type[BaseLedgerOperation]):
+    """
+    Factory function to create concrete batch Pydantic schema classes for a specific app.
+
+    The classes are created once per enum.
+
+    Args:
+        operation_enum: The enum class to use for operations
+
+    Returns:
+        Tuple of (LedgerBatchCreate, LedgerBatchResponse) classes
+    """
+
+    class ConcreteLedgerBatchCreate(LedgerBatchCreate[operation_enum]):
+        pass
+
+    class ConcreteLedgerBatchResponse(LedgerBatchResponse[operation_enum]):
+        pass
+
+    return ConcreteLedgerBatchCreate, ConcreteLedgerBatchResponse
+
+
+@lru_cache(maxsize=None)
+def create_ledger_page_schema(operation_enum: type[BaseLedgerOperation]):
+    """
+    Factory function to create a concrete ledger history page schema for a specific app.
+
+    The class is created once per enum.
+
+    Args:
+        operation_enum: The enum class to use for operations
+
+    Returns:
+        The LedgerEntryPage class
+    """
+
+    class ConcreteLedgerEntryPage(LedgerEntryPage[operation_enum]):
+        pass
+
+    return ConcreteLedgerEntryPage
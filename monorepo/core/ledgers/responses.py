@@ -0,0 +1,52 @@
+"""
+JSON responses for ledger endpoints.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+
+def _dump_model(value: Any) -> Any:
+    """
+    Convert pydantic models nested in other content for orjson.
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class LedgerJSONResponse(JSONResponse):
+    """
+    JSON response for content the ledger service has already validated.
+
+    FastAPI dumps a returned model, validates the dump against the route's
+    response_model and encodes it again. Routes return this response instead,
+    so a model built by the service is serialized once, by pydantic-core.
+    Other content, such as lists of models, is encoded with orjson when it is
+    installed.
+    """
+
+    def render(self, content: Any) -> bytes:
+        """
+        Encode the response content.
+
+        Args:
+            content: A pydantic model or JSON-compatible content
+
+        Returns:
+            The encoded body
+        """
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode()
+        if orjson is not None:
+            return orjson.dumps(content, default=_dump_model)
+        return super().render(jsonable_encoder(content))
@@ -4,12 +4,21 @@ Core ledger schemas for shared functionality across all applications.
 from __future__ import annotations
 
 import enum
-from typing import Any, Dict, Set, Type, TypeVar, cast
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Set, Type, TypeVar, cast
+
+from monorepo.core.ledgers.config import LEDGER_OPERATION_CONFIG
+
+# Operation enums created so far, whose amount tables are swapped on reload
+_operation_enums: List[Type[BaseLedgerOperation]] = []
 
 
 class LedgerOperationMeta(enum.EnumMeta):
     """
     Custom metaclass for LedgerOperation to ensure required operations are present.
+
+    It also compiles each operation enum's amount table when the class is
+    created, so a missing amount fails at import time rather than per request.
     """
 
     def __new__(mcs, name: str, bases: tuple, namespace: dict) -> Type:
@@ -31,7 +40,12 @@ class LedgerOperationMeta(enum.EnumMeta):
                 f"Missing {', '.join(missing_operations)}"
             )
 
-        return super().__new__(mcs, name, bases, namespace)
+        # Operation name to amount; set after creation so that Enum does not
+        # take it for a member, and replaced as a whole when amounts are reloaded
+        cls = super().__new__(mcs, name, bases, namespace)
+        cls._amount_table = compile_amount_table(cls, LEDGER_OPERATION_CONFIG)
+        _operation_enums.append(cls)
+        return cls
 
 
 class BaseLedgerOperation(enum.Enum, metaclass=LedgerOperationMeta):
@@ -51,8 +65,7 @@ class BaseLedgerOperation(enum.Enum, metaclass=LedgerOperationMeta):
         Returns:
             The value associated with the operation
         """
-        from monorepo.core.ledgers.config import LEDGER_OPERATION_CONFIG
-        return LEDGER_OPERATION_CONFIG.get(operation_name, 0)
+        return cls._amount_table[operation_name]
 
     @classmethod
     def get_all_operations(cls) -> Set[str]:
@@ -72,7 +85,7 @@ class BaseLedgerOperation(enum.Enum, metaclass=LedgerOperationMeta):
         Returns:
             Integer amount associated with this operation
         """
-        return self.__class__.get_operation_value(self.name)
+        return self.__class__._amount_table[self._name_]
 
 
 class SharedLedgerOperation(enum.Enum):
@@ -84,4 +97,63 @@ class SharedLedgerOperation(enum.Enum):
     CREDIT_SPEND = "CREDIT_SPEND"
     CREDIT_ADD = "CREDIT_ADD"
 
+
+class LedgerEntryStatus(str, enum.Enum):
+    """
+    Outcome of writing a single ledger entry.
+    """
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    INSUFFICIENT_BALANCE = "insufficient_balance"
+
+
 TLedgerOperation = TypeVar('TLedgerOperation', bound=BaseLedgerOperation)
+
+
+def compile_amount_table(operation_enum: Type[BaseLedgerOperation], amounts: Mapping[str, int]) -> Mapping[str, int]:
+    """
+    Build the immutable amount table of an operation enum.
+
+    Args:
+        operation_enum: The operation enum
+        amounts: Amount per operation name; may contain operations of other enums
+
+    Returns:
+        A read-only mapping of the enum's operation names to their amounts
+
+    Raises:
+        TypeError: If an operation of the enum has no integer amount
+    """
+    missing = [name for name in operation_enum._member_names_ if name not in amounts]
+    if missing:
+        raise TypeError(
+            f"LedgerOperation class '{operation_enum.__name__}' has operations without a configured amount: "
+            f"{', '.join(missing)}"
+        )
+
+    table = {}
+    for name in operation_enum._member_names_:
+        amount = amounts[name]
+        if not isinstance(amount, int) or isinstance(amount, bool):
+            raise TypeError(f"Amount of ledger operation '{name}' must be an integer, got {amount!r}")
+        table[name] = amount
+    return MappingProxyType(table)
+
+
+def apply_operation_amounts(amounts: Mapping[str, int]) -> None:
+    """
+    Replace the amount tables of all operation enums.
+
+    Every table is compiled before any is swapped in, so an invalid config
+    leaves the current amounts untouched. The swap itself does not yield to
+    the event loop, so no request sees a mix of old and new amounts.
+
+    Args:
+        amounts: Amount per operation name, covering the operations of every enum
+
+    Raises:
+        TypeError: If an operation has no integer amount
+    """
+    tables = {operation_enum: compile_amount_table(operation_enum, amounts) for operation_enum in _operation_enums}
+    for operation_enum, table in tables.items():
+        operation_enum._amount_table = table
@@ -0,0 +1,203 @@
+"""
+In-process balance caches for the ledger service.
+"""
+from __future__ import annotations
+
+import datetime
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+class CachedBalance(NamedTuple):
+    """A cached owner balance."""
+    balance: int
+    updated_on: datetime.datetime
+
+
+class BalanceCache(ABC):
+    """
+    Interface for balance caches used by BaseLedgerService.
+
+    Loads are guarded by tokens: a reader takes a token before querying the
+    database and the value is only stored if the owner was not invalidated in
+    the meantime, so a slow read can never overwrite a newer write.
+    """
+
+    @abstractmethod
+    def get(self, owner_id: str) -> Optional[CachedBalance]:
+        """
+        Get the cached balance of an owner.
+
+        Args:
+            owner_id: ID of the owner
+
+        Returns:
+            The cached balance, or None on a miss
+        """
+
+    @abstractmethod
+    def token(self) -> int:
+        """
+        Get a token to pass to fill() after loading a balance from the database.
+
+        Returns:
+            An opaque load token
+        """
+
+    @abstractmethod
+    def fill(self, owner_id: str, balance: int, updated_on: datetime.datetime, token: int) -> None:
+        """
+        Store a balance loaded from the database.
+
+        Args:
+            owner_id: ID of the owner
+            balance: The loaded balance
+            updated_on: When the balance was loaded
+            token: Token taken before the load started
+        """
+
+    @abstractmethod
+    def invalidate(self, owner_id: str) -> None:
+        """
+        Drop the cached balance of an owner after it changed.
+
+        Args:
+            owner_id: ID of the owner
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Mapping of counter name to value
+        """
+
+
+class LRUBalanceCache(BalanceCache):
+    """
+    Bounded LRU balance cache with a time-to-live.
+
+    Each entry records the epoch at which it was written. Invalidation leaves a
+    tombstone with a new epoch, which makes fills started before it a no-op.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 2.0):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of owners kept in the cache
+            ttl: Seconds a cached balance stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, owner_id: str) -> Optional[CachedBalance]:
+        entry = self._entries.get(owner_id)
+        if entry is None or entry[0] is None or entry[2] < time.monotonic():
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(owner_id)
+        self.hits += 1
+        return entry[0]
+
+    def token(self) -> int:
+        return self._epoch
+
+    def fill(self, owner_id: str, balance: int, updated_on: datetime.datetime, token: int) -> None:
+        entry = self._entries.get(owner_id)
+        if entry is not None and entry[1] > token:
+            return
+
+        self._store(owner_id, CachedBalance(balance, updated_on), time.monotonic() + self.ttl)
+
+    def invalidate(self, owner_id: str) -> None:
+        self.invalidations += 1
+        self._store(owner_id, None, 0.0)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
+
+    def _store(self, owner_id: str, value: Optional[CachedBalance], expires_at: float) -> None:
+        """
+        Write an entry or tombstone at a new epoch and evict the least recently used owners.
+        """
+        self._epoch += 1
+        self._entries[owner_id] = (value, self._epoch, expires_at)
+        self._entries.move_to_end(owner_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class BalanceCacheListener:
+    """
+    Invalidates a balance cache from Postgres notifications.
+
+    Ledger writes send the owner ID with pg_notify on the configured channel
+    when they commit. The listener keeps one dedicated connection that LISTENs
+    on the channel, so writes from other workers invalidate this worker's cache.
+    """
+
+    def __init__(self, cache: BalanceCache, channel: str):
+        """
+        Initialize the listener.
+
+        Args:
+            cache: The cache to invalidate
+            channel: Postgres notification channel
+        """
+        self.cache = cache
+        self.channel = channel
+        self._connection: Optional[AsyncConnection] = None
+        self._driver_connection: Any = None
+
+    async def start(self, engine: AsyncEngine) -> None:
+        """
+        Open the listening connection.
+
+        Args:
+            engine: Engine of the application database
+        """
+        self._connection = await engine.connect()
+        raw_connection = await self._connection.get_raw_connection()
+        self._driver_connection = raw_connection.driver_connection
+        await self._driver_connection.add_listener(self.channel, self._on_notification)
+        logger.info("Listening for balance invalidations on channel %s", self.channel)
+
+    async def stop(self) -> None:
+        """
+        Stop listening and release the connection.
+        """
+        if self._connection is None:
+            return
+
+        await self._driver_connection.remove_listener(self.channel, self._on_notification)
+        await self._connection.close()
+        self._connection = None
+        self._driver_connection = None
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        self.cache.invalidate(payload)
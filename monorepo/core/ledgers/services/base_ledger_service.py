@@ -4,15 +4,48 @@ Base ledger service for shared functionality across all applications.
 from __future__ import annotations
 
 import datetime
-from typing import Generic, Optional, Type, TypeVar
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Generic, Iterable, List, Optional, Sequence, Type, TypeVar
 
 from fastapi import Depends, HTTPException, status
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
 from monorepo.core.db.ledger_repository import LedgerRepository
-from monorepo.core.db.models import BaseLedgerEntry
-from monorepo.core.ledgers.schemas import BaseLedgerOperation, TLedgerOperation
-from monorepo.core.ledgers.pydantic_schemas import LedgerBalanceResponse, LedgerEntryRead
+from monorepo.core.db.models import (
+    BaseLedgerArchivedNonce,
+    BaseLedgerCheckpoint,
+    BaseLedgerEntry,
+    BaseLedgerNonce,
+    BaseLedgerOutbox,
+    BaseLedgerOutboxCursor,
+    BaseOwnerBalance
+)
+from monorepo.core.db.nonce_filter import BloomNonceFilter
+from monorepo.core.ledgers.config import LedgerWriteMode
+from monorepo.core.ledgers.export import DEFAULT_EXPORT_FETCH_SIZE, ExportFormat, encode_header, encode_rows
+from monorepo.core.ledgers.services.balance_cache import BalanceCache
+from monorepo.core.ledgers.services.group_commit import GroupCommitWriter
+from monorepo.core.ledgers.services.owner_locks import OwnerLockTable
+from monorepo.core.ledgers.services.result_cache import RecentResultCache
+from monorepo.core.ledgers.schemas import BaseLedgerOperation, LedgerEntryStatus, TLedgerOperation
+from monorepo.core.ledgers.pydantic_schemas import (
+    LedgerBalanceResponse,
+    LedgerBatchResponse,
+    LedgerEntryCreate,
+    LedgerEntryPage,
+    LedgerEntryRead,
+    create_ledger_batch_schemas,
+    create_ledger_page_schema,
+    create_ledger_schemas
+)
+
+# Error details reported for rejected entries, shared by single and batch writes
+REJECTION_DETAILS = {
+    LedgerEntryStatus.DUPLICATE: "Duplicate transaction detected",
+    LedgerEntryStatus.INSUFFICIENT_BALANCE: "Insufficient balance for this operation",
+}
 
 # Define type variables before using them
 TLedgerEntry = TypeVar('TLedgerEntry', bound=BaseLedgerEntry)
@@ -21,16 +54,58 @@ TLedgerEntry = TypeVar('TLedgerEntry', bound=BaseLedgerEntry)
 class BaseLedgerService(Generic[TLedgerEntry, TLedgerOperation]):
     """
     Base ledger service with shared functionality.
+
+    Responses are validated once, straight from the database rows, into the
+    schema classes below; concrete services use the classes of their app.
+
+    In idempotent replay mode, a write repeating the nonce of an earlier
+    write by the same owner with the same operation returns the original
+    entry instead of a duplicate rejection, so a client retrying after a
+    timeout learns that its write succeeded. Replays are served from the
+    recent result cache when it holds the nonce, else from one fetch of the
+    entry. A repeated nonce with another owner or operation is still
+    rejected as a duplicate.
     """
+    read_schema: Type[LedgerEntryRead] = LedgerEntryRead
+    page_schema: Type[LedgerEntryPage] = LedgerEntryPage
+    batch_response_schema: Type[LedgerBatchResponse] = LedgerBatchResponse
 
-    def __init__(self, repository: LedgerRepository[TLedgerEntry, TLedgerOperation]):
+    def __init__(
+            self,
+            repository: LedgerRepository[TLedgerEntry, TLedgerOperation],
+            write_mode: LedgerWriteMode = LedgerWriteMode.CHECKED,
+            balance_cache: Optional[BalanceCache] = None,
+            owner_locking: bool = False,
+            group_commit: Optional[GroupCommitWriter] = None,
+            operation_enum: Optional[Type[BaseLedgerOperation]] = None,
+            idempotent_replay: bool = False,
+            result_cache: Optional[RecentResultCache] = None
+    ):
         """
         Initialize the service.
 
         Args:
             repository: The ledger repository
+            write_mode: How ledger entries are written
+            balance_cache: Optional cache for balance reads, invalidated by every write
+            owner_locking: Serialize spending writes per owner, in process and across workers
+            group_commit: Optional writer that commits concurrent single entries together
+            operation_enum: Operations of the app, used to prepare the insert statements
+            idempotent_replay: Return the original entry for a repeated nonce
+            result_cache: Optional cache of recent results serving replays
         """
         self.repository = repository
+        self.write_mode = write_mode
+        self.balance_cache = balance_cache
+        self.owner_locks = OwnerLockTable() if owner_locking else None
+        self.group_commit = group_commit
+        self.operation_enum = operation_enum
+        self.idempotent_replay = idempotent_replay
+        self.result_cache = result_cache if idempotent_replay else None
+        # Outcomes of the entries written by this service, single and batched
+        self.entry_outcomes: Counter = Counter()
+        # Single writes answered with the entry of an earlier write
+        self.replayed = 0
 
     async def add_ledger_entry(
             self,
@@ -42,6 +117,60 @@ class BaseLedgerService(Generic[TLedgerEntry, TLedgerOperation]):
         """
         Add a new ledger entry.
 
+        Args:
+            db: Database session
+            owner_id: ID of the owner
+            operation: The ledger operation
+            nonce: Unique identifier to prevent duplicate transactions
+
+        Returns:
+            The created ledger entry, or in idempotent replay mode the entry
+            of an earlier write with the same nonce, owner and operation
+
+        Raises:
+            HTTPException: If insufficient balance or duplicate nonce
+        """
+        # Retries of recent writes are answered without touching the database
+        if self.result_cache is not None:
+            cached = self.result_cache.get(nonce)
+            if cached is not None:
+                if cached.owner_id != owner_id or cached.operation != operation:
+                    raise self._rejection(LedgerEntryStatus.DUPLICATE)
+                self.replayed += 1
+                return cached
+
+        # Group commits lock the balance rows of their owners, so they need no owner lock
+        if self.group_commit is not None:
+            entry_status, row = await self.group_commit.submit(owner_id, operation, nonce)
+            if entry_status == LedgerEntryStatus.DUPLICATE:
+                return await self._duplicate(db, owner_id, operation, nonce)
+            return self._entry_result(entry_status, row)
+
+        # Entries that do not spend cannot overdraw, so they never wait for a lock
+        if self.owner_locks is None or operation.value_amount >= 0:
+            return await self._write_ledger_entry(db, owner_id, operation, nonce)
+
+        # Same-owner requests queue here without holding a database connection;
+        # the advisory lock then serializes them against the other workers
+        async with self.owner_locks.hold(owner_id):
+            try:
+                await self.repository.lock_owner(db, owner_id)
+                return await self._write_ledger_entry(db, owner_id, operation, nonce)
+            except BaseException:
+                # Release the advisory lock before the next local waiter proceeds
+                await db.rollback()
+                raise
+
+    async def _write_ledger_entry(
+            self,
+            db: AsyncSession,
+            owner_id: str,
+            operation: TLedgerOperation,
+            nonce: str
+    ) -> LedgerEntryRead:
+        """
+        Write a ledger entry with the configured write mode.
+
         Args:
             db: Database session
             owner_id: ID of the owner
@@ -54,60 +183,457 @@ class BaseLedgerService(Generic[TLedgerEntry, TLedgerOperation]):
         Raises:
             HTTPException: If insufficient balance or duplicate nonce
         """
+        if self.write_mode == LedgerWriteMode.ATOMIC:
+            return await self._add_ledger_entry_atomic(db, owner_id, operation, nonce)
+
         # Check for duplicate transaction
         if await self.repository.check_nonce_exists(db, nonce):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Duplicate transaction detected"
-            )
+            return await self._duplicate(db, owner_id, operation, nonce)
 
         # Check for sufficient balance
         has_balance = await self.repository.has_sufficient_balance(db, owner_id, operation)
         if not has_balance:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Insufficient balance for this operation"
-            )
+            raise self._rejection(LedgerEntryStatus.INSUFFICIENT_BALANCE)
+
+        # Create entry; the nonce may have been stored concurrently since the check above
+        try:
+            entry = await self.repository.create_entry(db, owner_id, operation, nonce)
+        except ValueError:
+            return await self._duplicate(db, owner_id, operation, nonce)
+        return self._entry_created(entry)
+
+    async def _add_ledger_entry_atomic(
+            self,
+            db: AsyncSession,
+            owner_id: str,
+            operation: TLedgerOperation,
+            nonce: str
+    ) -> LedgerEntryRead:
+        """
+        Add a new ledger entry with a single atomic statement.
+
+        The nonce is only looked up again when the insert was rejected, to tell
+        a duplicate transaction apart from an insufficient balance. In
+        idempotent replay mode the owner's entry with the nonce is fetched
+        first, which answers a retry with one round trip.
+
+        Args:
+            db: Database session
+            owner_id: ID of the owner
+            operation: The ledger operation
+            nonce: Unique identifier to prevent duplicate transactions
+
+        Returns:
+            The created ledger entry
 
-        # Create entry
-        entry = await self.repository.create_entry(db, owner_id, operation, nonce)
-
-        # Convert to Pydantic model and return
-        return LedgerEntryRead(
-            id=entry.id,
-            operation=entry.operation,
-            amount=entry.amount,
-            nonce=entry.nonce,
-            owner_id=entry.owner_id,
-            created_on=entry.created_on
+        Raises:
+            HTTPException: If insufficient balance or duplicate nonce
+        """
+        entry = await self.repository.create_entry_atomic(db, owner_id, operation, nonce)
+
+        if entry is None:
+            if self.idempotent_replay:
+                original = await self._find_original(db, owner_id, operation, nonce)
+                if original is not None:
+                    return original
+            if operation.value_amount >= 0 or await self.repository.check_nonce_exists(
+                    db, nonce, use_nonce_filter=False
+            ):
+                raise self._rejection(LedgerEntryStatus.DUPLICATE)
+            raise self._rejection(LedgerEntryStatus.INSUFFICIENT_BALANCE)
+
+        return self._entry_created(entry)
+
+    def _entry_result(self, entry_status: LedgerEntryStatus, row: Optional[Row]) -> LedgerEntryRead:
+        """
+        Turn the outcome of a batched write into the response of a single write.
+
+        Args:
+            entry_status: Status of the entry
+            row: The created row, or None if the entry was rejected
+
+        Returns:
+            The created ledger entry
+
+        Raises:
+            HTTPException: If the entry was rejected
+        """
+        if row is None:
+            raise self._rejection(entry_status)
+
+        return self._entry_created(row)
+
+    def _entry_created(self, row: Any) -> LedgerEntryRead:
+        """
+        Count a created entry and build its response.
+
+        Args:
+            row: The created entry, as a model instance or row
+
+        Returns:
+            The created ledger entry
+        """
+        self.entry_outcomes[LedgerEntryStatus.CREATED] += 1
+        self._invalidate_balances([row.owner_id])
+        entry = self.read_schema.model_validate(row)
+        if self.result_cache is not None:
+            self.result_cache.put(entry)
+        return entry
+
+    async def _duplicate(
+            self,
+            db: AsyncSession,
+            owner_id: str,
+            operation: TLedgerOperation,
+            nonce: str
+    ) -> LedgerEntryRead:
+        """
+        Answer a write whose nonce is already stored.
+
+        Args:
+            db: Database session
+            owner_id: ID of the owner
+            operation: The ledger operation
+            nonce: The repeated nonce
+
+        Returns:
+            The original entry, in idempotent replay mode
+
+        Raises:
+            HTTPException: If the nonce was used for another owner or operation,
+                or replays are off
+        """
+        if self.idempotent_replay:
+            original = await self._find_original(db, owner_id, operation, nonce)
+            if original is not None:
+                return original
+        raise self._rejection(LedgerEntryStatus.DUPLICATE)
+
+    async def _find_original(
+            self,
+            db: AsyncSession,
+            owner_id: str,
+            operation: TLedgerOperation,
+            nonce: str
+    ) -> Optional[LedgerEntryRead]:
+        """
+        Fetch the entry an earlier write with the same nonce, owner and operation created.
+
+        Args:
+            db: Database session
+            owner_id: ID of the owner
+            operation: The ledger operation
+            nonce: The repeated nonce
+
+        Returns:
+            The original entry, or None if there is no matching entry
+        """
+        row = await self.repository.get_entry_by_nonce(db, owner_id, nonce)
+        # End the read transaction, which releases the owner's advisory lock
+        # before the next local waiter proceeds
+        await db.rollback()
+        if row is None or row.operation != operation:
+            return None
+
+        self.replayed += 1
+        entry = self.read_schema.model_validate(row)
+        if self.result_cache is not None:
+            self.result_cache.put(entry)
+        return entry
+
+    async def add_ledger_entries(
+            self,
+            db: AsyncSession,
+            entries: Sequence[LedgerEntryCreate]
+    ) -> LedgerBatchResponse:
+        """
+        Add many ledger entries in one transaction.
+
+        Rejected entries do not fail the batch; each entry gets its own result.
+
+        Args:
+            db: Database session
+            entries: The ledger entries to add, in the order they should be applied
+
+        Returns:
+            Per-entry results with created and rejected counts
+        """
+        outcomes = await self.repository.create_entries(
+            db,
+            [(entry.owner_id, entry.operation, entry.nonce) for entry in entries]
+        )
+        self.entry_outcomes.update(entry_status for entry_status, _ in outcomes)
+        self._invalidate_balances(
+            row.owner_id for _, row in outcomes if row is not None
+        )
+
+        results = [
+            {
+                "index": index,
+                "nonce": entry.nonce,
+                "status": entry_status,
+                "entry": row,
+                "detail": REJECTION_DETAILS[entry_status] if row is None else None
+            }
+            for index, (entry, (entry_status, row)) in enumerate(zip(entries, outcomes))
+        ]
+
+        created = sum(1 for entry_status, _ in outcomes if entry_status == LedgerEntryStatus.CREATED)
+        return self.batch_response_schema.model_validate(
+            {"created": created, "rejected": len(results) - created, "results": results}
         )
 
-    async def get_balance(self, db: AsyncSession, owner_id: str) -> LedgerBalanceResponse:
+    async def get_balance(self, db: AsyncSession, owner_id: str, use_cache: bool = True) -> LedgerBalanceResponse:
         """
         Get the current balance for an owner.
 
         Args:
             db: Database session
             owner_id: ID of the owner
+            use_cache: Serve the balance from the cache if it is there; the
+                balance read from the database is cached either way
 
         Returns:
             Current balance
         """
+        if self.balance_cache is None:
+            balance = await self.repository.get_owner_balance(db, owner_id)
+            return LedgerBalanceResponse(
+                owner_id=owner_id,
+                balance=balance,
+                last_updated=datetime.datetime.utcnow()
+            )
+
+        cached = self.balance_cache.get(owner_id) if use_cache else None
+        if cached is not None:
+            return LedgerBalanceResponse(
+                owner_id=owner_id,
+                balance=cached.balance,
+                last_updated=cached.updated_on
+            )
+
+        token = self.balance_cache.token()
         balance = await self.repository.get_owner_balance(db, owner_id)
+        last_updated = datetime.datetime.utcnow()
+        self.balance_cache.fill(owner_id, balance, last_updated, token)
 
         return LedgerBalanceResponse(
             owner_id=owner_id,
             balance=balance,
-            last_updated=datetime.datetime.utcnow()
+            last_updated=last_updated
+        )
+
+    async def get_entries(
+            self,
+            db: AsyncSession,
+            owner_id: str,
+            limit: int,
+            cursor: Optional[int] = None,
+            operations: Optional[Sequence[TLedgerOperation]] = None,
+            created_from: Optional[datetime.datetime] = None,
+            created_to: Optional[datetime.datetime] = None
+    ) -> LedgerEntryPage:
+        """
+        Get one page of an owner's ledger history, newest first.
+
+        Args:
+            db: Database session
+            owner_id: ID of the owner
+            limit: Maximum number of entries on the page
+            cursor: next_cursor of the previous page, or None for the first page
+            operations: Only include entries with one of these operations
+            created_from: Only include entries created at or after this time
+            created_to: Only include entries created before this time
+
+        Returns:
+            The page, with a cursor for the next page if there are more entries
+        """
+        # Fetch one extra row to know whether another page follows
+        rows = await self.repository.get_entries_page(
+            db,
+            owner_id,
+            limit + 1,
+            before_id=cursor,
+            operations=operations,
+            created_from=created_from,
+            created_to=created_to
+        )
+        page = rows[:limit]
+        return self.page_schema.model_validate({
+            "owner_id": owner_id,
+            "entries": page,
+            "next_cursor": page[-1].id if len(rows) > limit else None
+        })
+
+    async def export_entries(
+            self,
+            db: AsyncSession,
+            export_format: ExportFormat,
+            owner_id: Optional[str] = None,
+            operations: Optional[Sequence[TLedgerOperation]] = None,
+            created_from: Optional[datetime.datetime] = None,
+            created_to: Optional[datetime.datetime] = None,
+            fetch_size: int = DEFAULT_EXPORT_FETCH_SIZE
+    ) -> AsyncIterator[str]:
+        """
+        Export ledger entries in ID order as encoded text chunks.
+
+        Args:
+            db: Database session, kept busy until the export is consumed
+            export_format: The output format
+            owner_id: Only include entries of this owner
+            operations: Only include entries with one of these operations
+            created_from: Only include entries created at or after this time
+            created_to: Only include entries created before this time
+            fetch_size: Rows fetched from the database per round trip
+
+        Yields:
+            The header, then one chunk per fetched batch of entries
+        """
+        header = encode_header(export_format)
+        if header:
+            yield header
+
+        async for rows in self.repository.stream_entries(
+                db,
+                owner_id=owner_id,
+                operations=operations,
+                created_from=created_from,
+                created_to=created_to,
+                fetch_size=fetch_size
+        ):
+            yield encode_rows(rows, export_format)
+
+    async def get_balances(
+            self,
+            db: AsyncSession,
+            owner_ids: Sequence[str],
+            use_cache: bool = True
+    ) -> List[LedgerBalanceResponse]:
+        """
+        Get the current balances of several owners.
+
+        Cached balances are served from the cache; the others are loaded with
+        a single query.
+
+        Args:
+            db: Database session
+            owner_ids: IDs of the owners
+            use_cache: Serve balances from the cache if they are there
+
+        Returns:
+            One balance per distinct owner, in request order
+        """
+        owner_ids = list(dict.fromkeys(owner_ids))
+        responses = {}
+        missing = []
+        for owner_id in owner_ids:
+            cached = self.balance_cache.get(owner_id) if self.balance_cache is not None and use_cache else None
+            if cached is None:
+                missing.append(owner_id)
+                continue
+            responses[owner_id] = LedgerBalanceResponse(
+                owner_id=owner_id,
+                balance=cached.balance,
+                last_updated=cached.updated_on
+            )
+
+        if missing:
+            token = self.balance_cache.token() if self.balance_cache is not None else None
+            balances = await self.repository.get_owner_balances(db, missing)
+            last_updated = datetime.datetime.utcnow()
+            for owner_id in missing:
+                if self.balance_cache is not None:
+                    self.balance_cache.fill(owner_id, balances[owner_id], last_updated, token)
+                responses[owner_id] = LedgerBalanceResponse(
+                    owner_id=owner_id,
+                    balance=balances[owner_id],
+                    last_updated=last_updated
+                )
+
+        return [responses[owner_id] for owner_id in owner_ids]
+
+    def entry_stats(self) -> Dict[str, int]:
+        """
+        Get the outcome counters of the written entries.
+
+        Returns:
+            Mapping of entry status, or "replayed" for writes answered with an
+            earlier entry, to the number of entries with that outcome
+        """
+        outcomes = {entry_status.value: self.entry_outcomes[entry_status] for entry_status in LedgerEntryStatus}
+        outcomes["replayed"] = self.replayed
+        return outcomes
+
+    async def prepare_statements(self, db: AsyncSession) -> None:
+        """
+        Prepare the statements of the ledger endpoints on the session's connection.
+
+        The inserts are prepared for one credit and one spend of the app's
+        operations, which covers both variants of every write statement.
+
+        Args:
+            db: Database session of the primary
+        """
+        operations = []
+        if self.operation_enum is not None:
+            credit = next((operation for operation in self.operation_enum if operation.value_amount >= 0), None)
+            spend = next((operation for operation in self.operation_enum if operation.value_amount < 0), None)
+            operations = [operation for operation in (credit, spend) if operation is not None]
+        await self.repository.prepare_statements(db, operations)
+
+    def _rejection(self, entry_status: LedgerEntryStatus) -> HTTPException:
+        """
+        Count a rejected entry and build the error reported for it.
+
+        Args:
+            entry_status: Why the entry was rejected
+
+        Returns:
+            The exception to raise
+        """
+        self.entry_outcomes[entry_status] += 1
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=REJECTION_DETAILS[entry_status]
         )
 
+    def _invalidate_balances(self, owner_ids: Iterable[str]) -> None:
+        """
+        Drop cached balances of owners whose ledger changed.
+
+        Args:
+            owner_ids: IDs of the owners
+        """
+        if self.balance_cache is None:
+            return
+
+        for owner_id in set(owner_ids):
+            self.balance_cache.invalidate(owner_id)
+
 
 TLedgerEntry = TypeVar('TLedgerEntry', bound=BaseLedgerEntry)
 
 
 def create_ledger_service(
         model: Type[BaseLedgerEntry],
-        operation_enum: Type[BaseLedgerOperation]
+        operation_enum: Type[BaseLedgerOperation],
+        balance_model: Optional[Type[BaseOwnerBalance]] = None,
+        checkpoint_model: Optional[Type[BaseLedgerCheckpoint]] = None,
+        nonce_model: Optional[Type[BaseLedgerNonce]] = None,
+        outbox_model: Optional[Type[BaseLedgerOutbox]] = None,
+        outbox_cursor_model: Optional[Type[BaseLedgerOutboxCursor]] = None,
+        archived_nonce_model: Optional[Type[BaseLedgerArchivedNonce]] = None,
+        write_mode: LedgerWriteMode = LedgerWriteMode.CHECKED,
+        balance_cache: Optional[BalanceCache] = None,
+        notify_channel: Optional[str] = None,
+        nonce_filter: Optional[BloomNonceFilter] = None,
+        owner_locking: bool = False,
+        session_factory: Optional[sessionmaker] = None,
+        group_commit_max_batch_size: int = 0,
+        group_commit_max_delay: float = 0.002,
+        idempotent_replay: bool = False,
+        result_cache: Optional[RecentResultCache] = None
 ) -> Type[BaseLedgerService]:
     """
     Factory function to create a concrete ledger service for a specific application.
@@ -115,14 +641,71 @@ def create_ledger_service(
     Args:
         model: The SQLAlchemy model class
         operation_enum: The enum class for operations
+        balance_model: Optional materialized owner balance model
+        checkpoint_model: Optional ledger balance checkpoint model
+        nonce_model: Nonce registry model, required for partitioned ledger tables
+        outbox_model: Optional outbox model; every write then adds its entries to the outbox
+        outbox_cursor_model: Cursor model of the outbox relays
+        archived_nonce_model: Archived nonce model of a plain ledger table
+        write_mode: How ledger entries are written
+        balance_cache: Optional cache for balance reads
+        notify_channel: Optional Postgres channel for balance change notifications
+        nonce_filter: Optional in-memory nonce filter used to skip nonce lookups
+        owner_locking: Serialize spending writes per owner
+        session_factory: Session factory used by the group commit writer
+        group_commit_max_batch_size: Maximum entries per group commit; 0 disables group commit
+        group_commit_max_delay: Maximum seconds an entry waits for its group to fill
+        idempotent_replay: Return the original entry for a repeated nonce
+        result_cache: Optional cache of recent results serving replays
 
     Returns:
         A concrete ledger service class
+
+    Raises:
+        ValueError: If atomic writes are requested without a balance model, or
+            group commit without a session factory
     """
-    ledger_repository = LedgerRepository[model, operation_enum](model)
+    if write_mode == LedgerWriteMode.ATOMIC and balance_model is None:
+        raise ValueError("Atomic write mode requires a balance model")
+
+    ledger_repository = LedgerRepository[model, operation_enum](
+        model,
+        balance_model=balance_model,
+        checkpoint_model=checkpoint_model,
+        nonce_model=nonce_model,
+        outbox_model=outbox_model,
+        outbox_cursor_model=outbox_cursor_model,
+        archived_nonce_model=archived_nonce_model,
+        notify_channel=notify_channel,
+        nonce_filter=nonce_filter
+    )
+
+    group_commit = None
+    if group_commit_max_batch_size > 0:
+        if session_factory is None:
+            raise ValueError("Group commit requires a session factory")
+        group_commit = GroupCommitWriter(
+            session_factory,
+            ledger_repository,
+            max_batch_size=group_commit_max_batch_size,
+            max_delay=group_commit_max_delay
+        )
 
     class ConcreteLedgerService(BaseLedgerService[model, operation_enum]):
+        read_schema = create_ledger_schemas(operation_enum)[1]
+        page_schema = create_ledger_page_schema(operation_enum)
+        batch_response_schema = create_ledger_batch_schemas(operation_enum)[1]
+
         def __init__(self):
-            super().__init__(ledger_repository)
+            super().__init__(
+                ledger_repository,
+                write_mode=write_mode,
+                balance_cache=balance_cache,
+                owner_locking=owner_locking,
+                group_commit=group_commit,
+                operation_enum=operation_enum,
+                idempotent_replay=idempotent_replay,
+                result_cache=result_cache
+            )
 
     return ConcreteLedgerService
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+Background job that keeps ledger balance checkpoints up to date.
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from monorepo.core.db.ledger_repository import DEFAULT_CHECKPOINT_LAG, LedgerRepository
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointWorker:
+    """
+    Periodically folds new ledger entries into the balance checkpoints.
+
+    Every worker process may run one; the repository serializes concurrent
+    builders, so extra workers simply skip a round.
+    """
+
+    def __init__(
+            self,
+            session_factory: sessionmaker,
+            repository: LedgerRepository,
+            interval: float,
+            chunk_size: int = 100000,
+            lag: datetime.timedelta = DEFAULT_CHECKPOINT_LAG
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            session_factory: Factory for database sessions
+            repository: Ledger repository with a checkpoint model
+            interval: Seconds between two runs
+            chunk_size: Number of entry IDs folded per transaction
+            lag: Minimum age of the entries to fold
+        """
+        self.session_factory = session_factory
+        self.repository = repository
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.lag = lag
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Start running checkpoints in the background.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background task and wait for it to finish.
+        """
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> int:
+        """
+        Run one checkpoint round.
+
+        Returns:
+            Number of checkpoint rows written
+        """
+        db: AsyncSession
+        async with self.session_factory() as db:
+            return await self.repository.build_checkpoints(db, self.chunk_size, self.lag)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                written = await self.run_once()
+                if written:
+                    logger.info("Wrote %d ledger checkpoints", written)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ledger checkpoint run failed")
+            await asyncio.sleep(self.interval)
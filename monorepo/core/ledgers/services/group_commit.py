@@ -0,0 +1,187 @@
+"""
+Group commit of ledger writes: concurrent single-entry writes share one transaction.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import sessionmaker
+
+from monorepo.core.db.ledger_repository import LedgerRepository
+from monorepo.core.ledgers.schemas import BaseLedgerOperation, LedgerEntryStatus
+
+logger = logging.getLogger(__name__)
+
+_PendingEntry = Tuple[Tuple[str, BaseLedgerOperation, str], asyncio.Future]
+
+
+class GroupCommitWriter:
+    """
+    Coalesces concurrent ledger writes into batched transactions.
+
+    Submitted entries are queued and gathered until max_batch_size entries are
+    waiting or max_delay seconds have passed since the first one, then written
+    together with LedgerRepository.create_entries, which pays for one commit
+    and one WAL flush per batch instead of per entry. Every submitter gets the
+    outcome of its own entry, so a duplicate nonce or an insufficient balance
+    only rejects the offending entry.
+    """
+
+    def __init__(
+            self,
+            session_factory: sessionmaker,
+            repository: LedgerRepository,
+            max_batch_size: int = 500,
+            max_delay: float = 0.002,
+            max_concurrent_batches: int = 2
+    ):
+        """
+        Initialize the writer.
+
+        Args:
+            session_factory: Factory for the sessions the batches are written with
+            repository: The ledger repository
+            max_batch_size: Maximum number of entries written per transaction
+            max_delay: Maximum seconds the first entry of a batch waits for others
+            max_concurrent_batches: Number of batches that may be written at the same time
+        """
+        self.session_factory = session_factory
+        self.repository = repository
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_concurrent_batches = max_concurrent_batches
+        self.batches = 0
+        self.entries = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._full: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def submit(self, owner_id: str, operation: BaseLedgerOperation,
+                     nonce: str) -> Tuple[LedgerEntryStatus, Optional[Row]]:
+        """
+        Queue an entry and wait until the batch containing it is committed.
+
+        Args:
+            owner_id: ID of the owner
+            operation: The ledger operation
+            nonce: Unique identifier to prevent duplicate transactions
+
+        Returns:
+            The entry's status and, if it was created, its row
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(((owner_id, operation, nonce), future))
+        if self._queue.qsize() >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Get the writer counters.
+
+        Returns:
+            Mapping of metric name to value
+        """
+        return {
+            "batches": self.batches,
+            "entries": self.entries,
+            "average_batch_size": self.entries / self.batches if self.batches else 0.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    async def stop(self) -> None:
+        """
+        Stop collecting, write the entries still queued and wait for all batches.
+
+        The batch the collector is gathering when it is cancelled is written
+        before the entries left in the queue.
+        """
+        if self._collector is None:
+            return
+
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        self._collector = None
+
+        while not self._queue.empty():
+            await self._flush(self._drain())
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _ensure_started(self) -> None:
+        """
+        Start the collector task on first use, inside the running event loop.
+        """
+        if self._collector is not None:
+            return
+
+        self._queue = asyncio.Queue()
+        self._full = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._collector = asyncio.create_task(self._collect())
+
+    async def _collect(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._full.clear()
+
+                batch.extend(self._drain(self.max_batch_size - 1))
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                # The entries taken from the queue are no longer seen by stop()
+                await self._flush(batch)
+                raise
+
+            task = asyncio.create_task(self._write(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    def _drain(self, limit: Optional[int] = None) -> List[_PendingEntry]:
+        """
+        Take up to limit queued entries without waiting.
+        """
+        limit = self.max_batch_size if limit is None else limit
+        batch: List[_PendingEntry] = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _write(self, batch: List[_PendingEntry]) -> None:
+        try:
+            await self._flush(batch)
+        finally:
+            self._slots.release()
+
+    async def _flush(self, batch: List[_PendingEntry]) -> None:
+        """
+        Write one batch and resolve the futures of its submitters.
+        """
+        try:
+            async with self.session_factory() as db:
+                outcomes = await self.repository.create_entries(db, [entry for entry, _ in batch])
+        except Exception as exc:
+            logger.exception("Group commit of %d ledger entries failed", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.entries += len(batch)
+        for (_, future), outcome in zip(batch, outcomes):
+            if not future.done():
+                future.set_result(outcome)
@@ -0,0 +1,331 @@
+"""
+Relay publishing the ledger outbox as a change feed.
+
+Writes add their entries to the outbox table in their own transaction, so
+the outbox holds exactly the committed entries. The relay reads the outbox
+in batches, numbers the events from its durable cursor, hands them to a
+sink and then deletes the rows and advances the cursor in one transaction.
+
+Delivery is at least once: if the relay stops between publishing a batch
+and committing, the batch is published again. Consumers drop events whose
+entry_id they have already seen.
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+from sqlalchemy import String, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from monorepo.core.db.engine import STATEMENT_LABEL
+from monorepo.core.db.ledger_repository import LedgerRepository
+from monorepo.core.ledgers.config import OutboxSinkKind
+
+logger = logging.getLogger(__name__)
+
+# Name of the cursor of the relays run by the applications
+DEFAULT_RELAY_NAME = "default"
+
+
+class OutboxEvent(NamedTuple):
+    """A ledger entry published on the change feed."""
+    position: int
+    entry_id: int
+    owner_id: str
+    operation: str
+    amount: int
+    nonce: str
+    created_on: datetime.datetime
+
+    @classmethod
+    def from_row(cls, position: int, row: Row) -> OutboxEvent:
+        """
+        Build the event of an outbox row.
+
+        Args:
+            position: Position of the event on the feed
+            row: The outbox row
+
+        Returns:
+            The event
+        """
+        return cls(position, row.entry_id, row.owner_id, row.operation, row.amount, row.nonce, row.created_on)
+
+    def to_json(self) -> str:
+        """
+        Encode the event as one line of JSON.
+
+        Returns:
+            The JSON object of the event, without a trailing newline
+        """
+        return json.dumps({
+            "position": self.position,
+            "entry_id": self.entry_id,
+            "owner_id": self.owner_id,
+            "operation": self.operation,
+            "amount": self.amount,
+            "nonce": self.nonce,
+            "created_on": self.created_on.isoformat(),
+        }, separators=(",", ":"))
+
+
+class OutboxSink(ABC):
+    """
+    Interface for the destinations of the change feed.
+
+    publish() runs inside the relay's transaction, before the published rows
+    are deleted; it must raise if the events could not be delivered, which
+    rolls the batch back for the next round.
+    """
+
+    @abstractmethod
+    async def publish(self, db: AsyncSession, events: Sequence[OutboxEvent]) -> None:
+        """
+        Deliver a batch of events.
+
+        Args:
+            db: Session of the relay's transaction
+            events: Events in feed order
+        """
+
+    async def close(self) -> None:
+        """
+        Release the resources of the sink.
+        """
+
+
+class FileOutboxSink(OutboxSink):
+    """
+    Appends the events as NDJSON to a local file.
+
+    Every batch is synced to disk before the relay commits, so consumers
+    tailing the file see each event at least once, in feed order.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the sink.
+
+        Args:
+            path: Path of the NDJSON file, created if missing
+        """
+        self.path = path
+        self._file = None
+
+    async def publish(self, db: AsyncSession, events: Sequence[OutboxEvent]) -> None:
+        data = "".join(event.to_json() + "\n" for event in events).encode()
+        await asyncio.to_thread(self._write, data)
+
+    async def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, data: bytes) -> None:
+        """
+        Append data to the file and sync it to disk.
+        """
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+class NotifyOutboxSink(OutboxSink):
+    """
+    Sends every event with pg_notify on a Postgres channel.
+
+    The notifications are queued in the relay's transaction, so Postgres
+    delivers them exactly when the batch commits. Only sessions that are
+    listening at that moment receive them; consumers that must not miss
+    events while disconnected should use the file sink.
+    """
+
+    def __init__(self, channel: str):
+        """
+        Initialize the sink.
+
+        Args:
+            channel: Postgres notification channel
+        """
+        self.channel = channel
+
+    async def publish(self, db: AsyncSession, events: Sequence[OutboxEvent]) -> None:
+        payloads = func.unnest(
+            literal([event.to_json() for event in events], ARRAY(String))
+        ).table_valued("payload", with_ordinality="position").render_derived(name="payloads")
+        stmt = (
+            select(func.pg_notify(self.channel, payloads.c.payload))
+            .select_from(payloads)
+            .order_by(payloads.c.position)
+        )
+        await db.execute(stmt, execution_options={STATEMENT_LABEL: "notify"})
+
+
+def create_outbox_sink(kind: OutboxSinkKind, path: Optional[str] = None,
+                       channel: Optional[str] = None) -> OutboxSink:
+    """
+    Create the sink of a change feed.
+
+    Args:
+        kind: Kind of the sink
+        path: NDJSON file of a file sink
+        channel: Notification channel of a notify sink
+
+    Returns:
+        The sink
+
+    Raises:
+        ValueError: If the setting the sink needs is missing
+    """
+    if kind is OutboxSinkKind.FILE:
+        if not path:
+            raise ValueError("A file outbox sink requires a path")
+        return FileOutboxSink(path)
+    if not channel:
+        raise ValueError("A notify outbox sink requires a channel")
+    return NotifyOutboxSink(channel)
+
+
+class OutboxRelay:
+    """
+    Periodically drains the ledger outbox into a sink.
+
+    Every worker process may run one; relays sharing a cursor name take
+    turns through the cursor's row lock, so each batch is published by one
+    of them, and extra relays simply skip a round.
+    """
+
+    def __init__(
+            self,
+            session_factory: sessionmaker,
+            repository: LedgerRepository,
+            sink: OutboxSink,
+            name: str = DEFAULT_RELAY_NAME,
+            batch_size: int = 500,
+            interval: float = 1.0
+    ):
+        """
+        Initialize the relay.
+
+        Args:
+            session_factory: Factory for database sessions
+            repository: Ledger repository with outbox and outbox cursor models
+            sink: Destination of the events
+            name: Name of the durable cursor
+            batch_size: Maximum events per batch and transaction
+            interval: Seconds between two rounds once the outbox is drained
+        """
+        self.session_factory = session_factory
+        self.repository = repository
+        self.sink = sink
+        self.name = name
+        self.batch_size = batch_size
+        self.interval = interval
+        self.published = 0
+        self.batches = 0
+        self.failures = 0
+        self.position: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Start relaying in the background.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background task, wait for it to finish and close the sink.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sink.close()
+
+    async def run_once(self) -> int:
+        """
+        Publish batches until the outbox is drained or another relay holds the cursor.
+
+        Returns:
+            Number of events published
+        """
+        published = 0
+        while True:
+            count = await self._relay_batch()
+            published += count
+            if count < self.batch_size:
+                return published
+
+    async def _relay_batch(self) -> int:
+        """
+        Publish one batch in its own transaction.
+
+        Returns:
+            Number of events published
+        """
+        db: AsyncSession
+        async with self.session_factory() as db:
+            position = await self.repository.lock_outbox_cursor(db, self.name)
+            if position is None:
+                await db.rollback()
+                return 0
+
+            rows = await self.repository.get_outbox_batch(db, self.batch_size)
+            if not rows:
+                await db.rollback()
+                self.position = position
+                return 0
+
+            events = [OutboxEvent.from_row(position + index, row) for index, row in enumerate(rows, start=1)]
+            await self.sink.publish(db, events)
+            await self.repository.acknowledge_outbox(db, self.name, [row.id for row in rows], events[-1].position)
+            await db.commit()
+
+        self.published += len(events)
+        self.batches += 1
+        self.position = events[-1].position
+        return len(events)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                published = await self.run_once()
+                if published:
+                    logger.debug("Published %d ledger changes", published)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                logger.exception("Ledger outbox relay round failed")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the relay counters.
+
+        Returns:
+            Mapping of counter name to value; the position is that of the
+            last event this relay published or saw published
+        """
+        return {
+            "published": self.published,
+            "batches": self.batches,
+            "failures": self.failures,
+            "position": self.position,
+        }
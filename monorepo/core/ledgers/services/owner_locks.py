@@ -0,0 +1,55 @@
+"""
+In-process per-owner locks for serializing ledger writes.
+"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+
+class _OwnerLock:
+    """A lock together with the number of tasks holding or waiting for it."""
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class OwnerLockTable:
+    """
+    Table of asyncio locks keyed by owner ID.
+
+    Locks are created on first use and dropped once no task holds or waits for
+    them, so the table only grows with the number of owners currently being
+    written. Keys are exact owner IDs rather than hash shards: everything runs
+    on one event loop, so the table needs no sharding, and different owners
+    never queue behind each other.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, _OwnerLock] = {}
+
+    @asynccontextmanager
+    async def hold(self, owner_id: str) -> AsyncIterator[None]:
+        """
+        Hold the lock of an owner for the duration of the block.
+
+        Args:
+            owner_id: ID of the owner
+        """
+        entry = self._locks.get(owner_id)
+        if entry is None:
+            entry = self._locks[owner_id] = _OwnerLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                del self._locks[owner_id]
+
+    def __len__(self) -> int:
+        return len(self._locks)
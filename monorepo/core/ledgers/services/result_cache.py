@@ -0,0 +1,79 @@
+"""
+In-process cache of recently written ledger entries, for idempotent replays.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from monorepo.core.ledgers.pydantic_schemas import LedgerEntryRead
+
+
+class RecentResultCache:
+    """
+    Bounded LRU cache of the results of recent writes, by nonce.
+
+    A client retrying a write after a timeout repeats its nonce within
+    seconds, so the last written entries answer most retries without a
+    database round trip. Written entries never change, so cached results
+    need no invalidation or time-to-live.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of results kept in the cache
+        """
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, LedgerEntryRead] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, nonce: str) -> Optional[LedgerEntryRead]:
+        """
+        Get the result of the write with a nonce.
+
+        Args:
+            nonce: Nonce of the write
+
+        Returns:
+            The written entry, or None on a miss
+        """
+        entry = self._entries.get(nonce)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(nonce)
+        self.hits += 1
+        return entry
+
+    def put(self, entry: LedgerEntryRead) -> None:
+        """
+        Store the result of a write and evict the least recently used results.
+
+        Args:
+            entry: The written entry
+        """
+        self._entries[entry.nonce] = entry
+        self._entries.move_to_end(entry.nonce)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Mapping of counter name to value
+        """
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,422 @@
+"""
+Prometheus metrics of ledger applications.
+
+Values are kept in plain counters of the worker process and only rendered
+in the Prometheus text format when /metrics is scraped, so recording one
+costs a dictionary lookup and a few additions. Every worker process keeps
+its own values; a scrape through a port shared by several workers reads
+one of them, so scrape the workers individually or run one per port when
+exact totals matter.
+
+Recorded metrics:
+
+- HTTP request latency and response counts per route template and status
+- SQL statement latency by kind: the ledger repository names the kind of
+  its statements with the STATEMENT_LABEL execution option, others are
+  named by their verb; session commits, flush included, count as "commit"
+- Connection pool checkout waits, timeouts and usage
+- Ledger entry outcomes: created, duplicate and insufficient balance
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import sessionmaker
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from monorepo.core.db.engine import observe_commits, pool_stats, statement_label
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from sub-millisecond queries to slow requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Route label of requests that matched no route, so unknown paths cannot grow the label set
+UNMATCHED_ROUTE = "unmatched"
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    """
+    Format a sample value or bucket bound for the text format.
+    """
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """
+    Escape a label value for the text format.
+    """
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric(ABC):
+    """
+    A named metric with labelled samples.
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize the metric.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels, in the order their values are passed
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        """
+        Get the current samples.
+
+        Yields:
+            Sample name, labels and value
+        """
+
+    def render(self) -> List[str]:
+        """
+        Render the metric in the text format.
+
+        Returns:
+            The HELP, TYPE and sample lines
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            if labels:
+                label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+        return lines
+
+    def _labels(self, values: Labels) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing count.
+    """
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        """
+        Increase the count.
+
+        Args:
+            labelvalues: Values of the labels
+            amount: Amount to add
+        """
+        self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        for labelvalues, value in self._values.items():
+            yield self.name, self._labels(labelvalues), value
+
+
+class Histogram(Metric):
+    """
+    Counts of observations in cumulative buckets, with their sum.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels, in the order their values are passed
+            buckets: Upper bounds of the buckets, in increasing order
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: observations per bucket (the last one above all bounds) and their sum
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: The observed value
+            labelvalues: Values of the labels
+        """
+        state = self._values.get(labelvalues)
+        if state is None:
+            state = self._values[labelvalues] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = state
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> Iterator[Sample]:
+        for labelvalues, (counts, total) in self._values.items():
+            labels = self._labels(labelvalues)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total[0]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class CallbackMetric(Metric):
+    """
+    A metric whose samples are read from a callback at scrape time.
+    """
+
+    def __init__(self, name: str, documentation: str, metric_type: str,
+                 callback: Callable[[], Iterable[Tuple[str, Labels, float]]], labelnames: Sequence[str] = ()):
+        """
+        Initialize the metric.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            metric_type: Prometheus type, such as counter, gauge or summary
+            callback: Returns the samples as sample name suffix, label values and value
+            labelnames: Names of the labels, in the order the callback returns their values
+        """
+        super().__init__(name, documentation, labelnames)
+        self.type = metric_type
+        self.callback = callback
+
+    def samples(self) -> Iterator[Sample]:
+        for suffix, labelvalues, value in self.callback():
+            yield f"{self.name}{suffix}", self._labels(labelvalues), value
+
+
+class MetricsRegistry:
+    """
+    The metrics exposed on one /metrics endpoint.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty registry.
+        """
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add a metric.
+
+        Args:
+            metric: The metric
+
+        Returns:
+            The metric
+
+        Raises:
+            ValueError: If a metric with the same name is registered
+        """
+        if any(registered.name == metric.name for registered in self.metrics):
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+
+        Returns:
+            The exposition text
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        lines.append("")
+        return "\n".join(lines)
+
+
+class LedgerMetrics:
+    """
+    Metrics of a ledger application, with the hooks that record them.
+    """
+
+    def __init__(self, namespace: str = "ledger"):
+        """
+        Initialize the metrics.
+
+        Args:
+            namespace: Prefix of the metric names
+        """
+        self.namespace = namespace
+        self.registry = MetricsRegistry()
+        self.request_duration = self.registry.register(Histogram(
+            f"{namespace}_http_request_duration_seconds",
+            "Time from receiving a request to sending the end of its response.",
+            ("method", "route")
+        ))
+        self.responses = self.registry.register(Counter(
+            f"{namespace}_http_responses_total",
+            "Responses sent, by route and status code.",
+            ("method", "route", "status")
+        ))
+        self.statement_duration = self.registry.register(Histogram(
+            f"{namespace}_db_statement_duration_seconds",
+            "Execution time of SQL statements and session commits, by kind.",
+            ("database", "statement")
+        ))
+        self._pools: Dict[str, AsyncEngine] = {}
+        self.registry.register(CallbackMetric(
+            f"{namespace}_db_pool_checkout_wait_seconds",
+            "Time spent checking out pool connections, including opening new ones.",
+            "summary",
+            lambda: self._pool_samples(("_sum", "wait_seconds_total"), ("_count", "checkouts")),
+            ("database",)
+        ))
+        self.registry.register(CallbackMetric(
+            f"{namespace}_db_pool_checkout_timeouts_total",
+            "Checkouts that timed out waiting for a pool connection.",
+            "counter",
+            lambda: self._pool_samples(("", "timeouts"),),
+            ("database",)
+        ))
+        for stat, documentation in (
+                ("waiting", "Checkouts waiting for a pool connection."),
+                ("checked_out", "Pool connections in use."),
+                ("size", "Configured pool size.")
+        ):
+            self.registry.register(CallbackMetric(
+                f"{namespace}_db_pool_{stat}",
+                documentation,
+                "gauge",
+                lambda stat=stat: self._pool_samples(("", stat),),
+                ("database",)
+            ))
+
+    def instrument_engine(self, engine: AsyncEngine, database: str = "primary") -> None:
+        """
+        Time the statements of an engine and report its pool.
+
+        Args:
+            engine: The engine
+            database: Value of the database label, such as "primary" or "replica0"
+        """
+        self._pools[database] = engine
+
+        def before_cursor_execute(conn: Connection, cursor, statement: str, parameters, context: ExecutionContext,
+                                  executemany: bool) -> None:
+            context._metrics_start = time.perf_counter()
+
+        def after_cursor_execute(conn: Connection, cursor, statement: str, parameters, context: ExecutionContext,
+                                 executemany: bool) -> None:
+            self.statement_duration.observe(
+                time.perf_counter() - context._metrics_start, database, statement_label(context)
+            )
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+
+    def instrument_sessions(self, session_factory: sessionmaker, database: str = "primary") -> None:
+        """
+        Time the commits of the sessions a factory creates.
+
+        Args:
+            session_factory: Session factory of AsyncSession instances
+            database: Value of the database label
+        """
+        observe_commits(
+            session_factory,
+            lambda duration: self.statement_duration.observe(duration, database, "commit")
+        )
+
+    def track_entries(self, entry_stats: Callable[[], Dict[str, int]]) -> None:
+        """
+        Report the outcomes of the written ledger entries.
+
+        Args:
+            entry_stats: Returns the number of entries per outcome, such as a
+                ledger service's entry_stats
+        """
+        self.registry.register(CallbackMetric(
+            f"{self.namespace}_entries_total",
+            "Ledger entries written, by outcome: created, duplicate, insufficient_balance or replayed.",
+            "counter",
+            lambda: (("", (outcome,), count) for outcome, count in entry_stats().items()),
+            ("outcome",)
+        ))
+
+    def _pool_samples(self, *fields: Tuple[str, str]) -> Iterator[Tuple[str, Labels, float]]:
+        """
+        Read pool statistics of the instrumented engines.
+
+        Args:
+            fields: Sample name suffix and pool_stats key of each sample
+
+        Yields:
+            Sample name suffix, label values and value
+        """
+        for database, engine in self._pools.items():
+            stats = pool_stats(engine)
+            for suffix, key in fields:
+                if key in stats:
+                    yield suffix, (database,), stats[key]
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency and status of every HTTP request.
+
+    Requests are labelled with the template of the matched route, such as
+    /ledger/{owner_id}, so owner IDs do not end up in label values.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: LedgerMetrics):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped application
+            metrics: Metrics to record into
+        """
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code: Optional[int] = None
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            self.metrics.request_duration.observe(time.perf_counter() - start, method, route_path)
+            self.metrics.responses.inc(method, route_path, str(status_code or 500))
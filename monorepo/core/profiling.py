@@ -0,0 +1,313 @@
+"""
+Opt-in per-request SQL profiling.
+
+Every statement a request runs is counted and timed through SQLAlchemy's
+cursor events, and commits through session events. The totals per
+statement kind are sent in a Server-Timing header, which browser dev tools
+and most HTTP clients display. Requests slower than a threshold are logged
+with their statement breakdown and with the statements they ran more than
+once, which points at redundant round trips.
+
+SELECT statements slower than a second threshold are run again in the
+background with EXPLAIN (ANALYZE, BUFFERS), in a transaction that is rolled
+back, and the plan is logged. Other statements are never explained, since
+EXPLAIN ANALYZE executes them; nor are SELECT ... FOR UPDATE statements,
+which would lock live rows. Only one EXPLAIN runs at a time per process.
+
+Statements run by background tasks, such as the group commit writer, are
+not attributed to requests.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import sessionmaker
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from monorepo.core.db.engine import STATEMENT_LABEL, observe_commits, statement_label
+
+logger = logging.getLogger(__name__)
+
+# Limits of a background EXPLAIN, so it cannot hold locks or a connection for long
+EXPLAIN_STATEMENT_TIMEOUT_MS = 5000
+EXPLAIN_LOCK_TIMEOUT_MS = 100
+
+# Number of repeated statements listed in a slow request log line
+MAX_REPEATED_STATEMENTS = 5
+
+
+class StatementTiming(NamedTuple):
+    """A statement run by a request."""
+    label: str
+    statement: str
+    duration: float
+
+
+class RequestProfile:
+    """
+    The statements run by one request.
+    """
+
+    def __init__(self):
+        """
+        Start the profile of the current request.
+        """
+        self.start = time.perf_counter()
+        # Statements of other tasks started by the request are not its own
+        self.task = asyncio.current_task()
+        self.statements: List[StatementTiming] = []
+
+    def record(self, label: str, statement: str, duration: float) -> None:
+        """
+        Record a statement if it runs in the request's task.
+
+        Args:
+            label: Kind of the statement
+            statement: SQL text of the statement
+            duration: Seconds the statement took
+        """
+        if asyncio.current_task() is self.task:
+            self.statements.append(StatementTiming(label, statement, duration))
+
+    def breakdown(self) -> Dict[str, Tuple[int, float]]:
+        """
+        Sum up the statements by kind.
+
+        Returns:
+            Number of statements and their total seconds, by kind, in order of first use
+        """
+        totals: Dict[str, Tuple[int, float]] = {}
+        for timing in self.statements:
+            count, duration = totals.get(timing.label, (0, 0.0))
+            totals[timing.label] = (count + 1, duration + timing.duration)
+        return totals
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        """
+        Find statements the request ran more than once.
+
+        Commits are not statements of their own and are left out.
+
+        Returns:
+            SQL text and number of runs of each repeated statement, most frequent first
+        """
+        counts = Counter(timing.statement for timing in self.statements if timing.label != "commit")
+        return [(statement, count) for statement, count in counts.most_common() if count > 1]
+
+    def server_timing(self) -> str:
+        """
+        Build the Server-Timing header value of the profile so far.
+
+        Returns:
+            Entries for the database total, each statement kind and the elapsed request time
+        """
+        breakdown = self.breakdown()
+        database = sum(duration for _, duration in breakdown.values())
+        entries = [f'db;dur={database * 1000:.1f};desc="{len(self.statements)} statements"']
+        entries.extend(
+            f'{label};dur={duration * 1000:.1f};desc="{count}x"' for label, (count, duration) in breakdown.items()
+        )
+        entries.append(f"app;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+# Profile of the request the current task serves
+_current_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+class QueryProfiler:
+    """
+    Collects the statements of each request and reports slow requests and statements.
+    """
+
+    def __init__(self, slow_request_threshold: float, explain_threshold: Optional[float] = None,
+                 server_timing: bool = True):
+        """
+        Initialize the profiler.
+
+        Args:
+            slow_request_threshold: Seconds above which a request is logged with its statements
+            explain_threshold: Seconds above which a SELECT is explained; None disables EXPLAIN
+            server_timing: Add a Server-Timing header to every response
+        """
+        self.slow_request_threshold = slow_request_threshold
+        self.explain_threshold = explain_threshold
+        self.server_timing = server_timing
+        self._explaining = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    def instrument_engine(self, engine: AsyncEngine) -> None:
+        """
+        Profile the statements of an engine.
+
+        Args:
+            engine: The engine
+        """
+        def before_cursor_execute(conn: Connection, cursor, statement: str, parameters, context: ExecutionContext,
+                                  executemany: bool) -> None:
+            if _current_profile.get() is not None:
+                context._profile_start = time.perf_counter()
+
+        def after_cursor_execute(conn: Connection, cursor, statement: str, parameters, context: ExecutionContext,
+                                 executemany: bool) -> None:
+            profile = _current_profile.get()
+            if profile is None:
+                return
+
+            duration = time.perf_counter() - context._profile_start
+            profile.record(statement_label(context), statement, duration)
+            if (self.explain_threshold is not None and duration >= self.explain_threshold
+                    and not executemany and self._explainable(statement)):
+                self._start_explain(engine, statement, parameters, duration)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+
+    def instrument_sessions(self, session_factory: sessionmaker) -> None:
+        """
+        Profile the commits of the sessions a factory creates.
+
+        Args:
+            session_factory: Session factory of AsyncSession instances
+        """
+        def record_commit(duration: float) -> None:
+            profile = _current_profile.get()
+            if profile is not None:
+                profile.record("commit", "COMMIT", duration)
+
+        observe_commits(session_factory, record_commit)
+
+    def start_request(self) -> Tuple[RequestProfile, contextvars.Token]:
+        """
+        Start profiling the request of the current task.
+
+        Returns:
+            The profile, and the token that resets the profile of the task
+        """
+        profile = RequestProfile()
+        return profile, _current_profile.set(profile)
+
+    def finish_request(self, profile: RequestProfile, token: contextvars.Token, method: str, path: str,
+                       status_code: Optional[int]) -> None:
+        """
+        Stop profiling a request and log it if it was slow.
+
+        Args:
+            profile: Profile of the request
+            token: Token returned by start_request
+            method: HTTP method of the request
+            path: Path of the request
+            status_code: Status code of the response, if one was sent
+        """
+        _current_profile.reset(token)
+        elapsed = time.perf_counter() - profile.start
+        if elapsed < self.slow_request_threshold:
+            return
+
+        breakdown = ", ".join(
+            f"{label} {count}x {duration * 1000:.1f} ms" for label, (count, duration) in profile.breakdown().items()
+        )
+        message = (
+            f"Slow request {method} {path} -> {status_code}: {elapsed * 1000:.1f} ms, "
+            f"{len(profile.statements)} statements ({breakdown or 'none'})"
+        )
+        repeated = profile.repeated()
+        if repeated:
+            message += "; repeated: " + "; ".join(
+                f"{count}x {' '.join(statement.split())}" for statement, count in repeated[:MAX_REPEATED_STATEMENTS]
+            )
+        logger.warning(message)
+
+    @staticmethod
+    def _explainable(statement: str) -> bool:
+        """
+        Check that a statement is a plain SELECT, which EXPLAIN ANALYZE can run without side effects.
+        """
+        normalized = statement.lstrip().upper()
+        return normalized.startswith("SELECT") and "FOR UPDATE" not in normalized
+
+    def _start_explain(self, engine: AsyncEngine, statement: str, parameters: Any, duration: float) -> None:
+        """
+        Explain a statement in the background unless another EXPLAIN is running.
+        """
+        if self._explaining:
+            return
+        self._explaining = True
+        task = asyncio.get_running_loop().create_task(self._explain(engine, statement, parameters, duration))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, engine: AsyncEngine, statement: str, parameters: Any, duration: float) -> None:
+        """
+        Run a statement with EXPLAIN (ANALYZE, BUFFERS) in a rolled back transaction and log the plan.
+        """
+        # The task inherited the request's context; its statements are not the request's
+        _current_profile.set(None)
+        try:
+            async with engine.connect() as conn:
+                options = {STATEMENT_LABEL: "explain"}
+                await conn.exec_driver_sql(
+                    f"SET LOCAL statement_timeout = {EXPLAIN_STATEMENT_TIMEOUT_MS}", execution_options=options
+                )
+                await conn.exec_driver_sql(
+                    f"SET LOCAL lock_timeout = {EXPLAIN_LOCK_TIMEOUT_MS}", execution_options=options
+                )
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters, execution_options=options
+                )
+                plan = "\n".join(row[0] for row in result)
+                await conn.rollback()
+            logger.warning("Slow statement (%.1f ms): %s\n%s", duration * 1000, statement, plan)
+        except Exception:
+            logger.warning("Could not explain slow statement: %s", statement, exc_info=True)
+        finally:
+            self._explaining = False
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling the SQL statements of every HTTP request.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: QueryProfiler):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped application
+            profiler: Profiler whose engines the requests use
+        """
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile, token = self.profiler.start_request()
+        status_code: Optional[int] = None
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.profiler.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", profile.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self.profiler.finish_request(profile, token, scope["method"], scope["path"], status_code)
@@ -0,0 +1,69 @@
+"""
+Production launcher for ledger applications.
+
+Runs an application under uvicorn with several worker processes, each with
+its own event loop, connection pool and caches. uvloop and httptools are used
+when installed (pip install -e ".[server]"). A worker only accepts requests
+once the application's lifespan has warmed its connection pool. On SIGTERM or
+SIGINT the workers stop accepting connections, give in-flight requests up to
+SERVER_GRACEFUL_SHUTDOWN_TIMEOUT seconds and then run the lifespan shutdown.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from typing import List, Optional
+
+import uvicorn
+
+from monorepo.core.config import CoreSettings
+
+
+def build_parser(settings: CoreSettings, prog: Optional[str] = None) -> argparse.ArgumentParser:
+    """
+    Build the argument parser of the launcher; the defaults come from the settings.
+
+    Args:
+        settings: Settings of the application
+        prog: Program name shown in the help
+
+    Returns:
+        The parser
+    """
+    parser = argparse.ArgumentParser(prog=prog, description="Run the application with production settings")
+    parser.add_argument("--host", default=settings.SERVER_HOST, help="Address to bind")
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT, help="Port to bind")
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS,
+                        help="Worker processes; 0 starts one per CPU")
+    return parser
+
+
+def run_server(app: str, settings: CoreSettings, argv: Optional[List[str]] = None) -> None:
+    """
+    Serve an application until it is stopped.
+
+    Every worker opens up to DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW
+    connections per database, which the database must allow for all workers.
+
+    Args:
+        app: Import string of the ASGI application, such as "healthai.src.main:app"
+        settings: Settings of the application
+        argv: Command line arguments; defaults to sys.argv
+    """
+    args = build_parser(settings).parse_args(argv)
+    workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        # A failing startup, such as an unreachable database, stops the worker
+        lifespan="on",
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_TIMEOUT,
+        access_log=settings.SERVER_ACCESS_LOG
+    )
@@ -64,15 +64,23 @@ python setup_db.py
 cd ..
 print_success "TravelAI database setup complete"
 
-# Start applications
+# Start applications; ./run.sh --production runs multi-worker servers without reloading
 print_step "Starting applications..."
 cd healthai
-uvicorn src.main:app --reload --port 8000 &
+if [ "$1" == "--production" ]; then
+    python serve.py --port 8000 &
+else
+    uvicorn src.main:app --reload --port 8000 &
+fi
 HEALTHAI_PID=$!
 cd ..
 
 cd travelai
-uvicorn src.main:app --reload --port 8001 &
+if [ "$1" == "--production" ]; then
+    python serve.py --port 8001 &
+else
+    uvicorn src.main:app --reload --port 8001 &
+fi
 TRAVELAI_PID=$!
 cd ..
 
@@ -84,7 +92,9 @@ echo -e "\nPress Ctrl+C to stop all applications"
 # Handle cleanup on exit
 function cleanup() {
     print_step "Stopping applications..."
-    kill -9 $HEALTHAI_PID $TRAVELAI_PID 2>/dev/null || true
+    # SIGTERM lets the servers finish in-flight requests and stop their workers
+    kill -TERM $HEALTHAI_PID $TRAVELAI_PID 2>/dev/null || true
+    wait $HEALTHAI_PID $TRAVELAI_PID 2>/dev/null || true
     print_success "Applications stopped"
 }
 
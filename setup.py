@@ -3,7 +3,8 @@ from setuptools import setup, find_packages
 setup(
     name="shared-ledger-system",
     version="0.1.0",
-    packages=find_packages(include=['monorepo', 'monorepo.*', 'healthai', 'healthai.*', 'travelai', 'travelai.*']),
+    packages=find_packages(include=['monorepo', 'monorepo.*', 'healthai', 'healthai.*', 'travelai', 'travelai.*',
+                                    'ledger_host', 'ledger_host.*']),
     install_requires=[
         "fastapi>=0.100.0",
         "uvicorn>=0.23.0",
@@ -14,5 +15,13 @@ setup(
         "psycopg2-binary>=2.9.6",
         "python-dotenv>=1.0.0",
     ],
+    extras_require={
+        # Faster encoding of JSON responses that are not a single model
+        "orjson": ["orjson>=3.9.0"],
+        # Faster event loop and HTTP parser for the production server
+        "server": ["uvloop>=0.17.0; sys_platform != 'win32'", "httptools>=0.6.0"],
+        # Unit tests; async tests run on the anyio pytest plugin
+        "test": ["pytest>=7.0.0", "anyio>=3.7.0"],
+    },
     python_requires=">=3.10",
 )
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Shared fixtures of the unit tests.
+
+Tests of the ledger repository against Postgres use the database at
+TEST_DATABASE_URL, which is created if missing and whose tables are recreated
+for every test; they are skipped when the variable is not set.
+"""
+import os
+from typing import AsyncIterator, NamedTuple, Type
+
+import pytest
+from sqlalchemy import MetaData, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from monorepo.core.db.models import (
+    BaseLedgerArchivedNonce,
+    BaseLedgerCheckpoint,
+    BaseLedgerEntry,
+    BaseLedgerOutbox,
+    BaseLedgerOutboxCursor,
+    BaseOwnerBalance
+)
+from monorepo.core.ledgers.schemas import BaseLedgerOperation
+
+
+class SampleLedgerOperation(BaseLedgerOperation):
+    DAILY_REWARD = "DAILY_REWARD"
+    SIGNUP_CREDIT = "SIGNUP_CREDIT"
+    CREDIT_SPEND = "CREDIT_SPEND"
+    CREDIT_ADD = "CREDIT_ADD"
+
+
+class LedgerTables(NamedTuple):
+    """Operation enum and concrete models of the test ledger."""
+    operation: Type[BaseLedgerOperation]
+    entry: Type[BaseLedgerEntry]
+    balance: Type[BaseOwnerBalance]
+    checkpoint: Type[BaseLedgerCheckpoint]
+    archived_nonce: Type[BaseLedgerArchivedNonce]
+    outbox: Type[BaseLedgerOutbox]
+    outbox_cursor: Type[BaseLedgerOutboxCursor]
+
+
+# The test ledger has its own MetaData, like every application loaded into the host
+metadata = MetaData()
+
+LEDGER_TABLES = LedgerTables(
+    operation=SampleLedgerOperation,
+    entry=BaseLedgerEntry.create_concrete_model("SampleLedgerEntryModel", SampleLedgerOperation, metadata=metadata),
+    balance=BaseOwnerBalance.create_concrete_model("SampleOwnerBalanceModel", metadata),
+    checkpoint=BaseLedgerCheckpoint.create_concrete_model("SampleLedgerCheckpointModel", metadata),
+    archived_nonce=BaseLedgerArchivedNonce.create_concrete_model("SampleLedgerArchivedNonceModel", metadata),
+    outbox=BaseLedgerOutbox.create_concrete_model("SampleLedgerOutboxModel", metadata),
+    outbox_cursor=BaseLedgerOutboxCursor.create_concrete_model("SampleLedgerOutboxCursorModel", metadata),
+)
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    """Run the async tests on asyncio, the event loop the applications use."""
+    return "asyncio"
+
+
+@pytest.fixture
+def database_url() -> str:
+    """URL of the test database; skips the test when none is configured."""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return url
+
+
+@pytest.fixture
+def ledger_tables() -> LedgerTables:
+    """Operation enum and concrete models of the test ledger."""
+    return LEDGER_TABLES
+
+
+@pytest.fixture
+async def session_factory(database_url: str) -> AsyncIterator[sessionmaker]:
+    """Session factory of the test database, with empty ledger tables."""
+    url = make_url(database_url)
+    server = create_async_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    try:
+        async with server.connect() as conn:
+            found = await conn.scalar(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": url.database}
+            )
+            if not found:
+                await conn.exec_driver_sql(f'CREATE DATABASE "{url.database}"')
+    finally:
+        await server.dispose()
+
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.drop_all)
+        await conn.run_sync(metadata.create_all)
+    try:
+        yield sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,105 @@
+"""
+Tests of the archive segment files.
+"""
+import datetime
+import os
+
+import pytest
+
+from monorepo.core.db.archive import (
+    SEGMENT_SUFFIX,
+    ArchivedEntry,
+    SegmentWriter,
+    list_segments,
+    read_archive,
+    read_segment
+)
+
+CREATED_ON = datetime.datetime(2024, 1, 1, 12, 30, 15, 123456)
+
+
+def create_entries(first_id: int, last_id: int):
+    return [
+        ArchivedEntry(
+            entry_id,
+            f"owner-{entry_id % 3}",
+            "CREDIT_ADD",
+            entry_id * 10 - 25,
+            f"nonce-é-{entry_id}",
+            CREATED_ON + datetime.timedelta(seconds=entry_id)
+        )
+        for entry_id in range(first_id, last_id + 1)
+    ]
+
+
+def write_segment(directory: str, entries, block_size: int = 4) -> str:
+    writer = SegmentWriter(directory, "ledger_entries", block_size=block_size)
+    writer.write(entries)
+    return writer.close()
+
+
+def test_segment_round_trip(tmp_path):
+    entries = create_entries(1, 10)
+
+    path = write_segment(str(tmp_path), entries)
+
+    assert os.path.basename(path) == f"ledger_entries-000000000001-000000000010{SEGMENT_SUFFIX}"
+    assert list(read_segment(path)) == entries
+    assert list_segments(str(tmp_path)) == [path]
+
+
+def test_empty_segment_is_not_kept(tmp_path):
+    assert write_segment(str(tmp_path), []) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_aborted_segment_leaves_no_file(tmp_path):
+    writer = SegmentWriter(str(tmp_path), "ledger_entries")
+    writer.write(create_entries(1, 3))
+
+    writer.abort()
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_entries_must_be_in_id_order(tmp_path):
+    writer = SegmentWriter(str(tmp_path), "ledger_entries")
+    writer.write(create_entries(5, 5))
+
+    with pytest.raises(ValueError):
+        writer.write(create_entries(5, 5))
+    writer.abort()
+
+
+def test_file_without_magic_is_rejected(tmp_path):
+    path = tmp_path / f"ledger_entries-000000000001-000000000001{SEGMENT_SUFFIX}"
+    path.write_bytes(b"not a segment")
+
+    with pytest.raises(ValueError):
+        list(read_segment(str(path)))
+
+
+def test_overlapping_segments_are_merged(tmp_path):
+    directory = str(tmp_path)
+    write_segment(directory, create_entries(1, 10))
+    # A rerun after an interrupted deletion archives some entries again
+    write_segment(directory, create_entries(6, 15))
+    write_segment(directory, create_entries(20, 22))
+
+    entries = list(read_archive(directory))
+
+    assert entries == create_entries(1, 15) + create_entries(20, 22)
+
+
+def test_archive_is_filtered_by_owner(tmp_path):
+    directory = str(tmp_path)
+    write_segment(directory, create_entries(1, 10))
+    write_segment(directory, create_entries(8, 12))
+
+    entries = list(read_archive(directory, owner_id="owner-1"))
+
+    assert [entry.id for entry in entries] == [1, 4, 7, 10]
+
+
+def test_missing_directory_is_an_empty_archive(tmp_path):
+    assert list(read_archive(str(tmp_path / "missing"))) == []
@@ -0,0 +1,94 @@
+"""
+Tests of the in-process LRU balance cache.
+"""
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from monorepo.core.ledgers.services import balance_cache as balance_cache_module
+from monorepo.core.ledgers.services.balance_cache import CachedBalance, LRUBalanceCache
+
+UPDATED_ON = datetime.datetime(2024, 1, 1)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake_clock = FakeClock()
+    monkeypatch.setattr(balance_cache_module, "time", SimpleNamespace(monotonic=fake_clock))
+    return fake_clock
+
+
+def test_filled_balance_is_returned(clock):
+    cache = LRUBalanceCache(maxsize=10, ttl=2.0)
+    cache.fill("owner", 5, UPDATED_ON, cache.token())
+
+    assert cache.get("owner") == CachedBalance(5, UPDATED_ON)
+    assert cache.get("other") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_balance_expires_after_the_ttl(clock):
+    cache = LRUBalanceCache(maxsize=10, ttl=2.0)
+    cache.fill("owner", 5, UPDATED_ON, cache.token())
+
+    clock.now += 1.9
+    assert cache.get("owner") is not None
+    clock.now += 0.2
+    assert cache.get("owner") is None
+
+
+def test_invalidation_drops_the_balance(clock):
+    cache = LRUBalanceCache(maxsize=10, ttl=2.0)
+    cache.fill("owner", 5, UPDATED_ON, cache.token())
+
+    cache.invalidate("owner")
+
+    assert cache.get("owner") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_fill_started_before_an_invalidation_is_ignored(clock):
+    cache = LRUBalanceCache(maxsize=10, ttl=2.0)
+    token = cache.token()
+    cache.invalidate("owner")
+
+    cache.fill("owner", 5, UPDATED_ON, token)
+    assert cache.get("owner") is None
+
+    cache.fill("owner", 6, UPDATED_ON, cache.token())
+    assert cache.get("owner") == CachedBalance(6, UPDATED_ON)
+
+
+def test_invalidation_of_another_owner_keeps_fills_valid(clock):
+    cache = LRUBalanceCache(maxsize=10, ttl=2.0)
+    token = cache.token()
+    cache.invalidate("other")
+
+    cache.fill("owner", 5, UPDATED_ON, token)
+
+    assert cache.get("owner") == CachedBalance(5, UPDATED_ON)
+
+
+def test_least_recently_used_owner_is_evicted(clock):
+    cache = LRUBalanceCache(maxsize=2, ttl=2.0)
+    cache.fill("a", 1, UPDATED_ON, cache.token())
+    cache.fill("b", 2, UPDATED_ON, cache.token())
+    cache.get("a")
+
+    cache.fill("c", 3, UPDATED_ON, cache.token())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,63 @@
+"""
+Tests of the encoding of ledger exports.
+"""
+import csv
+import datetime
+import io
+import json
+
+from monorepo.core.db.archive import ArchivedEntry
+from monorepo.core.ledgers.export import EXPORT_COLUMNS, ExportFormat, encode_header, encode_rows
+from monorepo.core.ledgers.schemas import SharedLedgerOperation
+
+CREATED_ON = datetime.datetime(2024, 1, 1, 12, 30, 15, 123456)
+
+ROWS = [
+    ArchivedEntry(1, "owner", SharedLedgerOperation.CREDIT_ADD, 10, "n1", CREATED_ON),
+    ArchivedEntry(2, 'owner, "quoted"', "CREDIT_SPEND", -1, "n2\nline", CREATED_ON),
+]
+
+
+def test_ndjson_has_no_header():
+    assert encode_header(ExportFormat.NDJSON) == ""
+
+
+def test_ndjson_rows():
+    text = encode_rows(ROWS, ExportFormat.NDJSON)
+
+    lines = text.split("\n")
+    assert lines[-1] == ""
+    assert [json.loads(line) for line in lines[:-1]] == [
+        {"id": 1, "owner_id": "owner", "operation": "CREDIT_ADD", "amount": 10, "nonce": "n1",
+         "created_on": "2024-01-01T12:30:15.123456"},
+        {"id": 2, "owner_id": 'owner, "quoted"', "operation": "CREDIT_SPEND", "amount": -1, "nonce": "n2\nline",
+         "created_on": "2024-01-01T12:30:15.123456"},
+    ]
+
+
+def test_csv_rows_read_back_under_the_header():
+    text = encode_header(ExportFormat.CSV) + encode_rows(ROWS, ExportFormat.CSV)
+
+    records = list(csv.reader(io.StringIO(text, newline="")))
+
+    assert records == [
+        list(EXPORT_COLUMNS),
+        ["1", "owner", "CREDIT_ADD", "10", "n1", "2024-01-01T12:30:15.123456"],
+        ["2", 'owner, "quoted"', "CREDIT_SPEND", "-1", "n2\nline", "2024-01-01T12:30:15.123456"],
+    ]
+
+
+def test_batches_concatenate():
+    text = encode_rows(ROWS[:1], ExportFormat.CSV) + encode_rows(ROWS[1:], ExportFormat.CSV)
+
+    assert text == encode_rows(ROWS, ExportFormat.CSV)
+
+
+def test_empty_batch_encodes_to_nothing():
+    assert encode_rows([], ExportFormat.NDJSON) == ""
+    assert encode_rows([], ExportFormat.CSV) == ""
+
+
+def test_media_types():
+    assert ExportFormat.NDJSON.media_type == "application/x-ndjson"
+    assert ExportFormat.CSV.media_type == "text/csv"
@@ -0,0 +1,128 @@
+"""
+Tests of the group commit writer, with an in-memory repository.
+"""
+import asyncio
+from typing import List, Optional, Sequence, Tuple
+
+import pytest
+
+from monorepo.core.ledgers.schemas import LedgerEntryStatus
+from monorepo.core.ledgers.services.group_commit import GroupCommitWriter
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeSession:
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+
+class FakeRepository:
+    """Records the batches it is asked to write and rejects repeated nonces."""
+
+    def __init__(self, gate: Optional[asyncio.Event] = None):
+        self.batches: List[List[Tuple[str, str, str]]] = []
+        self.nonces = set()
+        self.gate = gate
+
+    async def create_entries(self, db: FakeSession, entries: Sequence[Tuple[str, str, str]]):
+        self.batches.append(list(entries))
+        if self.gate is not None:
+            await self.gate.wait()
+        outcomes = []
+        for owner_id, operation, nonce in entries:
+            if nonce in self.nonces:
+                outcomes.append((LedgerEntryStatus.DUPLICATE, None))
+            else:
+                self.nonces.add(nonce)
+                outcomes.append((LedgerEntryStatus.CREATED, (owner_id, operation, nonce)))
+        return outcomes
+
+
+def create_writer(repository: FakeRepository, **kwargs) -> GroupCommitWriter:
+    return GroupCommitWriter(FakeSession, repository, **kwargs)
+
+
+async def test_concurrent_entries_share_a_batch():
+    repository = FakeRepository()
+    writer = create_writer(repository, max_batch_size=10, max_delay=0.05)
+
+    outcomes = await asyncio.gather(*(writer.submit("owner", "CREDIT_ADD", f"n{i}") for i in range(5)))
+    await writer.stop()
+
+    assert repository.batches == [[("owner", "CREDIT_ADD", f"n{i}") for i in range(5)]]
+    assert [status for status, _ in outcomes] == [LedgerEntryStatus.CREATED] * 5
+    assert writer.stats()["batches"] == 1
+    assert writer.stats()["entries"] == 5
+
+
+async def test_batches_are_capped_at_max_batch_size():
+    repository = FakeRepository()
+    writer = create_writer(repository, max_batch_size=3, max_delay=0.05)
+
+    await asyncio.gather(*(writer.submit("owner", "CREDIT_ADD", f"n{i}") for i in range(7)))
+    await writer.stop()
+
+    assert all(len(batch) <= 3 for batch in repository.batches)
+    assert sum(len(batch) for batch in repository.batches) == 7
+
+
+async def test_each_submitter_gets_its_own_outcome():
+    repository = FakeRepository()
+    writer = create_writer(repository, max_batch_size=10, max_delay=0.05)
+
+    outcomes = await asyncio.gather(
+        writer.submit("owner", "CREDIT_ADD", "same"),
+        writer.submit("owner", "CREDIT_ADD", "same"),
+    )
+    await writer.stop()
+
+    assert [status for status, _ in outcomes] == [LedgerEntryStatus.CREATED, LedgerEntryStatus.DUPLICATE]
+
+
+async def test_stop_writes_the_entry_waiting_for_its_batch_to_fill():
+    repository = FakeRepository()
+    writer = create_writer(repository, max_batch_size=10, max_delay=60)
+
+    submitted = asyncio.create_task(writer.submit("owner", "CREDIT_ADD", "n0"))
+    # Let the collector take the entry from the queue and start waiting out max_delay
+    await asyncio.sleep(0.01)
+    assert writer.stats()["queued"] == 0
+    await writer.stop()
+
+    assert submitted.done()
+    assert submitted.result()[0] == LedgerEntryStatus.CREATED
+
+
+async def test_stop_writes_the_batch_waiting_for_a_write_slot():
+    gate = asyncio.Event()
+    repository = FakeRepository(gate)
+    writer = create_writer(repository, max_batch_size=1, max_delay=0, max_concurrent_batches=1)
+
+    first = asyncio.create_task(writer.submit("owner", "CREDIT_ADD", "n0"))
+    await asyncio.sleep(0.01)
+    # The only slot is taken by the first batch, so the collector holds the second one
+    second = asyncio.create_task(writer.submit("owner", "CREDIT_ADD", "n1"))
+    await asyncio.sleep(0.01)
+    stopping = asyncio.create_task(writer.stop())
+    await asyncio.sleep(0.01)
+    gate.set()
+    await stopping
+
+    assert first.result()[0] == LedgerEntryStatus.CREATED
+    assert second.result()[0] == LedgerEntryStatus.CREATED
+
+
+async def test_failed_batch_fails_its_submitters():
+    class FailingRepository(FakeRepository):
+        async def create_entries(self, db, entries):
+            raise RuntimeError("database unavailable")
+
+    writer = create_writer(FailingRepository(), max_batch_size=10, max_delay=0)
+
+    with pytest.raises(RuntimeError):
+        await writer.submit("owner", "CREDIT_ADD", "n0")
+    await writer.stop()
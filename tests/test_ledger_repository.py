@@ -0,0 +1,173 @@
+"""
+Tests of the ledger repository against Postgres.
+"""
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from monorepo.core.db.ledger_repository import LedgerRepository
+
+pytestmark = pytest.mark.anyio
+
+
+async def count_entries(session_factory, tables) -> int:
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(tables.entry))
+
+
+async def test_atomic_insert_creates_the_entry_and_its_balance(session_factory, ledger_tables):
+    repository = LedgerRepository(ledger_tables.entry, balance_model=ledger_tables.balance)
+
+    async with session_factory() as db:
+        row = await repository.create_entry_atomic(db, "owner", ledger_tables.operation.CREDIT_ADD, "n1")
+
+    assert row.owner_id == "owner"
+    assert row.nonce == "n1"
+    assert row.amount == 10
+    assert row.operation == ledger_tables.operation.CREDIT_ADD
+    async with session_factory() as db:
+        assert await repository.get_owner_balance(db, "owner") == 10
+        assert await repository.compute_owner_balance(db, "owner") == 10
+
+
+async def test_atomic_insert_skips_a_duplicate_nonce(session_factory, ledger_tables):
+    repository = LedgerRepository(ledger_tables.entry, balance_model=ledger_tables.balance)
+
+    async with session_factory() as db:
+        await repository.create_entry_atomic(db, "owner", ledger_tables.operation.CREDIT_ADD, "n1")
+        row = await repository.create_entry_atomic(db, "other", ledger_tables.operation.SIGNUP_CREDIT, "n1")
+
+    assert row is None
+    assert await count_entries(session_factory, ledger_tables) == 1
+    async with session_factory() as db:
+        assert await repository.get_owner_balances(db, ["owner", "other"]) == {"owner": 10, "other": 0}
+
+
+async def test_atomic_insert_rejects_an_overdraft(session_factory, ledger_tables):
+    repository = LedgerRepository(ledger_tables.entry, balance_model=ledger_tables.balance)
+
+    async with session_factory() as db:
+        spend = await repository.create_entry_atomic(db, "owner", ledger_tables.operation.CREDIT_SPEND, "n1")
+        await repository.create_entry_atomic(db, "owner", ledger_tables.operation.SIGNUP_CREDIT, "n2")
+        spends = [
+            await repository.create_entry_atomic(db, "owner", ledger_tables.operation.CREDIT_SPEND, f"s{index}")
+            for index in range(4)
+        ]
+
+    assert spend is None
+    assert [row is not None for row in spends] == [True, True, True, False]
+    async with session_factory() as db:
+        assert await repository.get_owner_balance(db, "owner") == 0
+        assert await repository.compute_owner_balance(db, "owner") == 0
+
+
+async def test_concurrent_atomic_spends_cannot_overdraw(session_factory, ledger_tables):
+    repository = LedgerRepository(ledger_tables.entry, balance_model=ledger_tables.balance)
+    async with session_factory() as db:
+        await repository.create_entry_atomic(db, "owner", ledger_tables.operation.SIGNUP_CREDIT, "n1")
+
+    async def spend(nonce: str):
+        async with session_factory() as db:
+            return await repository.create_entry_atomic(db, "owner", ledger_tables.operation.CREDIT_SPEND, nonce)
+
+    rows = await asyncio.gather(*(spend(f"s{index}") for index in range(6)))
+
+    assert sum(row is not None for row in rows) == 3
+    async with session_factory() as db:
+        assert await repository.get_owner_balance(db, "owner") == 0
+        assert await repository.compute_owner_balance(db, "owner") == 0
+
+
+async def test_atomic_insert_skips_an_archived_nonce(session_factory, ledger_tables):
+    repository = LedgerRepository(
+        ledger_tables.entry,
+        balance_model=ledger_tables.balance,
+        archived_nonce_model=ledger_tables.archived_nonce
+    )
+    async with session_factory() as db:
+        db.add(ledger_tables.archived_nonce(nonce="n1", owner_id="owner"))
+        await db.commit()
+
+    async with session_factory() as db:
+        row = await repository.create_entry_atomic(db, "owner", ledger_tables.operation.CREDIT_ADD, "n1")
+
+    assert row is None
+    assert await count_entries(session_factory, ledger_tables) == 0
+
+
+@pytest.mark.parametrize("with_balances", [False, True])
+async def test_concurrent_batches_cannot_overdraw(session_factory, ledger_tables, with_balances):
+    repository = LedgerRepository(ledger_tables.entry, balance_model=ledger_tables.balance if with_balances else None)
+    async with session_factory() as db:
+        await repository.create_entries(db, [("owner", ledger_tables.operation.SIGNUP_CREDIT, "n1")])
+
+    def spends(batch: str):
+        return [(owner_id, ledger_tables.operation.CREDIT_SPEND, f"{batch}-{owner_id}-{index}")
+                for index in range(3) for owner_id in ("other", "owner")]
+
+    async def write(batch: str):
+        async with session_factory() as db:
+            return await repository.create_entries(db, spends(batch))
+
+    async with session_factory() as db:
+        first = await repository._try_create_entries(db, spends("first"))
+        # The second batch must wait for the first to commit before it checks balances
+        second = asyncio.create_task(write("second"))
+        await asyncio.sleep(0.5)
+        await db.commit()
+    second = await second
+
+    created = [row for _, row in first + second if row is not None]
+    assert len(created) == 3
+    assert {row.nonce for row in created} == {"first-owner-0", "first-owner-1", "first-owner-2"}
+    async with session_factory() as db:
+        assert await repository.compute_owner_balance(db, "owner") == 0
+        assert await repository.get_owner_balance(db, "owner") == 0
+
+
+async def test_checkpoints_fold_the_committed_entries(session_factory, ledger_tables):
+    repository = LedgerRepository(ledger_tables.entry, checkpoint_model=ledger_tables.checkpoint)
+    async with session_factory() as db:
+        await repository.create_entries(db, [
+            ("owner", ledger_tables.operation.CREDIT_ADD, "n1"),
+            ("other", ledger_tables.operation.SIGNUP_CREDIT, "n2"),
+            ("owner", ledger_tables.operation.CREDIT_SPEND, "n3"),
+        ])
+
+    async with session_factory() as db:
+        assert await repository.build_checkpoints(db, chunk_size=2, lag=datetime.timedelta(0)) == 3
+        await repository.create_entries(db, [("owner", ledger_tables.operation.CREDIT_ADD, "n4")])
+
+    async with session_factory() as db:
+        checkpoints = (await db.execute(
+            select(ledger_tables.checkpoint.owner_id, ledger_tables.checkpoint.up_to_entry_id,
+                   ledger_tables.checkpoint.balance).order_by(ledger_tables.checkpoint.owner_id)
+        )).all()
+        assert [tuple(row) for row in checkpoints] == [("other", 2, 3), ("owner", 3, 9)]
+        assert await repository.get_owner_balances(db, ["owner", "other"]) == {"owner": 19, "other": 3}
+
+
+async def test_checkpoints_wait_for_writers_in_flight(session_factory, ledger_tables):
+    repository = LedgerRepository(ledger_tables.entry, checkpoint_model=ledger_tables.checkpoint)
+
+    async def build():
+        async with session_factory() as db:
+            return await repository.build_checkpoints(db, lag=datetime.timedelta(0))
+
+    async with session_factory() as db:
+        # Draws the lower entry ID, but commits after the higher one
+        await repository._try_create_entries(db, [("owner", ledger_tables.operation.CREDIT_ADD, "n1")])
+        async with session_factory() as other:
+            await repository.create_entries(other, [("owner", ledger_tables.operation.CREDIT_ADD, "n2")])
+        builder = asyncio.create_task(build())
+        await asyncio.sleep(0.5)
+        assert not builder.done()
+        await db.commit()
+    await builder
+
+    async with session_factory() as db:
+        checkpoint = await db.get(ledger_tables.checkpoint, "owner")
+        assert (checkpoint.up_to_entry_id, checkpoint.balance) == (2, 20)
+        assert await repository.compute_owner_balance(db, "owner") == 20
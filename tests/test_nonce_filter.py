@@ -0,0 +1,73 @@
+"""
+Tests of the Bloom filter over ledger nonces.
+"""
+import pytest
+
+from monorepo.core.db.nonce_filter import BloomNonceFilter
+
+
+def test_added_nonces_are_always_found():
+    nonce_filter = BloomNonceFilter(capacity=1000, error_rate=0.01)
+    nonces = [f"nonce-{i}" for i in range(1000)]
+    for nonce in nonces:
+        nonce_filter.add(nonce)
+
+    assert all(nonce_filter.might_contain(nonce) for nonce in nonces)
+    assert nonce_filter.count == 1000
+    assert nonce_filter.resets == 0
+
+
+def test_filter_is_cleared_when_capacity_is_reached():
+    nonce_filter = BloomNonceFilter(capacity=10, error_rate=0.01)
+    for i in range(10):
+        nonce_filter.add(f"old-{i}")
+
+    nonce_filter.add("new")
+
+    assert nonce_filter.resets == 1
+    assert nonce_filter.count == 1
+    assert nonce_filter.might_contain("new")
+    assert sum(nonce_filter.might_contain(f"old-{i}") for i in range(10)) < 10
+
+
+def test_clear_keeps_the_counters():
+    nonce_filter = BloomNonceFilter(capacity=100)
+    nonce_filter.add("nonce")
+    nonce_filter.might_contain("nonce")
+    nonce_filter.might_contain("other")
+
+    nonce_filter.clear()
+
+    assert nonce_filter.count == 0
+    assert not any(nonce_filter._bits)
+    assert nonce_filter.possible_hits == 1
+    assert nonce_filter.definite_misses == 1
+
+
+def test_false_positive_accounting():
+    nonce_filter = BloomNonceFilter(capacity=100)
+    assert nonce_filter.observed_false_positive_rate == 0.0
+
+    nonce_filter.add("seen")
+    assert nonce_filter.might_contain("seen")
+    assert not nonce_filter.might_contain("unseen")
+    nonce_filter.record_false_positive()
+    nonce_filter.record_false_positive()
+    nonce_filter.record_false_positive()
+
+    stats = nonce_filter.stats()
+    assert stats["possible_hits"] == 1
+    assert stats["definite_misses"] == 1
+    assert stats["false_positives"] == 3
+    assert stats["observed_false_positive_rate"] == pytest.approx(3 / 4)
+
+
+def test_false_positive_rate_stays_near_the_target():
+    nonce_filter = BloomNonceFilter(capacity=10000, error_rate=0.01)
+    for i in range(10000):
+        nonce_filter.add(f"added-{i}")
+
+    hits = sum(nonce_filter.might_contain(f"absent-{i}") for i in range(10000))
+
+    assert nonce_filter.estimated_false_positive_rate == pytest.approx(0.01, rel=0.5)
+    assert hits / 10000 < 0.03
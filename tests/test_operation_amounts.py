@@ -0,0 +1,102 @@
+"""
+Tests of the reload of versioned operation amounts.
+"""
+import json
+
+import pytest
+
+from monorepo.core.ledgers.config import LEDGER_OPERATION_CONFIG
+from monorepo.core.ledgers.operation_amounts import OperationAmountsReloader, load_operation_amounts
+from monorepo.core.ledgers.schemas import BaseLedgerOperation, apply_operation_amounts
+
+
+class SampleLedgerOperation(BaseLedgerOperation):
+    DAILY_REWARD = "DAILY_REWARD"
+    SIGNUP_CREDIT = "SIGNUP_CREDIT"
+    CREDIT_SPEND = "CREDIT_SPEND"
+    CREDIT_ADD = "CREDIT_ADD"
+
+
+@pytest.fixture(autouse=True)
+def restore_amounts():
+    yield
+    apply_operation_amounts(LEDGER_OPERATION_CONFIG)
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    return tmp_path / "amounts.json"
+
+
+def write_config(path, version, **changes) -> None:
+    amounts = {**LEDGER_OPERATION_CONFIG, **changes}
+    path.write_text(json.dumps({"version": version, "amounts": amounts}))
+
+
+def test_load_rejects_a_config_without_version(config_path):
+    config_path.write_text(json.dumps({"amounts": {}}))
+
+    with pytest.raises(ValueError):
+        load_operation_amounts(config_path)
+
+
+def test_reload_applies_a_newer_version(config_path):
+    reloader = OperationAmountsReloader(str(config_path))
+    write_config(config_path, 1, CREDIT_ADD=20)
+
+    assert reloader.reload()
+    assert reloader.version == 1
+    assert SampleLedgerOperation.CREDIT_ADD.value_amount == 20
+    assert not reloader.reload()
+
+
+def test_reload_ignores_an_older_version(config_path):
+    reloader = OperationAmountsReloader(str(config_path))
+    write_config(config_path, 2, CREDIT_ADD=20)
+    reloader.reload()
+
+    write_config(config_path, 1, CREDIT_ADD=30, SIGNUP_CREDIT=4)
+
+    assert not reloader.reload()
+    assert reloader.version == 2
+    assert SampleLedgerOperation.CREDIT_ADD.value_amount == 20
+
+
+def test_invalid_config_leaves_every_amount_unchanged(config_path):
+    reloader = OperationAmountsReloader(str(config_path))
+    amounts = {**LEDGER_OPERATION_CONFIG, "CREDIT_ADD": 20, "SIGNUP_CREDIT": "many"}
+    config_path.write_text(json.dumps({"version": 1, "amounts": amounts}))
+
+    with pytest.raises(TypeError):
+        reloader.reload()
+
+    assert reloader.version is None
+    assert SampleLedgerOperation.CREDIT_ADD.value_amount == LEDGER_OPERATION_CONFIG["CREDIT_ADD"]
+    assert SampleLedgerOperation.SIGNUP_CREDIT.value_amount == LEDGER_OPERATION_CONFIG["SIGNUP_CREDIT"]
+
+
+def test_missing_operation_is_rejected_before_any_swap():
+    amounts = {name: 7 for name in LEDGER_OPERATION_CONFIG if name != "DAILY_REWARD"}
+    table = SampleLedgerOperation._amount_table
+
+    with pytest.raises(TypeError):
+        apply_operation_amounts(amounts)
+
+    assert SampleLedgerOperation._amount_table is table
+
+
+def test_amount_table_is_swapped_as_a_whole(config_path):
+    table = SampleLedgerOperation._amount_table
+    reloader = OperationAmountsReloader(str(config_path))
+    write_config(config_path, 1, CREDIT_ADD=20, CREDIT_SPEND=-2)
+
+    reloader.reload()
+
+    assert table["CREDIT_ADD"] == LEDGER_OPERATION_CONFIG["CREDIT_ADD"]
+    assert SampleLedgerOperation._amount_table is not table
+    assert dict(SampleLedgerOperation._amount_table) == {
+        "DAILY_REWARD": LEDGER_OPERATION_CONFIG["DAILY_REWARD"],
+        "SIGNUP_CREDIT": LEDGER_OPERATION_CONFIG["SIGNUP_CREDIT"],
+        "CREDIT_SPEND": -2,
+        "CREDIT_ADD": 20,
+    }
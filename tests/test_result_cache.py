@@ -0,0 +1,62 @@
+"""
+Tests of the cache of recent write results.
+"""
+import datetime
+
+from monorepo.core.ledgers.pydantic_schemas import LedgerEntryRead
+from monorepo.core.ledgers.schemas import BaseLedgerOperation
+from monorepo.core.ledgers.services.result_cache import RecentResultCache
+
+
+class SampleLedgerOperation(BaseLedgerOperation):
+    DAILY_REWARD = "DAILY_REWARD"
+    SIGNUP_CREDIT = "SIGNUP_CREDIT"
+    CREDIT_SPEND = "CREDIT_SPEND"
+    CREDIT_ADD = "CREDIT_ADD"
+
+
+def create_entry(nonce: str) -> LedgerEntryRead:
+    return LedgerEntryRead[SampleLedgerOperation](
+        owner_id="owner",
+        operation=SampleLedgerOperation.CREDIT_ADD,
+        nonce=nonce,
+        amount=1,
+        id=1,
+        created_on=datetime.datetime(2024, 1, 1)
+    )
+
+
+def test_stored_result_is_returned():
+    cache = RecentResultCache(maxsize=10)
+    entry = create_entry("n1")
+    cache.put(entry)
+
+    assert cache.get("n1") == entry
+    assert cache.get("n2") is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_least_recently_used_result_is_evicted():
+    cache = RecentResultCache(maxsize=2)
+    cache.put(create_entry("n1"))
+    cache.put(create_entry("n2"))
+    cache.get("n1")
+
+    cache.put(create_entry("n3"))
+
+    assert cache.get("n2") is None
+    assert cache.get("n1") is not None
+    assert cache.get("n3") is not None
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_storing_a_nonce_again_does_not_evict():
+    cache = RecentResultCache(maxsize=2)
+    cache.put(create_entry("n1"))
+    cache.put(create_entry("n2"))
+
+    cache.put(create_entry("n1"))
+
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["evictions"] == 0
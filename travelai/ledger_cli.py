@@ -0,0 +1,46 @@
+"""
+Ledger maintenance commands for TravelAI.
+
+Usage:
+    python ledger_cli.py backfill-balances
+    python ledger_cli.py build-checkpoints [--chunk-size N] [--lag SECONDS]
+    python ledger_cli.py export [--format ndjson|csv] [--output FILE] [--owner-id ID]
+        [--operation NAME ...] [--created-from ISO] [--created-to ISO]
+    python ledger_cli.py archive --directory DIR [--older-than-days N] [--chunk-size N]
+    python ledger_cli.py read-archive --directory DIR [--format ndjson|csv] [--owner-id ID]
+    python ledger_cli.py relay-outbox [--sink file|notify] [--file PATH] [--channel NAME] [--name CURSOR]
+    python ledger_cli.py listen-changes [--channel NAME]
+"""
+import os
+import sys
+
+# Make the project root importable when run from the application directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from monorepo.core.db.ledger_repository import LedgerRepository
+from monorepo.core.ledgers.cli import run_ledger_cli
+from travelai.src.api.config import settings
+from travelai.src.api.ledgers.models import (
+    TravelAILedgerArchivedNonceModel,
+    TravelAILedgerCheckpointModel,
+    TravelAILedgerEntryModel,
+    TravelAILedgerNonceModel,
+    TravelAILedgerOutboxCursorModel,
+    TravelAILedgerOutboxModel,
+    TravelAIOwnerBalanceModel
+)
+
+
+if __name__ == "__main__":
+    run_ledger_cli(
+        settings.database_url_str,
+        LedgerRepository(
+            TravelAILedgerEntryModel,
+            balance_model=TravelAIOwnerBalanceModel,
+            checkpoint_model=TravelAILedgerCheckpointModel,
+            nonce_model=TravelAILedgerNonceModel,
+            outbox_model=TravelAILedgerOutboxModel,
+            outbox_cursor_model=TravelAILedgerOutboxCursorModel,
+            archived_nonce_model=TravelAILedgerArchivedNonceModel
+        )
+    )
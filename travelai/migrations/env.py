@@ -10,8 +10,16 @@ from sqlalchemy.ext.asyncio import create_async_engine
 
 from alembic import context
 from travelai.src.api.config import settings
-from monorepo.core.db.models import Base
-from travelai.src.api.ledgers.models import TravelAILedgerEntryModel
+from travelai.src.api.ledgers.models import (
+    TravelAILedgerArchivedNonceModel,
+    TravelAILedgerCheckpointModel,
+    TravelAILedgerEntryModel,
+    TravelAILedgerNonceModel,
+    TravelAILedgerOutboxCursorModel,
+    TravelAILedgerOutboxModel,
+    TravelAIOwnerBalanceModel,
+    metadata
+)
 
 # This is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -27,7 +35,7 @@ if config.config_file_name is not None:
 
 # Add your model's MetaData object here
 # for 'autogenerate' support
-target_metadata = Base.metadata
+target_metadata = metadata
 
 
 def run_migrations_offline() -> None:
@@ -0,0 +1,41 @@
+"""Create ledger_checkpoints table
+
+Revision ID: 0003_create_ledger_checkpoints
+Revises: 0002_create_owner_balances
+Create Date: 2026-10-18 00:00:00
+
+Per-owner balance checkpoints for TravelAI. The table starts empty and is
+filled by the checkpoint job or `python ledger_cli.py build-checkpoints`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003_create_ledger_checkpoints"
+down_revision = "0002_create_owner_balances"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_checkpoints",
+        sa.Column("owner_id", sa.String(length=100), nullable=False),
+        sa.Column("up_to_entry_id", sa.Integer(), nullable=False),
+        sa.Column("balance", sa.Integer(), nullable=False),
+        sa.Column("created_on", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("owner_id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_ledger_checkpoints_up_to_entry_id",
+        "ledger_checkpoints",
+        ["up_to_entry_id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ledger_checkpoints_up_to_entry_id", table_name="ledger_checkpoints")
+    op.drop_table("ledger_checkpoints")
@@ -0,0 +1,53 @@
+"""Partition ledger_entries by owner_id
+
+Revision ID: 0005_partition_ledger_entries
+Revises: 0004_add_owner_id_id_index
+Create Date: 2026-10-18 00:00:00
+
+Converts the TravelAI ledger_entries table to LEDGER_PARTITIONS hash partitions
+on owner_id and moves nonce uniqueness to the ledger_nonces registry. Nothing
+is changed when LEDGER_PARTITIONS is 0 or the table is already partitioned.
+The entries are copied under an exclusive lock, so run it in a maintenance
+window. To change the partition count later, downgrade to 0004 and upgrade
+again with the new setting.
+
+A database that setup_db created already partitioned has the schema of this
+revision but cannot run 0004, which builds its index concurrently; mark it
+as migrated with `alembic stamp head` instead of upgrading it.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from monorepo.core.db.partitioning import is_partitioned, partition_ledger_ddl, unpartition_ledger_ddl
+from travelai.src.api.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = "0005_partition_ledger_entries"
+down_revision = "0004_add_owner_id_id_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if settings.LEDGER_PARTITIONS <= 0 or is_partitioned(op.get_bind()):
+        return
+
+    op.create_table(
+        "ledger_nonces",
+        sa.Column("nonce", sa.String(length=100), nullable=False),
+        sa.Column("owner_id", sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint("nonce"),
+        if_not_exists=True,
+    )
+    for statement in partition_ledger_ddl(settings.LEDGER_PARTITIONS):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if not is_partitioned(op.get_bind()):
+        return
+
+    for statement in unpartition_ledger_ddl():
+        op.execute(statement)
+    op.drop_table("ledger_nonces")
@@ -8,11 +8,21 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import asyncio
 import sys
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
-from monorepo.core.db.models import Base
-from travelai.src.api.ledgers.models import TravelAILedgerEntryModel
+from travelai.src.api.ledgers.models import (
+    TravelAILedgerArchivedNonceModel,
+    TravelAILedgerCheckpointModel,
+    TravelAILedgerEntryModel,
+    TravelAILedgerNonceModel,
+    TravelAILedgerOutboxCursorModel,
+    TravelAILedgerOutboxModel,
+    TravelAIOwnerBalanceModel,
+    metadata
+)
 from travelai.src.api.config import settings
+from monorepo.core.db.ledger_repository import LedgerRepository
 
 
 async def setup_database():
@@ -31,11 +41,27 @@ async def setup_database():
         # Drop all tables if they exist
         if len(sys.argv) > 1 and sys.argv[1] == "--drop":
             print("Dropping all tables...")
-            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(metadata.drop_all)
 
         # Create all tables
         print("Creating all tables...")
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(metadata.create_all)
+
+    # Balances are read from owner_balances, which starts empty when it is
+    # created next to an existing ledger; fill it from the entries. A filled
+    # table is kept, as rebuilding it locks the ledger; rebuild it by hand with
+    # the backfill-balances command instead.
+    async with AsyncSession(engine) as db:
+        if (await db.scalar(select(exists().select_from(TravelAILedgerEntryModel)))
+                and not await db.scalar(select(exists().select_from(TravelAIOwnerBalanceModel)))):
+            repository = LedgerRepository(
+                TravelAILedgerEntryModel,
+                balance_model=TravelAIOwnerBalanceModel,
+                checkpoint_model=TravelAILedgerCheckpointModel,
+                nonce_model=TravelAILedgerNonceModel
+            )
+            count = await repository.rebuild_owner_balances(db)
+            print(f"Backfilled {count} owner balances from the existing ledger.")
 
     await engine.dispose()
     print("Database setup complete.")
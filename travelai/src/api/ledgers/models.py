@@ -1,12 +1,66 @@
 """
 TravelAI specific ledger SQLAlchemy models.
 """
-from monorepo.core.db.models import BaseLedgerEntry, EnumType
+from sqlalchemy import MetaData
+
+from monorepo.core.db.models import (
+    BaseLedgerArchivedNonce,
+    BaseLedgerCheckpoint,
+    BaseLedgerEntry,
+    BaseLedgerNonce,
+    BaseLedgerOutbox,
+    BaseLedgerOutboxCursor,
+    BaseOwnerBalance,
+    EnumType
+)
+from travelai.src.api.config import settings
 from travelai.src.api.ledgers.schemas import TravelAILedgerOperation
 
+# Tables of TravelAI, kept apart from those of the other apps that may share the process
+metadata = MetaData()
 
 # Create a concrete ledger entry model for TravelAI
 TravelAILedgerEntryModel = BaseLedgerEntry.create_concrete_model(
-    "TravelAILedgerEntryModel", 
-    TravelAILedgerOperation
-)
\ No newline at end of file
+    "TravelAILedgerEntryModel",
+    TravelAILedgerOperation,
+    partitions=settings.LEDGER_PARTITIONS,
+    metadata=metadata
+)
+
+# Create a concrete owner balance model for TravelAI
+TravelAIOwnerBalanceModel = BaseOwnerBalance.create_concrete_model(
+    "TravelAIOwnerBalanceModel",
+    metadata=metadata
+)
+
+# Create a concrete ledger checkpoint model for TravelAI
+TravelAILedgerCheckpointModel = BaseLedgerCheckpoint.create_concrete_model(
+    "TravelAILedgerCheckpointModel",
+    metadata=metadata
+)
+
+# Nonce registry enforcing nonce uniqueness across the ledger partitions
+TravelAILedgerNonceModel = None
+if settings.LEDGER_PARTITIONS > 0:
+    TravelAILedgerNonceModel = BaseLedgerNonce.create_concrete_model(
+        "TravelAILedgerNonceModel",
+        metadata=metadata
+    )
+
+# Nonces of archived entries, which a plain ledger keeps rejecting
+TravelAILedgerArchivedNonceModel = None
+if settings.LEDGER_PARTITIONS == 0:
+    TravelAILedgerArchivedNonceModel = BaseLedgerArchivedNonce.create_concrete_model(
+        "TravelAILedgerArchivedNonceModel",
+        metadata=metadata
+    )
+
+# Transactional outbox of the written entries, and the cursors of the relays draining it
+TravelAILedgerOutboxModel = BaseLedgerOutbox.create_concrete_model(
+    "TravelAILedgerOutboxModel",
+    metadata=metadata
+)
+TravelAILedgerOutboxCursorModel = BaseLedgerOutboxCursor.create_concrete_model(
+    "TravelAILedgerOutboxCursorModel",
+    metadata=metadata
+)
@@ -1,26 +1,155 @@
 """
 API endpoints for TravelAI ledger functionality.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import datetime
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from travelai.src.api.db import get_db
-from travelai.src.api.ledgers.models import TravelAILedgerEntryModel
+from travelai.src.api.config import settings
+from travelai.src.api.db import AsyncSessionLocal, get_db, get_read_db, read_router
+from travelai.src.api.ledgers.models import (
+    TravelAILedgerArchivedNonceModel,
+    TravelAILedgerCheckpointModel,
+    TravelAILedgerEntryModel,
+    TravelAILedgerNonceModel,
+    TravelAILedgerOutboxCursorModel,
+    TravelAILedgerOutboxModel,
+    TravelAIOwnerBalanceModel
+)
 from travelai.src.api.ledgers.schemas import (
     TravelAILedgerOperation,
+    TravelAILedgerBatchCreate,
+    TravelAILedgerBatchResponse,
     TravelAILedgerEntryCreate,
+    TravelAILedgerEntryPage,
     TravelAILedgerEntryRead
 )
+from monorepo.core.db.nonce_filter import BloomNonceFilter
+from monorepo.core.db.replicas import CONSISTENCY_TOKEN_HEADER
+from monorepo.core.ledgers.export import ExportFormat
+from monorepo.core.ledgers.responses import LedgerJSONResponse
+from monorepo.core.ledgers.services.balance_cache import BalanceCacheListener, LRUBalanceCache
 from monorepo.core.ledgers.services.base_ledger_service import create_ledger_service
-from monorepo.core.ledgers.pydantic_schemas import LedgerBalanceResponse
+from monorepo.core.ledgers.services.result_cache import RecentResultCache
+from monorepo.core.ledgers.pydantic_schemas import (
+    DEFAULT_LEDGER_PAGE_SIZE,
+    MAX_LEDGER_PAGE_SIZE,
+    LedgerBalanceResponse,
+    LedgerBalancesRequest
+)
+
+# Routes return LedgerJSONResponse, so the models built by the service are
+# serialized as they are instead of being validated again by FastAPI
+router = APIRouter(prefix="/ledger", tags=["ledger"], default_response_class=LedgerJSONResponse)
+
+# Balance cache shared by the requests of this worker
+balance_cache = None
+balance_cache_listener = None
+if settings.LEDGER_BALANCE_CACHE_SIZE > 0:
+    balance_cache = LRUBalanceCache(settings.LEDGER_BALANCE_CACHE_SIZE, settings.LEDGER_BALANCE_CACHE_TTL)
+    if settings.LEDGER_BALANCE_NOTIFY_CHANNEL:
+        balance_cache_listener = BalanceCacheListener(balance_cache, settings.LEDGER_BALANCE_NOTIFY_CHANNEL)
 
-router = APIRouter(prefix="/ledger", tags=["ledger"])
+# Nonce filter shared by the requests of this worker
+nonce_filter = None
+if settings.LEDGER_NONCE_FILTER_CAPACITY > 0:
+    nonce_filter = BloomNonceFilter(settings.LEDGER_NONCE_FILTER_CAPACITY, settings.LEDGER_NONCE_FILTER_ERROR_RATE)
+
+# Results of recent writes, replayed to clients retrying with the same nonce
+result_cache = None
+if settings.LEDGER_IDEMPOTENT_REPLAY and settings.LEDGER_RESULT_CACHE_SIZE > 0:
+    result_cache = RecentResultCache(settings.LEDGER_RESULT_CACHE_SIZE)
 
 # Create a concrete ledger service for TravelAI
-TravelAILedgerService = create_ledger_service(TravelAILedgerEntryModel, TravelAILedgerOperation)
+TravelAILedgerService = create_ledger_service(
+    TravelAILedgerEntryModel,
+    TravelAILedgerOperation,
+    balance_model=TravelAIOwnerBalanceModel,
+    checkpoint_model=TravelAILedgerCheckpointModel,
+    nonce_model=TravelAILedgerNonceModel,
+    outbox_model=TravelAILedgerOutboxModel if settings.LEDGER_OUTBOX_ENABLED else None,
+    outbox_cursor_model=TravelAILedgerOutboxCursorModel,
+    archived_nonce_model=TravelAILedgerArchivedNonceModel,
+    write_mode=settings.LEDGER_WRITE_MODE,
+    balance_cache=balance_cache,
+    notify_channel=settings.LEDGER_BALANCE_NOTIFY_CHANNEL,
+    nonce_filter=nonce_filter,
+    owner_locking=settings.LEDGER_OWNER_LOCKS,
+    session_factory=AsyncSessionLocal,
+    group_commit_max_batch_size=settings.LEDGER_GROUP_COMMIT_MAX_BATCH_SIZE,
+    group_commit_max_delay=settings.LEDGER_GROUP_COMMIT_MAX_DELAY_MS / 1000,
+    idempotent_replay=settings.LEDGER_IDEMPOTENT_REPLAY,
+    result_cache=result_cache
+)
 ledger_service = TravelAILedgerService()
 
 
+async def consistency_headers(db: AsyncSession) -> Dict[str, str]:
+    """
+    Build the response headers of a committed write.
+
+    Args:
+        db: Database session of the write
+
+    Returns:
+        The consistency token header, or no headers without replicas
+    """
+    token = await read_router.consistency_token(db)
+    return {CONSISTENCY_TOKEN_HEADER: token} if token is not None else {}
+
+
+# Declared before /{owner_id} so that "export" is not taken for an owner ID
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Export ledger entries",
+    description="Streams ledger entries in ID order as NDJSON or CSV"
+)
+async def export_entries(
+        format: ExportFormat = ExportFormat.NDJSON,
+        owner_id: Optional[str] = None,
+        operation: Optional[List[TravelAILedgerOperation]] = Query(None),
+        created_from: Optional[datetime.datetime] = None,
+        created_to: Optional[datetime.datetime] = None
+):
+    """
+    Export ledger entries.
+
+    The export reads from its own session, which stays open until the whole
+    response has been sent.
+
+    Args:
+        format: Output format
+        owner_id: Only include entries of this owner
+        operation: Only include entries with these operations
+        created_from: Only include entries created at or after this time
+        created_to: Only include entries created before this time
+
+    Returns:
+        A streaming response with the encoded entries
+    """
+    async def body():
+        async with AsyncSessionLocal() as db:
+            async for chunk in ledger_service.export_entries(
+                    db,
+                    format,
+                    owner_id=owner_id,
+                    operations=operation,
+                    created_from=created_from,
+                    created_to=created_to
+            ):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="ledger_entries.{format.value}"'}
+    )
+
+
 @router.get(
     "/{owner_id}",
     response_model=LedgerBalanceResponse,
@@ -29,19 +158,65 @@ ledger_service = TravelAILedgerService()
 )
 async def get_balance(
         owner_id: str,
-        db: AsyncSession = Depends(get_db)
+        consistency_token: Optional[str] = Header(None, alias=CONSISTENCY_TOKEN_HEADER),
+        db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get the current balance for an owner.
 
     Args:
         owner_id: ID of the owner
-        db: Database session
+        consistency_token: Token returned by a write this read must observe
+        db: Database session, on a replica when possible
 
     Returns:
         Current balance information
     """
-    return await ledger_service.get_balance(db, owner_id)
+    # The cache may hold a balance read from a replica before it caught up
+    balance = await ledger_service.get_balance(db, owner_id, use_cache=consistency_token is None)
+    return LedgerJSONResponse(balance)
+
+
+@router.get(
+    "/{owner_id}/entries",
+    response_model=TravelAILedgerEntryPage,
+    summary="Get owner ledger history",
+    description="Returns the owner's ledger entries newest first, one page at a time"
+)
+async def get_entries(
+        owner_id: str,
+        limit: int = Query(DEFAULT_LEDGER_PAGE_SIZE, ge=1, le=MAX_LEDGER_PAGE_SIZE),
+        cursor: Optional[int] = Query(None, description="next_cursor of the previous page"),
+        operation: Optional[List[TravelAILedgerOperation]] = Query(None),
+        created_from: Optional[datetime.datetime] = None,
+        created_to: Optional[datetime.datetime] = None,
+        db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get one page of an owner's ledger history.
+
+    Args:
+        owner_id: ID of the owner
+        limit: Maximum number of entries on the page
+        cursor: Cursor returned with the previous page
+        operation: Only include entries with these operations
+        created_from: Only include entries created at or after this time
+        created_to: Only include entries created before this time
+        db: Database session, on a replica when possible
+
+    Returns:
+        A page of ledger entries and the cursor of the next page
+    """
+    page = await ledger_service.get_entries(
+        db,
+        owner_id,
+        limit,
+        cursor=cursor,
+        operations=operation,
+        created_from=created_from,
+        created_to=created_to
+    )
+    return LedgerJSONResponse(page)
 
 
 @router.post(
@@ -63,11 +238,67 @@ async def add_ledger_entry(
         db: Database session
 
     Returns:
-        The created ledger entry
+        The created ledger entry, with a consistency token header when reads use replicas.
+        In idempotent replay mode a retry gets the entry of the original write.
     """
-    return await ledger_service.add_ledger_entry(
+    created = await ledger_service.add_ledger_entry(
         db=db,
         owner_id=entry.owner_id,
         operation=entry.operation,
         nonce=entry.nonce
-    )
\ No newline at end of file
+    )
+    return LedgerJSONResponse(
+        created,
+        status_code=status.HTTP_201_CREATED,
+        headers=await consistency_headers(db)
+    )
+
+
+@router.post(
+    "/balances",
+    response_model=List[LedgerBalanceResponse],
+    summary="Get balances of several owners",
+    description="Returns the current balance of each requested owner; owners without history have 0"
+)
+async def get_balances(
+        request: LedgerBalancesRequest,
+        consistency_token: Optional[str] = Header(None, alias=CONSISTENCY_TOKEN_HEADER),
+        db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the current balances of several owners.
+
+    Args:
+        request: IDs of the owners
+        consistency_token: Token returned by a write this read must observe
+        db: Database session, on a replica when possible
+
+    Returns:
+        One balance per distinct owner, in request order
+    """
+    balances = await ledger_service.get_balances(db, request.owner_ids, use_cache=consistency_token is None)
+    return LedgerJSONResponse(balances)
+
+
+@router.post(
+    "/batch",
+    response_model=TravelAILedgerBatchResponse,
+    summary="Add ledger entries in bulk",
+    description="Creates many ledger entries at once and returns a result for each of them"
+)
+async def add_ledger_entries(
+        batch: TravelAILedgerBatchCreate,
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Add many ledger entries in one request.
+
+    Args:
+        batch: Ledger entries to add, applied in order
+        db: Database session
+
+    Returns:
+        Per-entry results of the batch, with a consistency token header when reads use replicas
+    """
+    results = await ledger_service.add_ledger_entries(db=db, entries=batch.entries)
+    return LedgerJSONResponse(results, headers=await consistency_headers(db))
\ No newline at end of file
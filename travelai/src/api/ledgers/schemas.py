@@ -2,7 +2,11 @@
 TravelAI specific ledger schemas.
 """
 from monorepo.core.ledgers.schemas import BaseLedgerOperation
-from monorepo.core.ledgers.pydantic_schemas import create_ledger_schemas
+from monorepo.core.ledgers.pydantic_schemas import (
+    create_ledger_batch_schemas,
+    create_ledger_page_schema,
+    create_ledger_schemas
+)
 
 
 class TravelAILedgerOperation(BaseLedgerOperation):
@@ -23,4 +27,6 @@ class TravelAILedgerOperation(BaseLedgerOperation):
 
 
 # Create Pydantic schemas for TravelAI
-TravelAILedgerEntryCreate, TravelAILedgerEntryRead = create_ledger_schemas(TravelAILedgerOperation)
\ No newline at end of file
+TravelAILedgerEntryCreate, TravelAILedgerEntryRead = create_ledger_schemas(TravelAILedgerOperation)
+TravelAILedgerBatchCreate, TravelAILedgerBatchResponse = create_ledger_batch_schemas(TravelAILedgerOperation)
+TravelAILedgerEntryPage = create_ledger_page_schema(TravelAILedgerOperation)
\ No newline at end of file